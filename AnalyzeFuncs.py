@@ -4,30 +4,62 @@ Script to manually test strategy with different parameter combintations and data
 
 Functions
 ---------
-analyze_rsi_bb(symbol, timeSlice, portion, stopLossPortion)
+get_analysis_rates(symbol, timeSlice, days)
+	Returns the rates a backtest runs on.
+analyze_rsi_bb(symbol, timeSlice, portion, stopLossPortion, days, rates, strategy, budget, maxDrawdown)
 	Analyzes most recent market data and prints most profitable parameter combinations to terminal.
 test_rsi_bb_parameters(symbol, timeSlice, rsiPeriodLength, rsiUpperBound, rsiLowerBound, bbPeriodLength, bbLevel)
 	Tests specific combination and prints buy and sell actions that would have occurred with the given parameters.
-multiprocess_rsi_bb(symbol)
-	Multiprocesses "analyze_rsi_bb" for different time-slice or stop-loss parameters to compare strategy effectiveness.
+multiprocess_rsi_bb(symbol, timeSlice, portions, stopLossPortions, workers, topCount, days, maxDrawdown)
+	Multiprocesses the "analyze_rsi_bb" parameter sweep for different portion and stop-loss parameters to compare strategy effectiveness.
 """
 
 # Library imports
 import time
-import requests
-import threading
-import multiprocessing
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 
 # File imports
+from BacktestFuncs import *
 from HelperFuncs import *
+from IndicatorFuncs import *
+from SearchFuncs import *
+
+
+# ------------------------------------- Analyze rates -------------------------------------
+
+def get_analysis_rates(symbol, timeSlice, days=None):
+	"""
+	Returns the rates a backtest runs on.
+
+	Parameters
+	----------
+	symbol : str
+		Symbol associated with the base currency of a trading pair.
+	timeSlice : int
+		Time span in minutes for each data point. Must be 1, 5, 15, or 60.
+	days : float
+		If given, the last days of history are backfilled into the candle store and 
+		returned. Otherwise the most recent 150 data points are returned.
+
+	Returns
+	-------
+	pandas.DataFrame
+		Rates of a cryptocurrency in chronological order.
+	"""
+
+	if days is None:
+		return get_historic_rates(symbol, timeSlice).tail(150)
+	end = int(time.time())
+	return get_rates_range(symbol, timeSlice, end - int(days * 86400), end)
 
 
 # ------------------------------------ Analyze RSI BB -------------------------------------
 
 # Analyze crpyto for current most accurate parameter combination
-def analyze_rsi_bb(symbol, timeSlice, portion, stopLossPortion):
+def analyze_rsi_bb(symbol, timeSlice, portion, stopLossPortion, days=None, rates=None, strategy="grid", budget=None,
+		maxDrawdown=None):
 	"""
 	Analyzes most recent market data and prints most profitable parameter combinations to 
 	terminal.
@@ -44,131 +76,54 @@ def analyze_rsi_bb(symbol, timeSlice, portion, stopLossPortion):
 	stopLossPortion : float
 		Percentage of current price to set stop loss limit as decimal. Must be between 0.0 
 		and 1.0.
+	days : float
+		Amount of days of history to backtest on, see get_analysis_rates.
+	rates : pandas.DataFrame
+		If given, these rates are backtested instead of requesting them.
+	strategy : str
+		Parameter search strategy, see SearchFuncs.search_rsi_bb. Defaults to simulating 
+		every combination.
+	budget : int
+		Maximum amount of combinations simulated by the search strategy.
+	maxDrawdown : float
+		If given, combinations whose wallet falls this portion below holding are dropped 
+		mid-run, see BacktestFuncs.backtest_rsi_bb. Combinations that can no longer end 
+		with a gain over holding are always dropped.
+
+	Returns
+	-------
+	list of list
+		Top parameter combinations sorted by gain as [actionGainLoss, delta, timeSlice, 
+		rsiPeriodLength, rsiUpperBound, rsiLowerBound, bbPeriodLength, bbLevel].
 	"""
 
-	# Variable holders
-	inSellPeriod = False
-	inBuyPeriod = False
+	if rates is None:
+		rates = get_analysis_rates(symbol, timeSlice, days)
+	ratesHl2Series = pd.Series((rates["High"] + rates["Low"]).div(2).values, index=rates.index)
 
-	bestDelta = 0.0
-	stopLossLower = 0.0
-	stopLossUpper = 0.0
-	currentTopParameters = []
-	topParameters = []
+	# Search the parameter combinations
+	grid = build_rsi_bb_grid(range(3, 14), range(90, 66, -2), range(10, 34, 2), 36,
+		[float(bbLevelDouble) / 4.0 for bbLevelDouble in range(4, 14)], [stopLossPortion], [portion])
+	rsiTable = get_rsi_table(ratesHl2Series, np.unique(grid["rsiPeriodLength"]))
+	(bbMiddleTable, bbStdTable) = get_bb_table(ratesHl2Series.values, np.unique(grid["bbPeriodLength"]))
+	(delta, actionGainLoss, inSellPeriod, inBuyPeriod, simulations, pruned) = search_rsi_bb(ratesHl2Series.values,
+		rates["High"].values, rates["Low"].values, rsiTable, bbMiddleTable, bbStdTable, grid,
+		strategy=strategy, budget=budget, hysteresis=0.0, trailBbMiddle=True, pruneDelta=0.0, maxDrawdown=maxDrawdown)
 
-	rates = get_historic_rates(symbol, timeSlice).tail(150)
-	ratesHl2Series = pd.Series((rates["High"] + rates["Low"]).div(2).values, index=rates.index)
-	
-	for rsiPeriodLength in range(3, 14):
-		print(rsiPeriodLength)
-		# Set RSI values
-		ratesRsiSeries = get_rsi(ratesHl2Series, rsiPeriodLength)
-
-		for rsiUpperBound in range(90, 66, -2):
-			for rsiLowerBound in range(10, 34, 2):
-				for bbPeriodLength in range(rsiPeriodLength, 36, 2):
-					# Convert Pandas series to lists
-					ratesHigh = rates["High"].tolist()[(bbPeriodLength - 1):]
-					ratesLow = rates["Low"].tolist()[(bbPeriodLength - 1):]
-					ratesHl2 = ratesHl2Series.tolist()[(bbPeriodLength - 1):]
-					ratesRsi = ratesRsiSeries.tolist()[(bbPeriodLength - rsiPeriodLength):]
-					dates = rates.index.tolist()[(bbPeriodLength - 1):]
-
-			
-					for bbLevelDouble in range(4, 14):
-						# Start with 100USD and 100USD worth of crypto
-						usdStart = 100.0
-						cryptoStart = 100.0 / ratesHl2[0]
-						usdEnd = usdStart
-						cryptoEnd = cryptoStart
-
-						# Set BB values
-						bbLevel = float(bbLevelDouble) / 4.0
-						(bbUpperSeries, bbMiddleSeries, bbLowerSeries) = get_bb(ratesHl2Series, bbPeriodLength, bbLevel)
-
-						# Convert Pandas series to lists
-						bbUpper = bbUpperSeries.tolist()[(bbPeriodLength - 1):]
-						bbMiddle = bbMiddleSeries.tolist()[(bbPeriodLength - 1):]
-						bbLower = bbLowerSeries.tolist()[(bbPeriodLength - 1):]
-						stopLossUpper = bbMiddle[0] * (1.0 + stopLossPortion)
-						stopLossLower = bbMiddle[0] * (1.0 - stopLossPortion)
-
-						# Parse through data and determine buy or sell times and prices
-						# Calculates endWallet
-						for i in range(len(dates)):
-							if not inSellPeriod:
-								if (ratesRsi[i] > rsiUpperBound) and (ratesHigh[i] > bbUpper[i]):
-									inSellPeriod = True
-							else:
-								if (ratesRsi[i] <= rsiUpperBound) and (ratesHigh[i] <= bbUpper[i]):
-									usdEnd = usdEnd + (cryptoEnd * ratesHl2[i] * .995 * portion )
-									cryptoEnd = cryptoEnd * (1.0 - portion)
-									if stopLossUpper == 0.0:
-										stopLossUpper = max(bbMiddle[i], ratesHigh[i]) * (1.0 + stopLossPortion)
-									stopLossLower = 0.0
-									inSellPeriod = False
-
-							if not inBuyPeriod:
-								if (ratesRsi[i] < rsiLowerBound) and (ratesLow[i] < bbLower[i]):
-									inBuyPeriod = True
-							else:
-								if (ratesRsi[i] >= rsiLowerBound) and (ratesLow[i] >= bbLower[i]):
-									cryptoEnd = cryptoEnd + (usdEnd * .995 * portion / ratesHl2[i])
-									usdEnd = usdEnd * (1.0 - portion)
-									if stopLossLower == 0.0:
-										stopLossLower = min(bbMiddle[i], ratesLow[i]) * (1.0 - stopLossPortion)
-									stopLossUpper = 0.0
-									inBuyPeriod = False
-
-							if stopLossLower > 0.0:
-								if (min(bbMiddle[i], ratesLow[i]) * (1.0 - stopLossPortion)) > stopLossLower:
-									stopLossLower = min(bbMiddle[i], ratesLow[i]) * (1.0 - stopLossPortion)
-								if ratesLow[i] < stopLossLower:
-									usdEnd = usdEnd + (cryptoEnd * ratesHl2[i] * .995 * portion )
-									cryptoEnd = cryptoEnd * (1.0 - portion)
-									stopLossUpper = max(bbMiddle[i], ratesHigh[i]) * (1.0 + stopLossPortion)
-									stopLossLower = 0.0
-
-							if stopLossUpper > 0.0:
-								if (max(bbMiddle[i], ratesHigh[i]) * (1.0 + stopLossPortion)) < stopLossUpper:
-									stopLossUpper = max(bbMiddle[i], ratesHigh[i]) * (1.0 + stopLossPortion)
-								if ratesHigh[i] > stopLossUpper:
-									cryptoEnd = cryptoEnd + (usdEnd * .995 * portion / ratesHl2[i])
-									usdEnd = usdEnd * (1.0 - portion)
-									stopLossLower = min(bbMiddle[i], ratesLow[i]) * (1.0 - stopLossPortion)
-									stopLossUpper = 0.0
-
-						walletStart = 200.0
-						walletEnd = usdEnd + (cryptoEnd * ratesHl2[-1])
-
-						# Calculates action and no-action gains and losses
-						noActionGainLoss = (ratesHl2[-1] - ratesHl2[0]) / (2 * ratesHl2[0])
-						actionGainLoss = (walletEnd - walletStart) / walletStart
-						delta = actionGainLoss - noActionGainLoss
-
-						if (delta > 0.0) and (delta >= bestDelta):
-							bestDelta = delta
-							currentTopParameters.append([actionGainLoss, delta, timeSlice, rsiPeriodLength, rsiUpperBound, rsiLowerBound, bbPeriodLength, bbLevel])
-
-						inSellPeriod = False
-						inBuyPeriod = False
-
-		bestDelta = 0.0
-		currentTopParameters.reverse()
-		if len(currentTopParameters) > 3:
-			numberOfParameters = 3
-		else:
-			numberOfParameters = len(currentTopParameters)
-
-		for i in range(numberOfParameters):
-			topParameters.append(currentTopParameters[i])
-		currentTopParameters = []
+	# Top 3 parameter combinations for each rsiPeriodLength
+	topParameters = []
+	for i in get_top_parameter_indices(grid, delta, 3):
+		topParameters.append([float(actionGainLoss[i]), float(delta[i]), timeSlice,
+			int(grid["rsiPeriodLength"][i]), int(grid["rsiUpperBound"][i]), int(grid["rsiLowerBound"][i]),
+			int(grid["bbPeriodLength"][i]), float(grid["bbLevel"][i])])
 
 	topParameters.sort()
 	print(symbol + " SL-portion: " + str(stopLossPortion))
+	print("Simulated {:.0f} of {} combinations, pruned {}".format(simulations, len(delta), pruned))
 	print("actionGainLoss, delta, timeSlice, rsiP, rsiU, rsiL, bbP, bbLvl")
 	for parameters in topParameters:
 		print(parameters)
+	return topParameters
 
 
 # ------------------------------------- Test RSI BB ---------------------------------------
@@ -200,136 +155,114 @@ def test_rsi_bb_parameters(symbol, timeSlice, rsiPeriodLength, rsiUpperBound, rs
 	bbLevel : float
 		Standard deviation level used to calculate upper and lower bolling-bands. 
 		Must be greater than 0.0, recommended between 1.0 and 3.0.
-	"""
 
-	# Variable holders
-	inSellPeriod = False
-	inBuyPeriod = False
+	Returns
+	-------
+	dict of {str : numpy.ndarray}
+		Trades as traced by BacktestFuncs.backtest_rsi_bb.
+	"""
 
 	# Get rates, high/low average, rsi values and bb bands
 	rates = get_historic_rates(symbol, timeSlice).tail(150)
 	ratesHl2 = pd.Series((rates["High"] + rates["Low"]).div(2).values, index=rates.index)
-
-	ratesRsi = get_rsi(ratesHl2, rsiPeriodLength)
-	(bbUpper, bbMiddle, bbLower) = get_bb(ratesHl2, bbPeriodLength, bbLevel)
-
-	# Set series to lists of equal length
-	dates = rates.index.tolist()[(bbPeriodLength - 1):]
-	ratesHigh = rates["High"].tolist()[(bbPeriodLength - 1):]
-	ratesLow = rates["Low"].tolist()[(bbPeriodLength - 1):]
-	ratesHl2 = ratesHl2.tolist()[(bbPeriodLength - 1):]
-	ratesRsi = ratesRsi.tolist()[(bbPeriodLength - rsiPeriodLength):]
-	bbUpper = bbUpper.tolist()[(bbPeriodLength - 1):]
-	bbMiddle = bbMiddle.tolist()[(bbPeriodLength - 1):]
-	bbLower = bbLower.tolist()[(bbPeriodLength - 1):]
-
-	# Start with 100USD and 100USD worth of crypto
-	usdStart = 100.0
-	usdEnd = usdStart
-	cryptoStart = 100.0 / ratesHl2[0]
-	cryptoEnd = cryptoStart
-	portion = 0.99
-
-	stopLossPortion = 0.008
-	stopLossUpper = bbMiddle[0] * (1.0 + stopLossPortion)
-	stopLossLower = bbMiddle[0] * (1.0 - stopLossPortion)
-
-	# Parse through data and determine buy or sell times and prices
-	print("from:" + dates[0])
+	rsiTable = get_rsi_table(ratesHl2, [rsiPeriodLength])
+	(bbMiddleTable, bbStdTable) = get_bb_table(ratesHl2.values, [bbPeriodLength])
+
+	# Simulate the single combination with 100USD and 100USD worth of crypto
+	grid = {
+		"rsiPeriodLength": np.array([rsiPeriodLength], dtype=np.int64),
+		"rsiUpperBound": np.array([rsiUpperBound], dtype=np.float64),
+		"rsiLowerBound": np.array([rsiLowerBound], dtype=np.float64),
+		"bbPeriodLength": np.array([bbPeriodLength], dtype=np.int64),
+		"bbLevel": np.array([bbLevel], dtype=np.float64),
+		"stopLossPortion": np.array([0.008]),
+		"portion": np.array([0.99])}
+	(delta, actionGainLoss, inSellPeriod, inBuyPeriod, trades) = backtest_rsi_bb(ratesHl2.values,
+		rates["High"].values, rates["Low"].values, rsiTable, bbMiddleTable, bbStdTable, grid,
+		hysteresis=0.0, trailBbMiddle=True, trace=True)
+
+	# Print buy and sell actions
+	dates = rates.index.strftime("%Y-%m-%d %H:%M")
+	price = ratesHl2.values
+	start = bbPeriodLength - 1
+	print("from:" + dates[start])
 	print("to:  " + dates[-1])
-	for i in range(len(dates)):
-		if not inSellPeriod:
-			if (ratesRsi[i] > rsiUpperBound) and (ratesHigh[i] > bbUpper[i]):
-				inSellPeriod = True
-		else:
-			if (ratesRsi[i] <= rsiUpperBound) and (ratesHigh[i] <= bbUpper[i]):
-				usdEnd = usdEnd + (cryptoEnd * ratesHl2[i] * .995 * portion)
-				cryptoEnd = cryptoEnd * (1.0 - portion)
-				if stopLossUpper == 0.0:
-					stopLossUpper = max(bbMiddle[i], ratesHigh[i]) * (1.0 + stopLossPortion)
-				stopLossLower = 0.0
-				print("SELL on {} at: {:.6f}".format(dates[i], ratesHl2[i]))
-				print("   USD= {:.3f} | {}= {:.3f}".format(usdEnd, symbol, cryptoEnd))
-				inSellPeriod = False
-
-		if not inBuyPeriod:
-			if (ratesRsi[i] < rsiLowerBound) and (ratesLow[i] < bbLower[i]):
-				inBuyPeriod = True
-		else:
-			if (ratesRsi[i] >= rsiLowerBound) and (ratesLow[i] >= bbLower[i]):
-				cryptoEnd = cryptoEnd + (usdEnd * .995 * portion / ratesHl2[i])
-				usdEnd = usdEnd * (1.0 - portion)
-				if stopLossLower == 0.0:
-					stopLossLower = min(bbMiddle[i], ratesLow[i]) * (1.0 - stopLossPortion)
-				stopLossUpper = 0.0
-				print("BUY on {} at: {:.6f}".format(dates[i], ratesHl2[i]))
-				print("   USD= {:.3f} | {}= {:.3f}".format(usdEnd, symbol, cryptoEnd))
-				inBuyPeriod = False
-
-		if stopLossLower > 0.0:
-			if (min(bbMiddle[i], ratesLow[i]) * (1.0 - stopLossPortion)) > stopLossLower:
-				stopLossLower = min(bbMiddle[i], ratesLow[i]) * (1.0 - stopLossPortion)
-			if ratesLow[i] < stopLossLower:
-				usdEnd = usdEnd + (cryptoEnd * ratesHl2[i] * .995 * portion )
-				cryptoEnd = cryptoEnd * (1.0 - portion)
-				stopLossUpper = max(bbMiddle[i], ratesHigh[i]) * (1.0 + stopLossPortion)
-				stopLossLower = 0.0
-				print("SL-SELL on {} at: {:.6f}".format(dates[i], ratesHl2[i]))
-				print("   USD= {:.3f} | {}= {:.3f}".format(usdEnd, symbol, cryptoEnd))
-
-		if stopLossUpper > 0.0:
-			if (max(bbMiddle[i], ratesHigh[i]) * (1.0 + stopLossPortion)) < stopLossUpper:
-				stopLossUpper = max(bbMiddle[i], ratesHigh[i]) * (1.0 + stopLossPortion)
-			if ratesHigh[i] > stopLossUpper:
-				cryptoEnd = cryptoEnd + (usdEnd * .995 * portion / ratesHl2[i])
-				usdEnd = usdEnd * (1.0 - portion)
-				stopLossLower = min(bbMiddle[i], ratesLow[i]) * (1.0 - stopLossPortion)
-				stopLossUpper = 0.0
-				print("SL-BUY on {} at: {:.6f}".format(dates[i], ratesHl2[i]))
-				print("   USD= {:.3f} | {}= {:.3f}".format(usdEnd, symbol, cryptoEnd))
-
+	for trade in range(len(trades["index"])):
+		print("{} on {} at: {:.6f}".format(traceSides[trades["side"][trade]], dates[trades["index"][trade]],
+			trades["price"][trade]))
+		print("   USD= {:.3f} | {}= {:.3f}".format(trades["usd"][trade], symbol, trades["crypto"][trade]))
 
 	# Calculates endWallet
+	(usdEnd, cryptoEnd) = (100.0, 100.0 / price[start])
+	if len(trades["index"]) > 0:
+		(usdEnd, cryptoEnd) = (trades["usd"][-1], trades["crypto"][-1])
 	walletStart = 200.0
-	walletEnd = usdEnd + (cryptoEnd * ratesHl2[-1])
+	walletEnd = float(usdEnd + (cryptoEnd * price[-1]))
 
-	noActionGainLoss = (ratesHl2[-1] - ratesHl2[0]) / (2 * ratesHl2[0])
-	actionGainLoss = (walletEnd - walletStart) / walletStart
+	noActionGainLoss = float((price[-1] - price[start]) / (2 * price[start]))
 
 	print("walletStart: {}, walletEnd: {}".format(walletStart, walletEnd))
 	print("timeSlice, rsiPeriod, rsiUpper, rsiLower, bbPeriod, bbLevel")
 	print("{},    {},    {},    {},    {},    {}".format(timeSlice, rsiPeriodLength, rsiUpperBound, rsiLowerBound, bbPeriodLength, bbLevel))
-	print("actionGainLoss: {}, noActionGainLoss: {}".format(actionGainLoss, noActionGainLoss))
+	print("actionGainLoss: {}, noActionGainLoss: {}".format(float(actionGainLoss[0]), noActionGainLoss))
+	return trades
 
 
 # ----------------------------- Multiprocess-Analyze RSI BB -------------------------------
 
-def multiprocess_rsi_bb(symbol):
+def multiprocess_rsi_bb(symbol, timeSlice=60, portions=(0.99,), stopLossPortions=(0.014, 0.018, 0.022, 0.026),
+		workers=None, topCount=20, days=None, maxDrawdown=None):
 	"""
-	Multiprocesses "analyze_rsi_bb" for different time-slice or stop-loss parameters to 
-	compare strategy effectiveness.
+	Multiprocesses the "analyze_rsi_bb" parameter sweep for different portion and stop-loss 
+	parameters to compare strategy effectiveness.
+
+	The whole grid, including every portion and stop-loss portion, is split into chunks 
+	across a process pool and the best combinations of all chunks are merged into one 
+	ranking.
 
 	Parameters
 	----------
 	symbol : str
 		Symbol associated with the base currency of a trading pair.
+	timeSlice : int
+		Time span in minutes for each data point. Must be 1, 5, 15, or 60.
+	portions : iterable of float
+		Percentages of asset used in buy or sell actions as decimals.
+	stopLossPortions : iterable of float
+		Percentages of current price to set stop loss limits as decimals.
+	workers : int
+		Amount of worker processes. Defaults to the amount of CPUs.
+	topCount : int
+		Amount of parameter combinations returned.
+	days : float
+		Amount of days of history to backtest on, see get_analysis_rates.
+	maxDrawdown : float
+		If given, combinations whose wallet falls this portion below holding are dropped 
+		mid-run. Combinations that can no longer end with a gain over holding are always 
+		dropped.
+
+	Returns
+	-------
+	pandas.DataFrame
+		Best parameter combinations sorted by descending delta, see 
+		BacktestFuncs.sweep_rsi_bb.
 	"""
 
-	portion = 0.99
-	t1 = multiprocessing.Process(target=analyze_rsi_bb, args=(symbol, 60, portion, 0.014))
-	t2 = multiprocessing.Process(target=analyze_rsi_bb, args=(symbol, 60, portion, 0.018))
-	t3 = multiprocessing.Process(target=analyze_rsi_bb, args=(symbol, 60, portion, 0.022))
-	t4 = multiprocessing.Process(target=analyze_rsi_bb, args=(symbol, 60, portion, 0.026))
-
-	t1.start()
-	t2.start()
-	t3.start()
-	t4.start()
-
-	t1.join()
-	t2.join()
-	t3.join()
-	t4.join()
+	rates = get_analysis_rates(symbol, timeSlice, days)
+	ratesHl2Series = pd.Series((rates["High"] + rates["Low"]).div(2).values, index=rates.index)
+
+	grid = build_rsi_bb_grid(range(3, 14), range(90, 66, -2), range(10, 34, 2), 36,
+		[float(bbLevelDouble) / 4.0 for bbLevelDouble in range(4, 14)], stopLossPortions, portions)
+	rsiTable = get_rsi_table(ratesHl2Series, np.unique(grid["rsiPeriodLength"]))
+	(bbMiddleTable, bbStdTable) = get_bb_table(ratesHl2Series.values, np.unique(grid["bbPeriodLength"]))
+	topParameters = sweep_rsi_bb(ratesHl2Series.values, rates["High"].values, rates["Low"].values,
+		rsiTable, bbMiddleTable, bbStdTable, grid, hysteresis=0.0, trailBbMiddle=True,
+		workers=workers, topCount=topCount, pruneDelta=0.0, maxDrawdown=maxDrawdown)
+
+	print(symbol + " timeSlice: " + str(timeSlice))
+	print("Pruned {} of {} combinations".format(topParameters.attrs["pruned"], len(grid["rsiPeriodLength"])))
+	print(topParameters.to_string())
+	return topParameters
 
 
 if __name__ == "__main__":
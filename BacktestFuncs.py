@@ -0,0 +1,581 @@
+#!/usr/bin/env python3
+"""
+Module of functions that backtest the RSI, BB, stop-loss strategy over many parameter
+combinations at once.
+
+Every parameter combination is one row of a grid and the buy/sell/trailing-stop state
+machine is stepped candle by candle over a whole block of rows as NumPy arrays, so a sweep
+costs one vector operation per candle instead of one interpreter loop per combination.
+The same kernel scores whole sweeps and, in trace mode, records every trade of a few rows.
+
+Attributes
+----------
+traceSides : tuple of str
+	Names of the trade sides recorded in a trace, indexed by the trace's side codes.
+
+Functions
+---------
+build_rsi_bb_grid(rsiPeriodLengths, rsiUpperBounds, rsiLowerBounds, bbPeriodMax, bbLevels, stopLossPortions, portions)
+	Returns every parameter combination of a sweep as a dict of equal length arrays.
+get_rsi_table(rates, periodLengths)
+	Returns relative-strength-index values for several period lengths as one 2-D array.
+backtest_rsi_bb(price, high, low, rsiTable, bbMiddleTable, bbStdTable, grid, hysteresis, trailBbMiddle, blockSize, trace, pruneDelta, maxDrawdown, pruneInterval, firstCandle)
+	Simulates the strategy for every row of a parameter grid and returns the results.
+get_top_parameter_indices(grid, delta, topCount)
+	Returns the rows a sequential sweep would have reported as its top combinations.
+sweep_rsi_bb(price, high, low, rsiTable, bbMiddleTable, bbStdTable, grid, hysteresis, trailBbMiddle, workers, chunkSize, topCount, pruneDelta, maxDrawdown)
+	Splits a parameter grid across a process pool and returns the ranked top combinations.
+"""
+
+# Library imports
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+# File imports
+from IndicatorFuncs import get_rsi_matrix
+
+traceSides = ("", "SELL", "BUY", "SL-SELL", "SL-BUY")
+
+
+# ---------------------------------- Parameter grid ------------------------------------
+
+def build_rsi_bb_grid(rsiPeriodLengths, rsiUpperBounds, rsiLowerBounds, bbPeriodMax, bbLevels,
+		stopLossPortions, portions):
+	"""
+	Returns every parameter combination of a sweep as a dict of equal length arrays.
+
+	Rows are ordered the same way as the nested sweep loops (stopLossPortion, portion,
+	rsiPeriodLength, rsiUpperBound, rsiLowerBound, bbPeriodLength, bbLevel). Bollinger
+	period lengths start at the RSI period length and step by 2 up to bbPeriodMax.
+
+	Parameters
+	----------
+	rsiPeriodLengths : iterable of int
+		RSI period lengths to test.
+	rsiUpperBounds : iterable of int
+		RSI overbought thresholds to test.
+	rsiLowerBounds : iterable of int
+		RSI oversold thresholds to test.
+	bbPeriodMax : int
+		Exclusive upper limit of the bollinger-bands period lengths.
+	bbLevels : iterable of float
+		Standard deviation levels to test.
+	stopLossPortions : iterable of float
+		Stop-loss portions to test.
+	portions : iterable of float
+		Buy and sell portions to test.
+
+	Returns
+	-------
+	dict of {str : numpy.ndarray}
+		Parameter values per row as {"rsiPeriodLength", "rsiUpperBound", "rsiLowerBound",
+		"bbPeriodLength", "bbLevel", "stopLossPortion", "portion"}.
+	"""
+
+	rows = []
+	for stopLossPortion in stopLossPortions:
+		for portion in portions:
+			for rsiPeriodLength in rsiPeriodLengths:
+				for rsiUpperBound in rsiUpperBounds:
+					for rsiLowerBound in rsiLowerBounds:
+						for bbPeriodLength in range(rsiPeriodLength, bbPeriodMax, 2):
+							for bbLevel in bbLevels:
+								rows.append((rsiPeriodLength, rsiUpperBound, rsiLowerBound,
+									bbPeriodLength, bbLevel, stopLossPortion, portion))
+
+	columns = list(zip(*rows)) if rows else [()] * 7
+	return {
+		"rsiPeriodLength": np.array(columns[0], dtype=np.int64),
+		"rsiUpperBound": np.array(columns[1], dtype=np.float64),
+		"rsiLowerBound": np.array(columns[2], dtype=np.float64),
+		"bbPeriodLength": np.array(columns[3], dtype=np.int64),
+		"bbLevel": np.array(columns[4], dtype=np.float64),
+		"stopLossPortion": np.array(columns[5], dtype=np.float64),
+		"portion": np.array(columns[6], dtype=np.float64)}
+
+
+# ---------------------------------- Indicator tables ----------------------------------
+
+def get_rsi_table(rates, periodLengths):
+	"""
+	Returns relative-strength-index values for several period lengths as one 2-D array.
+
+	All period lengths are calculated in one pass, see IndicatorFuncs.get_rsi_matrix.
+
+	Parameters
+	----------
+	rates : pandas.Series or numpy.ndarray
+		Rates of a cryptocurrency in chronological order.
+	periodLengths : iterable of int
+		Period lengths to calculate.
+
+	Returns
+	-------
+	numpy.ndarray
+		Array of shape (max(periodLengths) + 1, len(rates)) where row p holds the RSI for
+		period length p aligned to the candle axis. Warm-up candles and unused rows are NaN.
+	"""
+
+	periodLengths = np.unique(np.asarray(list(periodLengths), dtype=np.int64))
+	rsiTable = np.full((periodLengths[-1] + 1, len(rates)), np.nan)
+	rsiTable[periodLengths] = get_rsi_matrix(rates, periodLengths)[0]
+	return rsiTable
+
+
+# ------------------------------------ Backtesting -------------------------------------
+
+def backtest_rsi_bb(price, high, low, rsiTable, bbMiddleTable, bbStdTable, grid,
+		hysteresis=0.0, trailBbMiddle=True, blockSize=8192, trace=False, pruneDelta=None, maxDrawdown=None,
+		pruneInterval=16, firstCandle=0):
+	"""
+	Simulates the strategy for every row of a parameter grid and returns the results.
+
+	Each row starts with 100USD and 100USD worth of crypto on candle bbPeriodLength - 1,
+	or on firstCandle if that is later, and follows the same buy, sell, and trailing stop-loss rules as the live bot. Rows are
+	processed in blocks of blockSize and every block is stepped through the candles with
+	one vector operation per rule.
+
+	Rows that can no longer matter are pruned every pruneInterval candles and skip the
+	remaining candles. A row is pruned when even perfect trading from its current balances
+	could not lift its final delta to pruneDelta, or when its wallet fell more than
+	maxDrawdown below the wallet of holding. Pruned rows report NaN results.
+
+	The perfect trading bound of pruneDelta grows with every rise left, so rows are only 
+	pruned once about 60% of the candles are done, and checking more often than every 16 
+	candles hardly prunes earlier. With pruneDelta=0.0 the 226,080 row grid of 
+	AnalyzeFuncs.analyze_rsi_bb on 150 to 250 synthetic candles ran 1.4 to 1.7 times as 
+	fast on calm and trending rates and about as fast on volatile and mixed rates, see 
+	BenchmarkFuncs.benchmark_pruning.
+
+	Parameters
+	----------
+	price : numpy.ndarray
+		Prices used for buy and sell actions in chronological order.
+	high : numpy.ndarray
+		High rates in chronological order.
+	low : numpy.ndarray
+		Low rates in chronological order.
+	rsiTable : numpy.ndarray
+		RSI values indexed as [rsiPeriodLength, candle], see get_rsi_table.
+	bbMiddleTable : numpy.ndarray
+		Rolling means indexed as [bbPeriodLength, candle], see IndicatorFuncs.get_bb_table.
+	bbStdTable : numpy.ndarray
+		Rolling standard deviations indexed as [bbPeriodLength, candle].
+	grid : dict of {str : numpy.ndarray}
+		Parameter combinations, see build_rsi_bb_grid.
+	hysteresis : float
+		Amount the RSI must move back inside its bound before a sell or buy period closes.
+	trailBbMiddle : bool
+		If True stop-losses start around the first bollinger middle value and trail the
+		further of the bollinger middle and the high or low rate. If False stop-losses start
+		disarmed and trail the high or low rate only.
+	blockSize : int
+		Maximum amount of parameter combinations simulated at once.
+	trace : bool
+		If True every trade is also recorded. Every row trades at most four times per
+		candle, so the trace arrays are preallocated for that many trades and are meant
+		for a few rows at a time.
+	pruneDelta : float
+		If given, rows whose final delta is certain to stay below it are pruned. With 0.0
+		the rows reported by get_top_parameter_indices are unchanged.
+	maxDrawdown : float
+		If given, rows whose wallet is more than this portion below the wallet of holding
+		are pruned. Unlike pruneDelta this is a heuristic, such rows could still recover.
+	pruneInterval : int
+		Amount of candles between two pruning passes.
+	firstCandle : int
+		Earliest candle any row starts on. The candles before it only warm up the tables,
+		so a later part of the data can be tested with indicators of the whole data.
+
+	Returns
+	-------
+	tuple of (numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray)
+		Results per grid row as (delta, actionGainLoss, inSellPeriod, inBuyPeriod) where
+		delta is the gain or loss compared to holding and the periods are the final states.
+		Pruned rows hold NaN deltas and gains and False periods.
+		In trace mode a fifth item holds the trades as a dict of equal length arrays
+		{"row", "index", "side", "price", "usd", "crypto"}: grid row, candle index, side
+		code (see traceSides), trade price, and both balances after the trade, ordered by
+		candle.
+	"""
+
+	price = np.ascontiguousarray(price, dtype=np.float64)
+	high = np.ascontiguousarray(high, dtype=np.float64)
+	low = np.ascontiguousarray(low, dtype=np.float64)
+
+	size = len(grid["rsiPeriodLength"])
+	delta = np.empty(size)
+	actionGainLoss = np.empty(size)
+	inSellPeriod = np.empty(size, dtype=bool)
+	inBuyPeriod = np.empty(size, dtype=bool)
+
+	trades = None
+	if trace:
+		capacity = 4 * len(price) * size
+		trades = {
+			"row": np.empty(capacity, dtype=np.int64),
+			"index": np.empty(capacity, dtype=np.int64),
+			"side": np.empty(capacity, dtype=np.int8),
+			"price": np.empty(capacity),
+			"usd": np.empty(capacity),
+			"crypto": np.empty(capacity),
+			"count": 0}
+
+	bounds = None
+	if pruneDelta is not None:
+		bounds = _get_bound_factors(price)
+
+	for blockStart in range(0, size, blockSize):
+		block = slice(blockStart, min(blockStart + blockSize, size))
+		(delta[block], actionGainLoss[block], inSellPeriod[block], inBuyPeriod[block]) = _backtest_block(
+			price, high, low, rsiTable, bbMiddleTable, bbStdTable,
+			{key: value[block] for key, value in grid.items()}, hysteresis, trailBbMiddle, trades, blockStart,
+			bounds, pruneDelta, maxDrawdown, pruneInterval, firstCandle)
+
+	if not trace:
+		return (delta, actionGainLoss, inSellPeriod, inBuyPeriod)
+
+	# Blocks are traced one after another, order all trades by candle
+	count = trades.pop("count")
+	ordered = np.argsort(trades["index"][:count], kind="stable")
+	trades = {key: value[:count][ordered] for key, value in trades.items()}
+	return (delta, actionGainLoss, inSellPeriod, inBuyPeriod, trades)
+
+
+def _get_bound_factors(price):
+	"""
+	Returns how much a wallet held in USD or in crypto after each candle can grow at most.
+
+	Perfect trading from candle i holds crypto exactly while the price rises and pays the
+	0.5% fee on every switch. Because fees are proportional, a wallet of usd and crypto
+	ends with at most usd * usdFactor[i] + crypto * price[i] * cryptoFactor[i]. The bound 
+	holds for any row but ignores when a row is able to trade, see backtest_rsi_bb.
+	"""
+
+	usdFactor = np.ones(len(price))
+	cryptoFactor = np.ones(len(price))
+	for i in range(len(price) - 2, -1, -1):
+		usdFactor[i] = max(usdFactor[i + 1], .995 * cryptoFactor[i + 1])
+		cryptoFactor[i] = (price[i + 1] / price[i]) * max(cryptoFactor[i + 1], .995 * usdFactor[i + 1])
+	return (usdFactor, cryptoFactor)
+
+
+def _backtest_block(price, high, low, rsiTable, bbMiddleTable, bbStdTable, grid, hysteresis, trailBbMiddle,
+		trades=None, rowOffset=0, bounds=None, pruneDelta=None, maxDrawdown=None, pruneInterval=16, firstCandle=0):
+	"""
+	Simulates one block of parameter combinations, see backtest_rsi_bb.
+	"""
+
+	def record(rows, i, side):
+		# Appends the trades of rows on candle i to the preallocated trace arrays
+		rows = np.flatnonzero(rows)
+		trade = slice(trades["count"], trades["count"] + len(rows))
+		trades["row"][trade] = order[position[rows]] + rowOffset
+		trades["index"][trade] = i
+		trades["side"][trade] = side
+		trades["price"][trade] = price[i]
+		trades["usd"][trade] = usd[rows]
+		trades["crypto"][trade] = crypto[rows]
+		trades["count"] = trade.stop
+
+	# Sort rows by start candle so the rows that are running are always a prefix
+	start = np.maximum(grid["bbPeriodLength"] - 1, firstCandle)
+	order = np.argsort(start, kind="stable")
+	start = start[order]
+	rsiRow = grid["rsiPeriodLength"][order]
+	bbRow = grid["bbPeriodLength"][order]
+	bbLevel = grid["bbLevel"][order]
+	sellBound = grid["rsiUpperBound"][order]
+	sellExitBound = sellBound - hysteresis
+	buyBound = grid["rsiLowerBound"][order]
+	buyExitBound = buyBound + hysteresis
+	portion = grid["portion"][order]
+	keepPortion = 1.0 - portion
+	stopLossPortion = grid["stopLossPortion"][order]
+	stopUpperFactor = 1.0 + stopLossPortion
+	stopLowerFactor = 1.0 - stopLossPortion
+
+	# Start with 100USD and 100USD worth of crypto
+	usd = np.full(len(start), 100.0)
+	crypto = 100.0 / price[start]
+	if trailBbMiddle:
+		stopLossUpper = bbMiddleTable[bbRow, start] * stopUpperFactor
+		stopLossLower = bbMiddleTable[bbRow, start] * stopLowerFactor
+	else:
+		stopLossUpper = np.zeros(len(start))
+		stopLossLower = np.zeros(len(start))
+	inSell = np.zeros(len(start), dtype=bool)
+	inBuy = np.zeros(len(start), dtype=bool)
+
+	# Rows still simulated, as positions in start order
+	position = np.arange(len(start))
+	holdStart = 100.0 / price[start]
+	pruning = (pruneDelta is not None) or (maxDrawdown is not None)
+
+	candles = np.searchsorted(start, np.arange(len(price)), side="right")
+	for i in range(start[0] if len(start) else len(price), len(price)):
+		k = candles[i]
+		if k == 0:
+			continue
+		p = price[i]
+		h = high[i]
+		l = low[i]
+		rsi = rsiTable[rsiRow[:k], i]
+		bbMiddle = bbMiddleTable[bbRow[:k], i]
+		bandWidth = bbStdTable[bbRow[:k], i] * bbLevel[:k]
+		bbUpper = bbMiddle + bandWidth
+		bbLower = bbMiddle - bandWidth
+		if trailBbMiddle:
+			stopHigh = np.maximum(bbMiddle, h)
+			stopLow = np.minimum(bbMiddle, l)
+		else:
+			stopHigh = np.full(k, h)
+			stopLow = np.full(k, l)
+
+		u = usd[:k]
+		c = crypto[:k]
+		su = stopLossUpper[:k]
+		sl = stopLossLower[:k]
+		s = inSell[:k]
+		b = inBuy[:k]
+
+		# Sell period
+		enter = ~s & (rsi > sellBound[:k]) & (h > bbUpper)
+		leave = s & (rsi <= sellExitBound[:k]) & (h <= bbUpper)
+		if leave.any():
+			u[leave] = u[leave] + (c[leave] * p * .995 * portion[:k][leave])
+			c[leave] = c[leave] * keepPortion[:k][leave]
+			arm = leave & (su == 0.0)
+			su[arm] = stopHigh[arm] * stopUpperFactor[:k][arm]
+			sl[leave] = 0.0
+			if trades is not None:
+				record(leave, i, 1)
+		s[enter] = True
+		s[leave] = False
+
+		# Buy period
+		enter = ~b & (rsi < buyBound[:k]) & (l < bbLower)
+		leave = b & (rsi >= buyExitBound[:k]) & (l >= bbLower)
+		if leave.any():
+			c[leave] = c[leave] + (u[leave] * .995 * portion[:k][leave] / p)
+			u[leave] = u[leave] * keepPortion[:k][leave]
+			arm = leave & (sl == 0.0)
+			sl[arm] = stopLow[arm] * stopLowerFactor[:k][arm]
+			su[leave] = 0.0
+			if trades is not None:
+				record(leave, i, 2)
+		b[enter] = True
+		b[leave] = False
+
+		# Trailing stop-loss below price
+		armed = sl > 0.0
+		if armed.any():
+			trail = stopLow * stopLowerFactor[:k]
+			np.copyto(sl, trail, where=armed & (trail > sl))
+			hit = armed & (l < sl)
+			if hit.any():
+				u[hit] = u[hit] + (c[hit] * p * .995 * portion[:k][hit])
+				c[hit] = c[hit] * keepPortion[:k][hit]
+				su[hit] = stopHigh[hit] * stopUpperFactor[:k][hit]
+				sl[hit] = 0.0
+				if trades is not None:
+					record(hit, i, 3)
+
+		# Trailing stop-loss above price
+		armed = su > 0.0
+		if armed.any():
+			trail = stopHigh * stopUpperFactor[:k]
+			np.copyto(su, trail, where=armed & (trail < su))
+			hit = armed & (h > su)
+			if hit.any():
+				c[hit] = c[hit] + (u[hit] * .995 * portion[:k][hit] / p)
+				u[hit] = u[hit] * keepPortion[:k][hit]
+				sl[hit] = stopLow[hit] * stopLowerFactor[:k][hit]
+				su[hit] = 0.0
+				if trades is not None:
+					record(hit, i, 4)
+
+		# Drop rows that can no longer matter and keep the rows still to start behind them
+		if pruning and (i % pruneInterval == 0) and (i < len(price) - 1):
+			wallet = u + (c * p)
+			hold = 100.0 + (holdStart[:k] * p)
+			prune = np.zeros(k, dtype=bool)
+			if pruneDelta is not None:
+				(usdFactor, cryptoFactor) = bounds
+				holdEnd = 100.0 + (holdStart[:k] * price[-1])
+				bestDelta = ((u * usdFactor[i]) + (c * p * cryptoFactor[i]) - holdEnd) / 200.0
+
+				# Small margin so rounding never prunes a row that ends exactly on pruneDelta
+				prune |= bestDelta < pruneDelta - 1e-9
+			if maxDrawdown is not None:
+				prune |= wallet < hold * (1.0 - maxDrawdown)
+			if prune.any():
+				keep = np.concatenate((np.flatnonzero(~prune), np.arange(k, len(start))))
+				(start, rsiRow, bbRow, bbLevel, sellBound, sellExitBound, buyBound, buyExitBound, portion,
+					keepPortion, stopUpperFactor, stopLowerFactor, usd, crypto, stopLossUpper, stopLossLower,
+					inSell, inBuy, position, holdStart) = (values[keep] for values in (start, rsiRow, bbRow,
+					bbLevel, sellBound, sellExitBound, buyBound, buyExitBound, portion, keepPortion,
+					stopUpperFactor, stopLowerFactor, usd, crypto, stopLossUpper, stopLossLower, inSell,
+					inBuy, position, holdStart))
+				candles = np.searchsorted(start, np.arange(len(price)), side="right")
+
+	# Calculates action and no-action gains and losses
+	walletStart = 200.0
+	walletEnd = usd + (crypto * price[-1])
+	noActionGainLoss = (price[-1] - price[start]) / (2 * price[start])
+	actionGainLoss = (walletEnd - walletStart) / walletStart
+	delta = actionGainLoss - noActionGainLoss
+
+	# Restore grid order, pruned rows stay NaN
+	results = (np.full(len(order), np.nan), np.full(len(order), np.nan), np.zeros(len(order), dtype=bool),
+		np.zeros(len(order), dtype=bool))
+	for (result, values) in zip(results, (delta, actionGainLoss, inSell, inBuy)):
+		result[order[position]] = values
+	return results
+
+
+# -------------------------------- Parameter selection ---------------------------------
+
+def get_top_parameter_indices(grid, delta, topCount=3):
+	"""
+	Returns the rows a sequential sweep would have reported as its top combinations.
+
+	Within every RSI period length a combination is recorded when its delta is positive and
+	at least the best delta recorded before it. The last topCount records of each period
+	length are returned newest first, matching the order the sweeps have always printed.
+
+	Parameters
+	----------
+	grid : dict of {str : numpy.ndarray}
+		Parameter combinations, see build_rsi_bb_grid.
+	delta : numpy.ndarray
+		Delta per grid row, see backtest_rsi_bb.
+	topCount : int
+		Amount of records kept per RSI period length.
+
+	Returns
+	-------
+	list of int
+		Grid row indices.
+	"""
+
+	indices = []
+	rsiPeriodLength = grid["rsiPeriodLength"]
+	if len(rsiPeriodLength) == 0:
+		return indices
+
+	# Rows of one RSI period length are contiguous in grid order
+	bounds = np.flatnonzero(np.diff(rsiPeriodLength)) + 1
+	for rows in np.split(np.arange(len(rsiPeriodLength)), bounds):
+		rowDelta = delta[rows]
+		bestDelta = np.fmax.accumulate(np.concatenate(([0.0], rowDelta[:-1])))
+		bestDelta = np.fmax(bestDelta, 0.0)
+		records = rows[(rowDelta > 0.0) & (rowDelta >= bestDelta)]
+		indices.extend(records[::-1][:topCount].tolist())
+	return indices
+
+
+# ---------------------------------- Parallel sweep ------------------------------------
+
+def sweep_rsi_bb(price, high, low, rsiTable, bbMiddleTable, bbStdTable, grid, hysteresis=0.0,
+		trailBbMiddle=True, workers=None, chunkSize=None, topCount=20, pruneDelta=None, maxDrawdown=None):
+	"""
+	Splits a parameter grid across a process pool and returns the ranked top combinations.
+
+	The grid is cut into chunks that are backtested in worker processes. Every worker only 
+	sends back the topCount best rows of its chunk and those are merged into one ranking.
+
+	Parameters
+	----------
+	price : numpy.ndarray
+		Prices used for buy and sell actions in chronological order.
+	high : numpy.ndarray
+		High rates in chronological order.
+	low : numpy.ndarray
+		Low rates in chronological order.
+	rsiTable : numpy.ndarray
+		RSI values indexed as [rsiPeriodLength, candle], see get_rsi_table.
+	bbMiddleTable : numpy.ndarray
+		Rolling means indexed as [bbPeriodLength, candle], see IndicatorFuncs.get_bb_table.
+	bbStdTable : numpy.ndarray
+		Rolling standard deviations indexed as [bbPeriodLength, candle].
+	grid : dict of {str : numpy.ndarray}
+		Parameter combinations including stop-loss portions and portions, see 
+		build_rsi_bb_grid.
+	hysteresis : float
+		Amount the RSI must move back inside its bound before a sell or buy period closes.
+	trailBbMiddle : bool
+		Stop-loss placement, see backtest_rsi_bb.
+	workers : int
+		Amount of worker processes. Defaults to the amount of CPUs. If 1 the sweep runs in 
+		the calling process.
+	chunkSize : int
+		Amount of combinations per task. Defaults to splitting the grid into four tasks per 
+		worker.
+	topCount : int
+		Amount of combinations returned.
+	pruneDelta : float
+		Pruning threshold of the delta, see backtest_rsi_bb.
+	maxDrawdown : float
+		Pruning threshold of the wallet below holding, see backtest_rsi_bb.
+
+	Returns
+	-------
+	pandas.DataFrame
+		Best combinations sorted by descending delta with the grid columns and ["delta", 
+		"actionGainLoss", "inSellPeriod", "inBuyPeriod"], indexed by grid row. Pruned 
+		combinations are never ranked, their amount is kept in attrs["pruned"].
+	"""
+
+	if workers is None:
+		workers = os.cpu_count() or 1
+	size = len(grid["rsiPeriodLength"])
+	if chunkSize is None:
+		chunkSize = max(1, -(-size // (workers * 4)))
+
+	tables = (np.asarray(price, dtype=np.float64), np.asarray(high, dtype=np.float64),
+		np.asarray(low, dtype=np.float64), rsiTable, bbMiddleTable, bbStdTable)
+	tasks = [(tables, {key: value[chunkStart:chunkStart + chunkSize] for key, value in grid.items()},
+		chunkStart, hysteresis, trailBbMiddle, topCount, pruneDelta, maxDrawdown) for chunkStart in range(0, size, chunkSize)]
+
+	if workers == 1:
+		results = [_sweep_chunk(task) for task in tasks]
+	else:
+		with ProcessPoolExecutor(max_workers=workers) as executor:
+			results = list(executor.map(_sweep_chunk, tasks))
+
+	# Merge the per-chunk rankings
+	columns = ["index", "delta", "actionGainLoss", "inSellPeriod", "inBuyPeriod"]
+	merged = {column: np.concatenate([result[column] for result in results]) if results else np.empty(0)
+		for column in columns}
+	ranking = np.lexsort((merged["index"], -merged["delta"]))[:topCount]
+	index = merged["index"][ranking].astype(np.int64)
+
+	topParameters = pd.DataFrame({key: value[index] for key, value in grid.items()}, index=index)
+	for column in columns[1:]:
+		topParameters[column] = merged[column][ranking]
+	topParameters[["inSellPeriod", "inBuyPeriod"]] = topParameters[["inSellPeriod", "inBuyPeriod"]].astype(bool)
+	topParameters.attrs["pruned"] = sum(result["pruned"] for result in results)
+	return topParameters
+
+
+def _sweep_chunk(task):
+	"""
+	Backtests one chunk of a sweep and returns its best rows, see sweep_rsi_bb.
+	"""
+
+	(tables, grid, chunkStart, hysteresis, trailBbMiddle, topCount, pruneDelta, maxDrawdown) = task
+	(delta, actionGainLoss, inSellPeriod, inBuyPeriod) = backtest_rsi_bb(*tables, grid,
+		hysteresis=hysteresis, trailBbMiddle=trailBbMiddle, pruneDelta=pruneDelta, maxDrawdown=maxDrawdown)
+
+	rows = np.flatnonzero(np.isfinite(delta))
+	rows = rows[np.argsort(-delta[rows], kind="stable")[:topCount]]
+	return {
+		"index": rows + chunkStart,
+		"delta": delta[rows],
+		"actionGainLoss": actionGainLoss[rows],
+		"inSellPeriod": inSellPeriod[rows],
+		"inBuyPeriod": inBuyPeriod[rows],
+		"pruned": int(np.isnan(delta).sum())}
@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+"""
+Script to benchmark indicators, the parameter sweep, search, and pruning, the live tick path,
+and imports offline.
+
+Every benchmark runs on seeded synthetic candles so results are repeatable without a
+network connection. Results are compared with the baselines saved in baselinePath and
+any benchmark that got slower than regressionTolerance allows is flagged.
+
+	python BenchmarkFuncs.py            Runs all benchmarks and compares with the baselines.
+	python BenchmarkFuncs.py --save     Runs all benchmarks and saves them as new baselines.
+
+Attributes
+----------
+baselinePath : str
+	Path of the JSON file holding the saved baselines.
+regressionTolerance : float
+	Fraction a benchmark may get slower than its baseline before it is flagged.
+volatilityRegimes : dict of str to tuple
+	Synthetic market regimes as (drift, volatility, jumpProbability, jumpSize) per candle.
+importModules : tuple of str
+	Modules whose cold import time is measured.
+
+Functions
+---------
+generate_candles(count, regime, seed, timeSlice, startTime, price)
+	Returns seeded synthetic candles for a volatility regime.
+generate_rates(count, regime, seed, timeSlice, startTime, price)
+	Returns seeded synthetic rates for a volatility regime.
+time_call(func, repeat, number)
+	Returns the fastest time in seconds of one call to func.
+benchmark_indicators(rates)
+	Measures indicator throughput in candles per second.
+benchmark_sweep(regimes, count, seed)
+	Measures parameter sweep throughput in combinations per second.
+benchmark_search(regimes, count, seed, budget)
+	Measures how close every search strategy gets to the best delta of the full grid.
+benchmark_pruning(regimes, count, seed)
+	Measures how much faster pruning makes the backtest of the live analysis.
+benchmark_tick(ticks, seed)
+	Measures per-tick latency of the live tick path in milliseconds.
+benchmark_import(modules, repeat)
+	Measures the cold import time of modules in milliseconds.
+run_benchmarks(seed)
+	Runs every benchmark and returns the results.
+load_baseline(path)
+	Returns the saved baselines.
+save_baseline(results, path)
+	Saves results as the new baselines.
+compare_to_baseline(results, baseline, tolerance)
+	Prints results next to their baselines and returns the regressed benchmarks.
+"""
+
+# Library imports
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+# File imports
+from AnalyzeFuncs import analyze_rsi_bb
+from BacktestFuncs import *
+from IndicatorFuncs import *
+from SearchFuncs import *
+from StoreFuncs import *
+
+baselinePath = "benchmark_baseline.json"
+regressionTolerance = 0.25
+volatilityRegimes = {
+	"calm": (0.0, 0.0008, 0.0, 0.0),
+	"trending": (0.0004, 0.0015, 0.0, 0.0),
+	"volatile": (0.0, 0.006, 0.01, 0.03),
+	"mixed": None}
+importModules = ("IndicatorFuncs", "BacktestFuncs", "StrategyFuncs", "RunnerFuncs", "BotDaemon")
+
+
+# ---------------------------------- Synthetic candles ----------------------------------
+
+def generate_candles(count, regime="mixed", seed=0, timeSlice=1, startTime=1599998400, price=100.0):
+	"""
+	Returns seeded synthetic candles for a volatility regime.
+
+	Closes follow a geometric random walk with optional jumps, highs and lows extend the
+	open-close range by a random wick. The "mixed" regime switches between the other
+	regimes every 500 candles.
+
+	Parameters
+	----------
+	count : int
+		Amount of candles.
+	regime : str
+		Key of volatilityRegimes.
+	seed : int
+		Seed of the random generator.
+	timeSlice : int
+		Time span in minutes for each data point.
+	startTime : int
+		Epoch time of the first candle in seconds. The default is a whole hour, so the 
+		candles of every time-slice start on its boundaries and can be replayed, see 
+		FeedFuncs.rates_to_matches.
+	price : float
+		Open price of the first candle.
+
+	Returns
+	-------
+	numpy.ndarray
+		Array of shape (count, 6) as [time, low, high, open, close, volume] in
+		chronological order.
+	"""
+
+	rng = np.random.default_rng(seed)
+	if volatilityRegimes[regime] is None:
+		names = [name for name in volatilityRegimes if volatilityRegimes[name] is not None]
+		blocks = rng.integers(0, len(names), (count // 500) + 1)
+		parameters = np.array([volatilityRegimes[names[block]] for block in blocks]).repeat(500, axis=0)[:count]
+	else:
+		parameters = np.tile(volatilityRegimes[regime], (count, 1))
+	(drift, volatility, jumpProbability, jumpSize) = parameters.T
+
+	returns = drift + (volatility * rng.standard_normal(count))
+	jumps = rng.random(count) < jumpProbability
+	returns[jumps] += jumpSize[jumps] * rng.standard_normal(jumps.sum())
+	close = price * np.exp(np.cumsum(returns))
+	openRates = np.concatenate(([price], close[:-1]))
+	high = np.maximum(openRates, close) * (1.0 + np.abs(rng.normal(0.0, volatility / 2)))
+	low = np.minimum(openRates, close) * (1.0 - np.abs(rng.normal(0.0, volatility / 2)))
+	volume = rng.lognormal(3.0, 1.0, count)
+	candleTime = startTime + (np.arange(count) * timeSlice * 60)
+	return np.column_stack((candleTime, low, high, openRates, close, volume))
+
+
+def generate_rates(count, regime="mixed", seed=0, timeSlice=1, startTime=1599998400, price=100.0):
+	"""
+	Returns seeded synthetic rates for a volatility regime.
+
+	Parameters
+	----------
+	count : int
+		Amount of candles.
+	regime : str
+		Key of volatilityRegimes.
+	seed : int
+		Seed of the random generator.
+	timeSlice : int
+		Time span in minutes for each data point.
+	startTime : int
+		Epoch time of the first candle in seconds.
+	price : float
+		Open price of the first candle.
+
+	Returns
+	-------
+	pandas.DataFrame
+		Rates as ["Date", "Low", "High", "Open", "Close", "Volume"] indexed by date, see
+		IndicatorFuncs.candles_to_rates.
+	"""
+
+	return candles_to_rates(generate_candles(count, regime, seed, timeSlice, startTime, price))
+
+
+# ------------------------------------- Benchmarks --------------------------------------
+
+def time_call(func, repeat=5, number=1):
+	"""
+	Returns the fastest time in seconds of one call to func.
+
+	Parameters
+	----------
+	func : callable
+		Function called without arguments.
+	repeat : int
+		Amount of timed rounds, the fastest round is used.
+	number : int
+		Amount of calls per round.
+
+	Returns
+	-------
+	float
+		Seconds per call.
+	"""
+
+	best = float("inf")
+	for _ in range(repeat):
+		start = time.perf_counter()
+		for _ in range(number):
+			func()
+		best = min(best, (time.perf_counter() - start) / number)
+	return best
+
+
+def benchmark_indicators(rates):
+	"""
+	Measures indicator throughput in candles per second.
+
+	Parameters
+	----------
+	rates : pandas.DataFrame
+		Rates of a cryptocurrency in chronological order.
+
+	Returns
+	-------
+	dict of str to float
+		Candles per second for each indicator, None if the indicator failed.
+	"""
+
+	close = rates["Close"]
+	indicators = {
+		"get_rsi": lambda: get_rsi(close, 14),
+		"get_bb": lambda: get_bb(close, 20, 2.0),
+		"get_ichimoku": lambda: get_ichimoku(rates, 9, 26, 52),
+		"get_rsi_table": lambda: get_rsi_table(close, range(3, 14)),
+		"get_bb_table": lambda: get_bb_table(close.values, range(4, 36))}
+
+	results = {}
+	for (name, func) in indicators.items():
+		try:
+			results[name] = len(rates) / time_call(func)
+		except Exception as err:
+			print("BENCHMARK-ERROR in " + name + ": " + repr(err))
+			results[name] = None
+	return results
+
+
+def benchmark_sweep(regimes=("calm", "trending", "volatile", "mixed"), count=500, seed=0):
+	"""
+	Measures parameter sweep throughput in combinations per second.
+
+	Runs AnalyzeFuncs.analyze_rsi_bb on synthetic rates of every regime.
+
+	Parameters
+	----------
+	regimes : iterable of str
+		Keys of volatilityRegimes.
+	count : int
+		Amount of candles backtested.
+	seed : int
+		Seed of the random generator.
+
+	Returns
+	-------
+	dict of str to float
+		Combinations per second for each regime.
+	"""
+
+	grid = build_rsi_bb_grid(range(3, 14), range(90, 66, -2), range(10, 34, 2), 36,
+		[float(bbLevelDouble) / 4.0 for bbLevelDouble in range(4, 14)], [0.02], [0.99])
+	combinations = len(grid["rsiPeriodLength"])
+
+	results = {}
+	for regime in regimes:
+		rates = generate_rates(count, regime, seed)
+		with contextlib.redirect_stdout(io.StringIO()):
+			seconds = time_call(lambda: analyze_rsi_bb("SYN", 1, 0.99, 0.02, rates=rates), repeat=2)
+		results[regime] = combinations / seconds
+	return results
+
+
+def benchmark_search(regimes=("calm", "trending", "volatile", "mixed"), count=500, seed=0, budget=None):
+	"""
+	Measures how close every search strategy gets to the best delta of the full grid.
+
+	Searches the grid of AnalyzeFuncs.analyze_rsi_bb on synthetic rates of every regime
+	and divides the best delta each strategy found by the best delta of "grid".
+
+	Parameters
+	----------
+	regimes : iterable of str
+		Keys of volatilityRegimes.
+	count : int
+		Amount of candles backtested.
+	seed : int
+		Seed of the random generator.
+	budget : int
+		Simulation budget of the strategies other than "grid". Defaults to a tenth of the
+		grid, see SearchFuncs.search_rsi_bb.
+
+	Returns
+	-------
+	dict of str to float
+		Portion of the grid's best delta by "strategy.regime", at least 0.0, or None if no 
+		combination of the grid gained over holding.
+	"""
+
+	grid = build_rsi_bb_grid(range(3, 14), range(90, 66, -2), range(10, 34, 2), 36,
+		[float(bbLevelDouble) / 4.0 for bbLevelDouble in range(4, 14)], [0.02], [0.99])
+
+	results = {}
+	for regime in regimes:
+		rates = generate_rates(count, regime, seed)
+		ratesHl2 = (rates["High"] + rates["Low"]).div(2)
+		tables = (ratesHl2.values, rates["High"].values, rates["Low"].values,
+			get_rsi_table(ratesHl2, np.unique(grid["rsiPeriodLength"]))) + get_bb_table(ratesHl2.values,
+			np.unique(grid["bbPeriodLength"]))
+		best = {}
+		for strategy in searchStrategies:
+			delta = search_rsi_bb(*tables, grid, strategy=strategy, budget=budget, seed=seed, pruneDelta=0.0)[0]
+			best[strategy] = np.nanmax(delta) if np.isfinite(delta).any() else -np.inf
+		for strategy in searchStrategies:
+			portion = max(best[strategy] / best["grid"], 0.0) if best["grid"] > 0.0 else None
+			results[strategy + "." + regime] = None if portion is None else float(portion)
+	return results
+
+
+def benchmark_pruning(regimes=("calm", "trending", "volatile", "mixed"), count=250, seed=0):
+	"""
+	Measures how much faster pruning makes the backtest of the live analysis.
+
+	Backtests the grid and options of StrategyFuncs.RsiBbStrategy.analyze_rsi_bb on the 
+	amount of candles the live bot analyzes, with and without pruneDelta=0.0.
+
+	Parameters
+	----------
+	regimes : iterable of str
+		Keys of volatilityRegimes.
+	count : int
+		Amount of candles backtested.
+	seed : int
+		Seed of the random generator.
+
+	Returns
+	-------
+	dict of str to float
+		Time without pruning divided by time with pruning for each regime.
+	"""
+
+	from StrategyFuncs import RsiBbStrategy
+
+	grid = build_rsi_bb_grid(range(4, 13), range(80, 66, -2), range(20, 34, 2), 36,
+		[float(bbLevelDouble) / 4.0 for bbLevelDouble in range(6, 12)], [0.02], [RsiBbStrategy.analysisPortion])
+	options = {"hysteresis": RsiBbStrategy.analysisHysteresis, "trailBbMiddle": RsiBbStrategy.analysisTrailBbMiddle}
+
+	results = {}
+	for regime in regimes:
+		rates = generate_rates(count, regime, seed)
+		price = rates["Close"]
+		tables = (price.values, rates["High"].values, rates["Low"].values,
+			get_rsi_table(price, np.unique(grid["rsiPeriodLength"]))) + get_bb_table(price.values,
+			np.unique(grid["bbPeriodLength"]))
+		fullSeconds = time_call(lambda: backtest_rsi_bb(*tables, grid, **options), repeat=3)
+		prunedSeconds = time_call(lambda: backtest_rsi_bb(*tables, grid, pruneDelta=0.0, **options), repeat=3)
+		results[regime] = fullSeconds / prunedSeconds
+	return results
+
+
+def benchmark_tick(ticks=200, seed=0):
+	"""
+	Measures per-tick latency of the live tick path in milliseconds.
+
+	Every tick replaces the open candle in a temporary candle store (and adds a new candle
+	every sixth tick), then loads rates the way IndicatorFuncs.get_historic_rates does and
+	updates the streaming indicator states the bot reads.
+
+	Parameters
+	----------
+	ticks : int
+		Amount of timed ticks.
+	seed : int
+		Seed of the random generator.
+
+	Returns
+	-------
+	dict of str to float
+		Median and 95th percentile of tick latency in milliseconds.
+	"""
+
+	candles = generate_candles(300 + ticks, "mixed", seed)
+	latencies = []
+	with tempfile.TemporaryDirectory() as directory:
+		path = os.path.join(directory, "benchmark.db")
+		store_candles("SYN", 60, candles[:300], path)
+		rsiState = RsiState(6, 150)
+		bbState = BbState(34, 2.75, 150)
+		last = 299
+		for tick in range(ticks):
+			if tick % 6 == 5:
+				last += 1
+			candle = candles[last].copy()
+			candle[4] *= 1.0 + ((tick % 6) * 0.0001)
+			store_candles("SYN", 60, [candle], path)
+
+			start = time.perf_counter()
+			rates = candles_to_rates(load_candles("SYN", 60, limit=300, path=path)).tail(250)
+			rsiState.sync(rates["Close"])
+			bbState.sync(rates["Close"])
+			rsiState.get_history()
+			bbState.get_history()
+			latencies.append((time.perf_counter() - start) * 1000.0)
+
+	return {"median": float(np.median(latencies)), "p95": float(np.percentile(latencies, 95))}
+
+
+def benchmark_import(modules=importModules, repeat=3):
+	"""
+	Measures the cold import time of modules in milliseconds.
+
+	Every module is imported in a fresh interpreter, so nothing is cached from earlier
+	imports. Importing a module must not load matplotlib, Kivy, cbpro, or the credentials,
+	such an import counts as failed.
+
+	Parameters
+	----------
+	modules : iterable of str
+		Names of the modules.
+	repeat : int
+		Amount of fresh interpreters per module, the fastest import is used.
+
+	Returns
+	-------
+	dict of str to float
+		Milliseconds per module, None if the import failed.
+	"""
+
+	code = ("import sys, time\n"
+		"start = time.perf_counter()\n"
+		"import {}\n"
+		"seconds = time.perf_counter() - start\n"
+		"loaded = [name for name in ('matplotlib', 'kivy', 'cbpro', 'auth_cred') if name in sys.modules]\n"
+		"print(seconds if not loaded else 'loaded ' + ', '.join(loaded))")
+	directory = os.path.dirname(os.path.abspath(__file__))
+
+	results = {}
+	for module in modules:
+		try:
+			best = float("inf")
+			for _ in range(repeat):
+				output = subprocess.run([sys.executable, "-c", code.format(module)], cwd=directory,
+					capture_output=True, text=True, check=True).stdout.strip()
+				best = min(best, float(output))
+			results[module] = best * 1000.0
+		except Exception as err:
+			print("BENCHMARK-ERROR in import " + module + ": " + repr(err))
+			results[module] = None
+	return results
+
+
+def run_benchmarks(seed=0):
+	"""
+	Runs every benchmark and returns the results.
+
+	Parameters
+	----------
+	seed : int
+		Seed of the random generator.
+
+	Returns
+	-------
+	dict of str to dict
+		Results by benchmark name as {"value", "unit", "higherIsBetter"}.
+	"""
+
+	results = {}
+	for (name, value) in benchmark_indicators(generate_rates(10000, "mixed", seed)).items():
+		results["indicator." + name] = {"value": value, "unit": "candles/s", "higherIsBetter": True}
+	for (name, value) in benchmark_sweep(seed=seed).items():
+		results["sweep." + name] = {"value": value, "unit": "combinations/s", "higherIsBetter": True}
+	for (name, value) in benchmark_search(seed=seed).items():
+		results["search." + name] = {"value": value, "unit": "of grid best", "higherIsBetter": True}
+	for (name, value) in benchmark_pruning(seed=seed).items():
+		results["pruning." + name] = {"value": value, "unit": "x faster", "higherIsBetter": True}
+	for (name, value) in benchmark_tick(seed=seed).items():
+		results["tick." + name] = {"value": value, "unit": "ms", "higherIsBetter": False}
+	for (name, value) in benchmark_import().items():
+		results["import." + name] = {"value": value, "unit": "ms", "higherIsBetter": False}
+	return results
+
+
+# -------------------------------------- Baselines --------------------------------------
+
+def load_baseline(path=None):
+	"""
+	Returns the saved baselines.
+
+	Parameters
+	----------
+	path : str
+		Path of the baseline file. Defaults to baselinePath.
+
+	Returns
+	-------
+	dict of str to dict
+		Saved results by benchmark name, empty if no baseline was saved.
+	"""
+
+	path = path or baselinePath
+	if not os.path.exists(path):
+		return {}
+	with open(path) as file:
+		return json.load(file)["results"]
+
+
+def save_baseline(results, path=None):
+	"""
+	Saves results as the new baselines.
+
+	Parameters
+	----------
+	results : dict of str to dict
+		Results by benchmark name, see run_benchmarks.
+	path : str
+		Path of the baseline file. Defaults to baselinePath.
+	"""
+
+	machine = {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+		"processor": platform.machine(), "cpus": os.cpu_count()}
+	with open(path or baselinePath, "w") as file:
+		json.dump({"machine": machine, "results": results}, file, indent=4, sort_keys=True)
+		file.write("\n")
+
+
+def compare_to_baseline(results, baseline, tolerance=None):
+	"""
+	Prints results next to their baselines and returns the regressed benchmarks.
+
+	Parameters
+	----------
+	results : dict of str to dict
+		Results by benchmark name, see run_benchmarks.
+	baseline : dict of str to dict
+		Saved results by benchmark name, see load_baseline.
+	tolerance : float
+		Fraction a benchmark may get slower than its baseline. Defaults to
+		regressionTolerance.
+
+	Returns
+	-------
+	list of str
+		Names of the benchmarks that got slower than the tolerance allows.
+	"""
+
+	tolerance = regressionTolerance if tolerance is None else tolerance
+	regressions = []
+	print("{:<28}{:>16}{:>16}{:>10}  {}".format("benchmark", "result", "baseline", "change", "unit"))
+	for (name, result) in results.items():
+		value = result["value"]
+		saved = baseline.get(name, {}).get("value")
+		if (value is None) or (saved is None) or (saved == 0.0):
+			print("{:<28}{:>16}{:>16}{:>10}  {}".format(name, str(value), str(saved), "-", result["unit"]))
+			continue
+
+		# Speedup above 1.0 is better, regardless of the unit's direction
+		speedup = (value / saved) if result["higherIsBetter"] else (saved / value)
+		flag = ""
+		if speedup < 1.0 / (1.0 + tolerance):
+			regressions.append(name)
+			flag = "  REGRESSION"
+		print("{:<28}{:>16.6g}{:>16.6g}{:>9.2f}x  {}{}".format(name, value, saved, speedup, result["unit"], flag))
+	return regressions
+
+
+if __name__ == "__main__":
+	results = run_benchmarks()
+	if "--save" in sys.argv[1:]:
+		save_baseline(results)
+		print("Baselines saved to " + baselinePath)
+	regressions = compare_to_baseline(results, load_baseline())
+	if regressions:
+		print("Regressions: " + ", ".join(regressions))
+		sys.exit(1)
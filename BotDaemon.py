@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Script for a headless cryptocurrency trading bot that trades every configured pair.
+
+Runs the same strategies and analysis scheduling as BotGui.py through a
+RunnerFuncs.MultiSymbolRunner without importing Kivy or matplotlib, so it starts quickly
+and runs on servers without a display. If 'viewerPort' is set in 'config.ini' the
+snapshots are served on localhost and BotGui.py can attach to them with 'attach'.
+With 'metricsPort' or 'metricsLogInterval' set the stage latencies of the live loop are
+served or printed, see MetricsFuncs.
+
+Functions
+---------
+main(path)
+	Reads a configuration and trades until interrupted or terminated.
+"""
+
+# Library imports
+import signal
+import threading
+from configparser import ConfigParser
+
+# File imports
+from Contact import flush_messages
+from RunnerFuncs import create_metrics_reporter, create_runner
+from ViewerFuncs import SnapshotServer
+
+
+def main(path="config.ini"):
+	"""
+	Reads a configuration and trades until interrupted or terminated.
+
+	Parameters
+	----------
+	path : str
+		Path of the configuration file.
+	"""
+
+	config = ConfigParser()
+	config.read(path)
+	viewerPort = int(config["settings"].get("viewerPort", "0"))
+
+	metricsReporter = create_metrics_reporter(config)
+	if metricsReporter.url is not None:
+		print("Serving metrics at " + metricsReporter.url)
+	runner = create_runner(config)
+	runner.start()
+	server = None
+	if viewerPort:
+		server = SnapshotServer(runner, viewerPort)
+		print("Serving snapshots at " + server.url)
+
+	stopEvent = threading.Event()
+	for signalNumber in (signal.SIGINT, signal.SIGTERM):
+		signal.signal(signalNumber, lambda *args: stopEvent.set())
+	while not stopEvent.wait(1.0):
+		pass
+
+	print("Stopping")
+	runner.stop()
+	if server is not None:
+		server.close()
+	metricsReporter.close()
+	flush_messages(timeout=5.0)
+
+
+if __name__ == "__main__":
+	main()
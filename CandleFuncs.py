@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Module of the compact candle container shared by the candle feed and the indicators.
+
+Candles are kept as one contiguous float64 block of [Low, High, Open, Close, Volume]
+rows next to an int64 column of epoch times, in a ring buffer of fixed capacity. Every
+value is written twice, at its position and one capacity further, so the newest candles
+are always one contiguous slice and every column is handed out as a view instead of a
+copy. The block has the layout pandas keeps DataFrame columns in, so get_frame wraps it
+without copying as well.
+
+Attributes
+----------
+rateColumns : tuple of str
+	Column names of the rates, in the order of the value block.
+
+Classes
+-------
+CandleBuffer
+	Ring buffer of the newest candles of one symbol and time-slice.
+"""
+
+# Library imports
+import numpy as np
+import pandas as pd
+
+rateColumns = ("Low", "High", "Open", "Close", "Volume")
+
+
+class CandleBuffer:
+	"""
+	Ring buffer of the newest candles of one symbol and time-slice.
+
+	Candles are given as [time, low, high, open, close, volume] like the candle store.
+	A candle with the time of the newest candle replaces it, so the open candle can be
+	updated any number of times, and older candles are ignored.
+
+	Methods
+	-------
+	__init__(self, capacity, candles)
+		Creates an empty buffer, or one holding the newest of the given candles.
+	__len__(self)
+		Returns the amount of kept candles.
+	__getitem__(self, column)
+		Returns a column of the kept candles as a read-only view.
+	append(self, candle)
+		Adds a candle or replaces the newest one.
+	extend(self, candles)
+		Adds candles in chronological order.
+	update(self, price, size)
+		Adds a trade to the newest candle in place.
+	get_time(self, position)
+		Returns the epoch time of one candle.
+	get_candle(self, position)
+		Returns one candle as [time, low, high, open, close, volume].
+	get_candles(self)
+		Returns a copy of the kept candles as rows of [time, low, high, open, close, volume].
+	get_index(self)
+		Returns the candle times as pandas.DatetimeIndex.
+	get_series(self, column)
+		Returns a column as pandas.Series that shares memory with the buffer.
+	get_frame(self)
+		Returns the candles as pandas.DataFrame that shares memory with the buffer.
+	to_rates(self)
+		Returns an independent copy of the candles in the rates format.
+	"""
+
+	def __init__(self, capacity=300, candles=None):
+		"""
+		Creates an empty buffer, or one holding the newest of the given candles.
+
+		Parameters
+		----------
+		capacity : int
+			Maximum amount of kept candles, the oldest candle is dropped when full.
+		candles : numpy.ndarray
+			Candles as [time, low, high, open, close, volume] in chronological order.
+		"""
+
+		self.capacity = capacity
+		self.values = np.zeros((len(rateColumns), 2 * capacity))
+		self.times = np.zeros(2 * capacity, dtype=np.int64)
+		self.start = 0
+		self.length = 0
+		if candles is not None:
+			self.extend(candles)
+
+
+	def __len__(self):
+		"""
+		Returns the amount of kept candles.
+		"""
+
+		return self.length
+
+
+	def __getitem__(self, column):
+		"""
+		Returns a column of the kept candles as a read-only view.
+
+		Parameters
+		----------
+		column : str
+			"Time" or one of rateColumns.
+
+		Returns
+		-------
+		numpy.ndarray
+			Values in chronological order, epoch seconds for "Time".
+		"""
+
+		if column == "Time":
+			view = self.times[self.start:self.start + self.length]
+		else:
+			view = self.values[rateColumns.index(column), self.start:self.start + self.length]
+		view.flags.writeable = False
+		return view
+
+
+	def append(self, candle):
+		"""
+		Adds a candle or replaces the newest one.
+
+		Parameters
+		----------
+		candle : array_like
+			Candle as [time, low, high, open, close, volume].
+		"""
+
+		# Same rules as extend with scalar writes, trades update the open candle this way
+		candleTime = candle[0]
+		if self.length:
+			newest = self.times[self.start + self.length - 1]
+			if candleTime < newest:
+				return
+			if candleTime == newest:
+				self.length -= 1
+		if self.length == self.capacity:
+			self.start = (self.start + 1) % self.capacity
+			self.length -= 1
+		position = (self.start + self.length) % self.capacity
+		self.times[position] = self.times[position + self.capacity] = candleTime
+		self.values[:, position] = self.values[:, position + self.capacity] = candle[1:]
+		self.length += 1
+
+
+	def extend(self, candles):
+		"""
+		Adds candles in chronological order.
+
+		Parameters
+		----------
+		candles : numpy.ndarray
+			Candles as [time, low, high, open, close, volume] in chronological order.
+		"""
+
+		candles = np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+		if self.length:
+			newest = self.times[self.start + self.length - 1]
+			candles = candles[candles[:, 0] >= newest]
+			if len(candles) and (candles[0, 0] == newest):
+				self.length -= 1
+		candles = candles[-self.capacity:]
+
+		# Drop the oldest candles that no longer fit, then write every row twice
+		drop = max(0, self.length + len(candles) - self.capacity)
+		self.start = (self.start + drop) % self.capacity
+		self.length -= drop
+		first = (self.start + self.length) % self.capacity
+		positions = (first + np.arange(len(candles))) % self.capacity
+		for offset in (0, self.capacity):
+			self.times[positions + offset] = candles[:, 0]
+			self.values[:, positions + offset] = candles[:, 1:].T
+		self.length += len(candles)
+
+
+	def update(self, price, size):
+		"""
+		Adds a trade to the newest candle in place.
+
+		Parameters
+		----------
+		price : float
+			Trade price.
+		size : float
+			Traded amount of the base currency.
+		"""
+
+		values = self.values
+		position = (self.start + self.length - 1) % self.capacity
+		for index in (position, position + self.capacity):
+			if price < values[0, index]:
+				values[0, index] = price
+			if price > values[1, index]:
+				values[1, index] = price
+			values[3, index] = price
+			values[4, index] += size
+
+
+	def get_time(self, position=-1):
+		"""
+		Returns the epoch time of one candle.
+
+		Parameters
+		----------
+		position : int
+			Position of the candle in chronological order, negative counts from the newest.
+
+		Returns
+		-------
+		int
+			Epoch time in seconds.
+		"""
+
+		if position < 0:
+			position += self.length
+		if not 0 <= position < self.length:
+			raise IndexError("candle position out of range")
+		return int(self.times[self.start + position])
+
+
+	def get_candle(self, position=-1):
+		"""
+		Returns one candle as [time, low, high, open, close, volume].
+
+		Parameters
+		----------
+		position : int
+			Position of the candle in chronological order, negative counts from the newest.
+
+		Returns
+		-------
+		numpy.ndarray
+			Copy of the candle.
+		"""
+
+		if position < 0:
+			position += self.length
+		if not 0 <= position < self.length:
+			raise IndexError("candle position out of range")
+		index = self.start + position
+		return np.concatenate(([float(self.times[index])], self.values[:, index]))
+
+
+	def get_candles(self):
+		"""
+		Returns a copy of the kept candles as rows of [time, low, high, open, close, volume].
+
+		Returns
+		-------
+		numpy.ndarray
+			Candles in chronological order.
+		"""
+
+		window = slice(self.start, self.start + self.length)
+		return np.column_stack((self.times[window].astype(np.float64), self.values[:, window].T))
+
+
+	def get_index(self):
+		"""
+		Returns the candle times as pandas.DatetimeIndex.
+
+		Returns
+		-------
+		pandas.DatetimeIndex
+			Candle times named "Date".
+		"""
+
+		return pd.DatetimeIndex(self["Time"].view("datetime64[s]"), name="Date")
+
+
+	def get_series(self, column="Close"):
+		"""
+		Returns a column as pandas.Series that shares memory with the buffer.
+
+		The series is only valid until the buffer changes.
+
+		Parameters
+		----------
+		column : str
+			One of rateColumns.
+
+		Returns
+		-------
+		pandas.Series
+			Column indexed by date.
+		"""
+
+		return pd.Series(self[column], index=self.get_index(), name=column, copy=False)
+
+
+	def get_frame(self):
+		"""
+		Returns the candles as pandas.DataFrame that shares memory with the buffer.
+
+		The frame is only valid until the buffer changes, use to_rates to keep it.
+
+		Returns
+		-------
+		pandas.DataFrame
+			Rates as ["Date", "Low", "High", "Open", "Close", "Volume"] indexed by date.
+		"""
+
+		block = self.values[:, self.start:self.start + self.length]
+		block.flags.writeable = False
+		return pd.DataFrame(block.T, index=self.get_index(), columns=list(rateColumns), copy=False)
+
+
+	def to_rates(self):
+		"""
+		Returns an independent copy of the candles in the rates format.
+
+		Returns
+		-------
+		pandas.DataFrame
+			Rates as ["Date", "Low", "High", "Open", "Close", "Volume"] indexed by date.
+		"""
+
+		window = slice(self.start, self.start + self.length)
+		return pd.DataFrame(self.values[:, window].copy().T, columns=list(rateColumns), copy=False,
+			index=pd.DatetimeIndex(self.times[window].astype("datetime64[s]"), name="Date"))
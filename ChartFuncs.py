@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Module for the persistent candle, bollinger-bands, and relative-strength-index chart.
+
+Classes
+-------
+CandleChart
+	Keeps the chart's artists alive and updates only changed data between ticks.
+"""
+
+# Library imports
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.patches import Patch
+
+
+class CandleChart:
+	"""
+	Keeps the chart's artists alive and updates only changed data between ticks.
+
+	All data artists are animated so a full draw renders only axes, grid, and ticks, which
+	are cached as background. While the candle dates and axis limits stay the same, an
+	update restores that background, redraws the data artists, and blits the figure. A
+	full draw only happens when a new candle shifts the dates or a value leaves the axis
+	limits.
+
+	Methods
+	-------
+	__init__(self, figure, axCandles, axRsi)
+		Creates the chart's artists on the given axes.
+	update(self, rates, ratesRsi, bands, rsiUpperBound, rsiLowerBound, size)
+		Updates the chart with newest data, returns False if nothing changed.
+	on_draw(self, event)
+		Caches the background and draws the data artists after every full draw.
+	"""
+
+	def __init__(self, figure, axCandles, axRsi):
+		"""
+		Creates the chart's artists on the given axes.
+
+		Parameters
+		----------
+		figure : matplotlib.figure.Figure
+			Figure holding both axes.
+		axCandles : matplotlib.axes.Axes
+			Axes for candles and bollinger-bands.
+		axRsi : matplotlib.axes.Axes
+			Axes for the relative-strength-index.
+		"""
+
+		self.figure = figure
+		self.axCandles = axCandles
+		self.axRsi = axRsi
+		self.background = None
+		self.data = None
+		self.layout = None
+
+		# Candles and bollinger-bands
+		self.wicks = LineCollection([], linewidths=1.5, animated=True)
+		self.bodies = PolyCollection([], animated=True)
+		axCandles.add_collection(self.wicks)
+		axCandles.add_collection(self.bodies)
+		(self.bbUpperLine,) = axCandles.plot([], [], label="Bollinger Up", linewidth=1, c="b", animated=True)
+		(self.bbMiddleLine,) = axCandles.plot([], [], label="Bollinger Middle", linewidth=1, c="black", animated=True)
+		(self.bbLowerLine,) = axCandles.plot([], [], label="Bollinger Down", linewidth=1, c="b", animated=True)
+
+		# Relative-strength-index
+		(self.rsiLine,) = axRsi.plot([], [], label="RSI", c="black", linewidth=1, animated=True)
+		self.rsiUpperLine = axRsi.axhline(y=70.0, color="black", linestyle="--", linewidth=2, animated=True)
+		self.rsiLowerLine = axRsi.axhline(y=30.0, color="black", linestyle="--", linewidth=2, animated=True)
+		self.fills = []
+		axRsi.set_ylim(0.0, 100.0)
+		axRsi.legend(handles=[self.rsiLine, Patch(color="red", alpha=0.5, label="Overbought"),
+			Patch(color="green", alpha=0.5, label="Oversold")], fontsize=5)
+
+		for ax in (axCandles, axRsi):
+			ax.tick_params(labelsize=5)
+			ax.yaxis.tick_right()
+			ax.grid()
+
+		self.artists = [self.wicks, self.bodies, self.bbUpperLine, self.bbMiddleLine, self.bbLowerLine,
+			self.rsiLine, self.rsiUpperLine, self.rsiLowerLine]
+		self.drawId = figure.canvas.mpl_connect("draw_event", self.on_draw)
+
+
+	def update(self, rates, ratesRsi, bands, rsiUpperBound, rsiLowerBound, size):
+		"""
+		Updates the chart with newest data, returns False if nothing changed.
+
+		Parameters
+		----------
+		rates : pandas.DataFrame
+			Rates of a cryptocurrency in chronological order.
+		ratesRsi : numpy.ndarray
+			Relative-strength-index values aligned to the end of rates.
+		bands : tuple of (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+			Bollinger-bands as (bbUpper, bbMiddle, bbLower) aligned to the end of rates.
+		rsiUpperBound : float
+			Upper threshold for overbought range.
+		rsiLowerBound : float
+			Lower threshold for oversold range.
+		size : int
+			Amount of most recent data points shown.
+
+		Returns
+		-------
+		bool
+			True if the chart was redrawn.
+		"""
+
+		rates = rates.tail(size)
+		size = len(rates)
+		openRates = rates["Open"].values
+		high = rates["High"].values
+		low = rates["Low"].values
+		close = rates["Close"].values
+		rsi = self._align(ratesRsi, size)
+		(bbUpper, bbMiddle, bbLower) = (self._align(band, size) for band in bands)
+
+		data = np.concatenate((openRates, high, low, close, rsi, bbUpper, bbMiddle, bbLower,
+			[rsiUpperBound, rsiLowerBound]))
+		if (self.data is not None) and (len(self.data) == len(data)) and np.array_equal(self.data, data, equal_nan=True):
+			return False
+		self.data = data
+
+		# Candles
+		x = np.arange(size, dtype=np.float64)
+		colors = np.where((close >= openRates)[:, None], np.array([[0.0, 0.5, 0.0, 1.0]]),
+			np.array([[1.0, 0.0, 0.0, 1.0]]))
+		self.wicks.set_segments(np.stack((np.column_stack((x, low)), np.column_stack((x, high))), axis=1))
+		self.wicks.set_color(colors)
+		self.bodies.set_verts(np.stack((np.column_stack((x - 0.4, openRates)), np.column_stack((x + 0.4, openRates)),
+			np.column_stack((x + 0.4, close)), np.column_stack((x - 0.4, close))), axis=1))
+		self.bodies.set_facecolor(colors)
+		self.bodies.set_edgecolor(colors)
+
+		# Bollinger-bands
+		self.bbUpperLine.set_data(x, bbUpper)
+		self.bbMiddleLine.set_data(x, bbMiddle)
+		self.bbLowerLine.set_data(x, bbLower)
+
+		# Relative-strength-index
+		self.rsiLine.set_data(x, rsi)
+		self.rsiUpperLine.set_ydata([rsiUpperBound, rsiUpperBound])
+		self.rsiLowerLine.set_ydata([rsiLowerBound, rsiLowerBound])
+		for fill in self.fills:
+			fill.remove()
+		self.fills = [
+			self.axRsi.fill_between(x, rsiUpperBound, rsi, where=(rsi > rsiUpperBound),
+				interpolate=True, color="red", alpha=0.5, animated=True),
+			self.axRsi.fill_between(x, rsiLowerBound, rsi, where=(rsi < rsiLowerBound),
+				interpolate=True, color="green", alpha=0.5, animated=True)]
+
+		# Full draw if dates or limits changed, otherwise blit over the cached background
+		ticks = [0] + [int(size * tick / 10) - 1 for tick in range(1, 10)] + [size - 1]
+		labels = [rates.index[tick].strftime("%m-%d %H:%M") for tick in ticks]
+		yLow = np.nanmin(np.concatenate((low, bbLower)))
+		yHigh = np.nanmax(np.concatenate((high, bbUpper)))
+		(currentLow, currentHigh) = self.axCandles.get_ylim()
+		layout = (size, tuple(labels))
+		if (self.background is None) or (layout != self.layout) or (yLow < currentLow) or (yHigh > currentHigh):
+			self.layout = layout
+			margin = (yHigh - yLow) * 0.05
+			self.axCandles.set_ylim(yLow - margin, yHigh + margin)
+			for ax in (self.axCandles, self.axRsi):
+				ax.set_xlim(-1, size)
+				ax.set_xticks(ticks)
+				ax.set_xticklabels(labels, rotation=40, ha="right")
+			self.figure.canvas.draw_idle()
+		else:
+			canvas = self.figure.canvas
+			canvas.restore_region(self.background)
+			self._draw_artists()
+			canvas.blit(self.figure.bbox)
+		return True
+
+
+	def on_draw(self, event):
+		"""
+		Caches the background and draws the data artists after every full draw.
+
+		Parameters
+		----------
+		event : matplotlib.backend_bases.DrawEvent
+			Draw event of the figure's canvas.
+		"""
+
+		self.background = self.figure.canvas.copy_from_bbox(self.figure.bbox)
+		self._draw_artists()
+
+
+	@staticmethod
+	def _align(values, size):
+		"""
+		Returns the last size values, padded in front with NaN if there are fewer.
+		"""
+
+		values = np.asarray(values, dtype=np.float64)[-size:]
+		if len(values) < size:
+			values = np.concatenate((np.full(size - len(values), np.nan), values))
+		return values
+
+
+	def _draw_artists(self):
+		"""
+		Draws every data artist onto the canvas.
+		"""
+
+		for artist in self.artists + self.fills:
+			artist.axes.draw_artist(artist)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Module of functions that share pooled HTTP sessions between all exchange requests.
+
+One requests.Session is kept per exchange host, so candle, balance, and order requests
+reuse open keep-alive connections instead of paying a new TCP and TLS handshake each time.
+Sessions and the requests library are only loaded by the first request.
+
+Attributes
+----------
+timeout : tuple of (float, float)
+	Default (connect, read) timeout in seconds for every request.
+poolSize : int
+	Maximum amount of open connections kept per host.
+
+Functions
+---------
+get_session(baseUrl)
+	Returns the shared session for an exchange host.
+send_request(method, baseUrl, path, **kwargs)
+	Sends a request through the shared session of an exchange host.
+close_sessions()
+	Closes all shared sessions and their connections.
+"""
+
+# Library imports
+import threading
+
+timeout = (3.05, 10.0)
+poolSize = 16
+
+_sessions = {}
+_sessionsLock = threading.Lock()
+
+
+# ------------------------------------- Sessions ---------------------------------------
+
+def get_session(baseUrl):
+	"""
+	Returns the shared session for an exchange host.
+
+	Parameters
+	----------
+	baseUrl : str
+		Scheme and host of the exchange, e.g. "https://api.kraken.com".
+
+	Returns
+	-------
+	requests.Session
+		Session with a connection pool of poolSize connections to the host.
+	"""
+
+	session = _sessions.get(baseUrl)
+	if session is None:
+		with _sessionsLock:
+			session = _sessions.get(baseUrl)
+			if session is None:
+				import requests
+				from requests.adapters import HTTPAdapter
+				session = requests.Session()
+				adapter = HTTPAdapter(pool_connections=1, pool_maxsize=poolSize)
+				session.mount(baseUrl, adapter)
+				session.headers.update({"User-Agent": "LS"})
+				_sessions[baseUrl] = session
+	return session
+
+
+def send_request(method, baseUrl, path, **kwargs):
+	"""
+	Sends a request through the shared session of an exchange host.
+
+	Parameters
+	----------
+	method : str
+		HTTP method, e.g. "GET" or "POST".
+	baseUrl : str
+		Scheme and host of the exchange.
+	path : str
+		URL path and query of the request.
+	**kwargs
+		Arguments passed on to requests.Session.request. Uses the module timeout if no
+		timeout is given.
+
+	Returns
+	-------
+	requests.models.Response
+		Response from server.
+	"""
+
+	kwargs.setdefault("timeout", timeout)
+	return get_session(baseUrl).request(method, baseUrl + path, **kwargs)
+
+
+def close_sessions():
+	"""
+	Closes all shared sessions and their connections.
+	"""
+
+	with _sessionsLock:
+		for session in _sessions.values():
+			session.close()
+		_sessions.clear()
@@ -4,23 +4,29 @@ DEPRECATED MODULE
 """
 
 # Library imports
+import hashlib
+import hmac
 import time
-import cbpro
-import csv
 import json
 import http.client
 import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-from auth_cred import (cbp_api_secret, cbp_api_key, cbp_api_pass)
-from auth_cred import (cb_api_secret, cb_api_key)
 
-# Set url and authticate client
+# Set url, the authenticated client is created on first use
 url = "https://api.pro.coinbase.com"
-cbpClient = cbpro.AuthenticatedClient(cbp_api_key, cbp_api_secret, cbp_api_pass, api_url=url)
+_clients = {}
+
+
+def get_cbp_client():
+	if "cbp" not in _clients:
+		import cbpro
+		from auth_cred import (cbp_api_secret, cbp_api_key, cbp_api_pass)
+		_clients["cbp"] = cbpro.AuthenticatedClient(cbp_api_key, cbp_api_secret, cbp_api_pass, api_url=url)
+	return _clients["cbp"]
 
 
 def cb_generate_signature(ts, method, url):
+	from auth_cred import cb_api_secret
+
 	message = ts + method + url
 	return hmac.new(cb_api_secret.encode('utf-8'), message.encode('utf-8'), hashlib.sha256).hexdigest()
 
@@ -28,7 +34,7 @@ def cb_generate_signature(ts, method, url):
 # ---------------------------------- Sell/Buy functions -----------------------------------
 
 def cbp_sell_BTC(portion):
-	trade = cbpClient.sell(price=str(cbp_get_ask_price("BTC-USD")),
+	trade = get_cbp_client().sell(price=str(cbp_get_ask_price("BTC-USD")),
 		size=str(cbp_get_available_BTC(portion)),
 		order_type="limit",
 		product_id="BTC-USD",
@@ -37,7 +43,7 @@ def cbp_sell_BTC(portion):
 
 
 def cbp_sell_LRC(portion):
-	trade = cbpClient.sell(price=str(cbp_get_ask_price("LRC-USD")),
+	trade = get_cbp_client().sell(price=str(cbp_get_ask_price("LRC-USD")),
 		size=str(cbp_get_available_LRC(portion)),
 		order_type="limit",
 		product_id="LRC-USD",
@@ -46,7 +52,7 @@ def cbp_sell_LRC(portion):
 
 
 def cbp_buy_BTC(portion):
-	trade = cbpClient.buy(price=str(cbp_get_bid_price("BTC-USD")),
+	trade = get_cbp_client().buy(price=str(cbp_get_bid_price("BTC-USD")),
 		size=str(round(cbp_get_available_USD(portion) / cbp_get_bid_price("BTC-USD"), 4)),
 		order_type="limit",
 		product_id="BTC-USD",
@@ -55,7 +61,7 @@ def cbp_buy_BTC(portion):
 
 
 def cbp_buy_LRC(portion):
-	trade = cbpClient.buy(price=str(cbp_get_bid_price("LRC-USD")),
+	trade = get_cbp_client().buy(price=str(cbp_get_bid_price("LRC-USD")),
 		size=str(round(cbp_get_available_USD(portion) / cbp_get_bid_price("LRC-USD"), 6)),
 		order_type="limit",
 		product_id="LRC-USD",
@@ -66,38 +72,38 @@ def cbp_buy_LRC(portion):
 # ------------------------------------ Get functions -------------------------------------
 
 def cbp_get_ask_price(symbolPair):
-	price = cbpClient.get_product_ticker(product_id=symbolPair)["ask"]
+	price = get_cbp_client().get_product_ticker(product_id=symbolPair)["ask"]
 	return (round(float(price) * 0.9995, 4))
 
 
 def cbp_get_bid_price(symbolPair):
-	price = cbpClient.get_product_ticker(product_id=symbolPair)["bid"]
+	price = get_cbp_client().get_product_ticker(product_id=symbolPair)["bid"]
 	return (round(float(price) * 1.0005, 4))
 
 
 def cbp_get_available_BTC(portion):
-	accounts = cbpClient.get_accounts()
+	accounts = get_cbp_client().get_accounts()
 	for account in accounts:
 		if (account["currency"] == "BTC"):
 			return (round(float(account["available"]) * portion, 5))
 
 
 def cbp_get_available_LRC(portion):
-	accounts = cbpClient.get_accounts()
+	accounts = get_cbp_client().get_accounts()
 	for account in accounts:
 		if (account["currency"] == "LRC"):
 			return (round(float(account["available"]) * portion, 6))
 
 
 def cbp_get_available_USD(portion):
-	accounts = cbpClient.get_accounts()
+	accounts = get_cbp_client().get_accounts()
 	for account in accounts:
 		if (account["currency"] == "USD"):
 			return (round(float(account["available"]) * portion, 2))
 
 
 def cbp_get_orders():
-	orders = cbpClient.get_orders()
+	orders = get_cbp_client().get_orders()
 	for order in orders:
 		print(order)
 
@@ -111,6 +117,8 @@ def cb_get_currency(symbol):
 
 
 def cb_get_currencies():
+	from auth_cred import cb_api_key
+
 	try:
 		ts = str(int(time.time()))
 		path_url = "/api/v3/brokerage/accounts"
@@ -2,32 +2,260 @@
 """
 Module for function to send email.
 
+Messages are queued and sent by a background notification worker that keeps one SMTP
+session open, reconnects when it drops, and coalesces bursts of alerts into one message,
+so callers return as soon as the message is queued.
+
+Attributes
+----------
+smtpHost : str
+	Host of the SMTP server.
+smtpPort : int
+	Port of the SMTP server.
+smtpUseTls : bool
+	If True STARTTLS and login are used on every new SMTP session.
+coalesceDelay : float
+	Seconds the worker waits for more messages before sending a batch.
+queueSize : int
+	Maximum amount of queued messages, newer messages are dropped when full.
+
 Functions
 ---------
 send_msg(msg)
 	Send an MMS message to the designated email address.
+flush_messages(timeout)
+	Waits until every queued message was sent or dropped.
+
+Classes
+-------
+LocalSmtpServer
+	Minimal local SMTP stand-in that records received messages.
 """
 # Library imports
+import queue
 import smtplib
+import socket
+import socketserver
+import threading
+import time
 
 # File imports
-from auth_cred import (gmail_account, gmail_password, phone_number)
+from MetricsFuncs import increment_counter, timed
+
+smtpHost = "smtp.gmail.com"
+smtpPort = 587
+smtpUseTls = True
+coalesceDelay = 2.0
+queueSize = 100
+
+_messages = queue.Queue(maxsize=queueSize)
+_worker = {"thread": None, "server": None}
+_workerLock = threading.Lock()
+
 
 def send_msg(msg):
 	"""
 	Send an MMS message to the designated email address.
 
+	The message is queued for the notification worker and the function returns
+	immediately.
+
 	Parameters
 	----------
 	msg : str
 		Message to be sent.
 	"""
 
+	with _workerLock:
+		if (_worker["thread"] is None) or (not _worker["thread"].is_alive()):
+			_worker["thread"] = threading.Thread(target=_run_worker, daemon=True)
+			_worker["thread"].start()
+
 	try:
-		server = smtplib.SMTP("smtp.gmail.com", 587)
-		server.starttls()
-		server.login(gmail_account, gmail_password)
-		server.sendmail(gmail_account, phone_number, msg)
-		server.quit()
-	except Exception as err:
-		print("COULD NOT SEND NOTIFICATION MESSAGE")
+		_messages.put_nowait(msg)
+	except queue.Full:
+		increment_counter("messages.dropped")
+		print("NOTIFICATION QUEUE FULL, MESSAGE DROPPED")
+
+
+def flush_messages(timeout=None):
+	"""
+	Waits until every queued message was sent or dropped.
+
+	Parameters
+	----------
+	timeout : float
+		Maximum seconds to wait, waits forever if not given.
+
+	Returns
+	-------
+	bool
+		True if the queue was drained in time.
+	"""
+
+	deadline = None if timeout is None else time.monotonic() + timeout
+	while _messages.unfinished_tasks:
+		if (deadline is not None) and (time.monotonic() >= deadline):
+			return False
+		time.sleep(0.05)
+	return True
+
+
+def _run_worker():
+	"""
+	Sends queued messages in batches for the lifetime of the process.
+	"""
+
+	while True:
+		batch = [_messages.get()]
+		deadline = time.monotonic() + coalesceDelay
+		while True:
+			remaining = deadline - time.monotonic()
+			if remaining <= 0:
+				break
+			try:
+				batch.append(_messages.get(timeout=remaining))
+			except queue.Empty:
+				break
+
+		try:
+			with timed("smtp.send"):
+				_send_batch("\n".join(batch))
+			increment_counter("messages.sent", len(batch))
+		except Exception as err:
+			increment_counter("errors.smtp")
+			print("COULD NOT SEND NOTIFICATION MESSAGE")
+			print(err)
+		finally:
+			for _ in batch:
+				_messages.task_done()
+
+
+def _send_batch(msg):
+	"""
+	Sends one message over the persistent SMTP session, reconnecting once on failure.
+	"""
+
+	from auth_cred import (gmail_account, gmail_password, phone_number)
+
+	for attempt in range(2):
+		try:
+			if _worker["server"] is None:
+				# Stored before the handshake so a failed login still closes the socket
+				_worker["server"] = smtplib.SMTP(smtpHost, smtpPort, timeout=30)
+				if smtpUseTls:
+					_worker["server"].starttls()
+					_worker["server"].login(gmail_account, gmail_password)
+			_worker["server"].sendmail(gmail_account, phone_number, msg)
+			return
+		except Exception:
+			try:
+				_worker["server"].close()
+			except Exception:
+				pass
+			_worker["server"] = None
+			if attempt == 1:
+				raise
+
+
+# ------------------------------------ Local server ------------------------------------
+
+class LocalSmtpServer:
+	"""
+	Minimal local SMTP stand-in that records received messages.
+
+	Point smtpHost and smtpPort at it and set smtpUseTls to False to exercise the
+	notification worker without a network connection.
+
+	Attributes
+	----------
+	port : int
+		Port the server listens on.
+	messages : list of str
+		Message bodies received so far.
+	connections : set of socket.socket
+		Open SMTP sessions.
+
+	Methods
+	-------
+	__init__(self, port)
+		Starts the server on localhost in a background thread.
+	drop_connections(self)
+		Closes every open SMTP session, as a server restart would.
+	close(self)
+		Stops the server.
+	"""
+
+	def __init__(self, port=0):
+		"""
+		Starts the server on localhost in a background thread.
+
+		Parameters
+		----------
+		port : int
+			Port to listen on, 0 picks a free port.
+		"""
+
+		self.messages = []
+		self.connections = set()
+		messages = self.messages
+		connections = self.connections
+
+		class Handler(socketserver.StreamRequestHandler):
+			def setup(self):
+				super().setup()
+				connections.add(self.connection)
+
+			def finish(self):
+				connections.discard(self.connection)
+				try:
+					super().finish()
+				except OSError:
+					pass
+
+			def handle(self):
+				self.wfile.write(b"220 localhost\r\n")
+				for line in self.rfile:
+					command = line.strip().upper()
+					if command.startswith((b"EHLO", b"HELO")):
+						self.wfile.write(b"250 localhost\r\n")
+					elif command == b"DATA":
+						self.wfile.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+						lines = []
+						for dataLine in self.rfile:
+							if dataLine == b".\r\n":
+								break
+							lines.append(dataLine.decode("utf-8", "replace"))
+						messages.append("".join(lines).rstrip("\r\n"))
+						self.wfile.write(b"250 OK\r\n")
+					elif command == b"QUIT":
+						self.wfile.write(b"221 Bye\r\n")
+						return
+					else:
+						self.wfile.write(b"250 OK\r\n")
+
+		self.server = socketserver.ThreadingTCPServer(("127.0.0.1", port), Handler)
+		self.server.daemon_threads = True
+		self.port = self.server.server_address[1]
+		threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+	def drop_connections(self):
+		"""
+		Closes every open SMTP session, as a server restart would.
+		"""
+
+		for connection in list(self.connections):
+			try:
+				connection.shutdown(socket.SHUT_RDWR)
+			except OSError:
+				pass
+
+
+	def close(self):
+		"""
+		Stops the server.
+		"""
+
+		self.server.shutdown()
+		self.server.server_close()
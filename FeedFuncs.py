@@ -0,0 +1,666 @@
+#!/usr/bin/env python3
+"""
+Module of the streaming market-data feed that builds candles locally from trades.
+
+A long-lived WebSocket connection to Coinbase's feed receives every trade and ticker as it
+happens. Trades are aggregated into OHLCV candles at each subscribed time-slice, closed
+candles are written to the candle store, and listeners are notified right away instead of
+waiting for the next poll. The WebSocket protocol is implemented on plain sockets, and a
+local replay server can stand in for the exchange.
+
+Attributes
+----------
+feedUrl : str
+	Coinbase's market-data feed.
+reconnectDelay : float
+	Seconds to wait before reconnecting after the feed failed.
+receiveTimeout : float
+	Seconds without any message after which the connection is considered dead.
+
+Functions
+---------
+rates_to_matches(candles, symbol, timeSlice)
+	Returns trade messages that rebuild the given candles, for replaying to a feed.
+
+Classes
+-------
+WebSocket
+	Minimal WebSocket connection that sends and receives text messages.
+CandleAggregator
+	Builds OHLCV candles of one symbol and time-slice from single trades.
+MarketFeed
+	Keeps a feed connection open and aggregates its trades into candles.
+LocalFeedServer
+	Minimal local feed stand-in that replays messages to every client.
+"""
+
+# Library imports
+import base64
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import ssl
+import struct
+import threading
+import time
+import urllib.parse
+import numpy as np
+from colorama import Fore
+from colorama import Style
+from datetime import datetime, timezone
+
+# File imports
+from CandleFuncs import CandleBuffer
+from IndicatorFuncs import update_candle_store
+from StoreFuncs import load_candles, store_candles
+
+feedUrl = "wss://ws-feed.exchange.coinbase.com"
+reconnectDelay = 5.0
+receiveTimeout = 30.0
+
+_websocketGuid = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+# ------------------------------------- WebSocket --------------------------------------
+
+class WebSocket:
+	"""
+	Minimal WebSocket connection that sends and receives text messages.
+
+	Pings are answered and fragmented messages are joined while receiving. Clients mask
+	their frames, servers do not.
+
+	Methods
+	-------
+	connect(url, timeout)
+		Opens a client connection to a ws:// or wss:// url.
+	accept(sock)
+		Completes the handshake of a server connection.
+	send(self, payload, opcode)
+		Sends one message.
+	receive(self)
+		Returns the next text message, None once the connection closed.
+	close(self)
+		Closes the connection.
+	"""
+
+	def __init__(self, sock, reader, mask):
+		"""
+		Wraps an open socket whose handshake is complete.
+		"""
+
+		self.sock = sock
+		self.reader = reader
+		self.mask = mask
+		self.sendLock = threading.Lock()
+
+
+	@classmethod
+	def connect(cls, url, timeout=receiveTimeout):
+		"""
+		Opens a client connection to a ws:// or wss:// url.
+
+		Parameters
+		----------
+		url : str
+			Address of the WebSocket server.
+		timeout : float
+			Seconds a connect or receive may block.
+
+		Returns
+		-------
+		WebSocket
+			Open client connection.
+		"""
+
+		parts = urllib.parse.urlsplit(url)
+		secure = parts.scheme == "wss"
+		sock = socket.create_connection((parts.hostname, parts.port or (443 if secure else 80)), timeout)
+		if secure:
+			sock = ssl.create_default_context().wrap_socket(sock, server_hostname=parts.hostname)
+
+		key = base64.b64encode(os.urandom(16)).decode("ascii")
+		sock.sendall(("GET {} HTTP/1.1\r\nHost: {}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+			"Sec-WebSocket-Key: {}\r\nSec-WebSocket-Version: 13\r\n\r\n").format(
+			parts.path or "/", parts.netloc, key).encode("ascii"))
+
+		reader = sock.makefile("rb")
+		headers = _read_http_head(reader)
+		accept = _get_header(headers, "Sec-WebSocket-Accept")
+		if (not headers[0].startswith("HTTP/1.1 101")) or (accept != _get_accept(key)):
+			sock.close()
+			raise ConnectionError("WebSocket handshake failed: " + headers[0])
+		return cls(sock, reader, True)
+
+
+	@classmethod
+	def accept(cls, sock):
+		"""
+		Completes the handshake of a server connection.
+
+		Parameters
+		----------
+		sock : socket.socket
+			Socket of a client that just connected.
+
+		Returns
+		-------
+		WebSocket
+			Open server connection.
+		"""
+
+		reader = sock.makefile("rb")
+		headers = _read_http_head(reader)
+		key = _get_header(headers, "Sec-WebSocket-Key")
+		sock.sendall(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+			"Sec-WebSocket-Accept: {}\r\n\r\n").format(_get_accept(key)).encode("ascii"))
+		return cls(sock, reader, False)
+
+
+	def send(self, payload, opcode=0x1):
+		"""
+		Sends one message.
+
+		Parameters
+		----------
+		payload : str or bytes
+			Message to send, str is sent as text.
+		opcode : int
+			Frame type, text by default.
+		"""
+
+		if isinstance(payload, str):
+			payload = payload.encode("utf-8")
+		length = len(payload)
+		maskBit = 0x80 if self.mask else 0x00
+		header = bytes([0x80 | opcode])
+		if length < 126:
+			header += bytes([maskBit | length])
+		elif length < 65536:
+			header += bytes([maskBit | 126]) + struct.pack("!H", length)
+		else:
+			header += bytes([maskBit | 127]) + struct.pack("!Q", length)
+		if self.mask:
+			key = os.urandom(4)
+			header += key
+			payload = _apply_mask(payload, key)
+		with self.sendLock:
+			self.sock.sendall(header + payload)
+
+
+	def receive(self):
+		"""
+		Returns the next text message, None once the connection closed.
+		"""
+
+		message = b""
+		while True:
+			head = self.reader.read(2)
+			if len(head) < 2:
+				return None
+			length = head[1] & 0x7F
+			if length == 126:
+				(length,) = struct.unpack("!H", self.reader.read(2))
+			elif length == 127:
+				(length,) = struct.unpack("!Q", self.reader.read(8))
+			key = self.reader.read(4) if (head[1] & 0x80) else None
+			payload = self.reader.read(length)
+			if len(payload) < length:
+				return None
+			if key is not None:
+				payload = _apply_mask(payload, key)
+
+			# Control frames may arrive between the fragments of a message
+			opcode = head[0] & 0x0F
+			if opcode == 0x8:
+				self.close()
+				return None
+			if opcode == 0x9:
+				self.send(payload, 0xA)
+				continue
+			if opcode == 0xA:
+				continue
+			message += payload
+			if head[0] & 0x80:
+				return message.decode("utf-8")
+
+
+	def close(self):
+		"""
+		Closes the connection.
+		"""
+
+		try:
+			self.send(b"", 0x8)
+		except OSError:
+			pass
+		self.sock.close()
+
+
+def _read_http_head(reader):
+	"""
+	Returns the lines of an HTTP request or response head.
+	"""
+
+	lines = []
+	while True:
+		line = reader.readline()
+		if not line:
+			raise ConnectionError("Connection closed during WebSocket handshake")
+		line = line.decode("latin-1").rstrip("\r\n")
+		if line == "":
+			return lines
+		lines.append(line)
+
+
+def _get_header(lines, name):
+	"""
+	Returns the value of a header in the lines of an HTTP head, None if it is missing.
+	"""
+
+	for line in lines[1:]:
+		(key, _, value) = line.partition(":")
+		if key.strip().lower() == name.lower():
+			return value.strip()
+	return None
+
+
+def _get_accept(key):
+	"""
+	Returns the value a server answers a handshake key with.
+	"""
+
+	return base64.b64encode(hashlib.sha1((key + _websocketGuid).encode("ascii")).digest()).decode("ascii")
+
+
+def _apply_mask(payload, key):
+	"""
+	Masks or unmasks a frame payload with a 4-byte key.
+	"""
+
+	length = len(payload)
+	repeated = (key * ((length // 4) + 1))[:length]
+	return (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(length, "big")
+
+
+# ------------------------------------- Candles ----------------------------------------
+
+class CandleAggregator:
+	"""
+	Builds OHLCV candles of one symbol and time-slice from single trades.
+
+	Candles are kept in a CandleBuffer, so trades update them in place and the oldest
+	candle is dropped without copying the rest. Time-slices without trades get no candle,
+	the same as the exchange's candles.
+
+	Methods
+	-------
+	__init__(self, symbol, timeSlice, length)
+		Creates an empty aggregator.
+	seed(self, candles, seedTime)
+		Replaces the kept candles, e.g. with stored history.
+	add_trade(self, tradeTime, price, size)
+		Adds a trade and returns the candle it closed, if any.
+	get_rates(self)
+		Returns the kept candles as rates, None if there are fewer than two.
+	"""
+
+	def __init__(self, symbol, timeSlice, length=300):
+		"""
+		Creates an empty aggregator.
+
+		Parameters
+		----------
+		symbol : str
+			Symbol associated with the base currency of a trading pair.
+		timeSlice : int
+			Time span in minutes for each candle.
+		length : int
+			Amount of most recent candles kept.
+		"""
+
+		self.symbol = symbol
+		self.timeSlice = timeSlice
+		self.granularity = timeSlice * 60
+		self.length = length
+		self.candles = CandleBuffer(length)
+		self.seedTime = None
+		self.lock = threading.Lock()
+
+
+	def seed(self, candles, seedTime=None):
+		"""
+		Replaces the kept candles, e.g. with stored history.
+
+		Parameters
+		----------
+		candles : numpy.ndarray
+			Candles as [time, low, high, open, close, volume] in chronological order.
+		seedTime : float
+			Epoch time the candles were requested at. Trades at or before it are already
+			part of them and are ignored, so the newest candle is not counted twice.
+		"""
+
+		with self.lock:
+			self.candles = CandleBuffer(self.length, candles)
+			self.seedTime = seedTime
+
+
+	def add_trade(self, tradeTime, price, size):
+		"""
+		Adds a trade and returns the candle it closed, if any.
+
+		Trades older than the newest candle or the seed time are ignored. A trade of the
+		newest candle updates it in place, the first trade of a later time-slice closes it.
+
+		Parameters
+		----------
+		tradeTime : float
+			Epoch time of the trade in seconds.
+		price : float
+			Trade price.
+		size : float
+			Traded amount of the base currency.
+
+		Returns
+		-------
+		numpy.ndarray or None
+			The closed candle as [time, low, high, open, close, volume].
+		"""
+
+		bucket = float(int(tradeTime // self.granularity) * self.granularity)
+		with self.lock:
+			if (self.seedTime is not None) and (tradeTime <= self.seedTime):
+				return None
+			newestTime = self.candles.get_time(-1) if len(self.candles) else None
+			if (newestTime is not None) and (bucket < newestTime):
+				return None
+			if (newestTime is not None) and (bucket == newestTime):
+				self.candles.update(price, size)
+				return None
+
+			closed = self.candles.get_candle(-1) if len(self.candles) else None
+			self.candles.append([bucket, price, price, price, price, size])
+			return closed
+
+
+	def get_rates(self):
+		"""
+		Returns the kept candles as rates, None if there are fewer than two.
+
+		Returns
+		-------
+		pandas.DataFrame or None
+			Rates as ["Date", "Low", "High", "Open", "Close", "Volume"] indexed by date.
+		"""
+
+		with self.lock:
+			if len(self.candles) < 2:
+				return None
+			return self.candles.to_rates()
+
+
+# --------------------------------------- Feed -----------------------------------------
+
+class MarketFeed:
+	"""
+	Keeps a feed connection open and aggregates its trades into candles.
+
+	On every (re)connect the candle store is brought up to date and every aggregator is
+	seeded with the stored history, so candles are complete across reconnects. Trades
+	arrive on the matches and ticker channels, both carry the trade id and each trade is
+	only counted once. The newest stored candle may still have been open when it was
+	requested, so trades up to the time of the request, such as the last_match sent on
+	subscribing, are skipped.
+
+	Methods
+	-------
+	__init__(self, products, url, onUpdate, seed)
+		Creates an aggregator per symbol and time-slice.
+	start(self)
+		Starts the feed thread.
+	stop(self)
+		Stops the feed thread and closes the connection.
+	run(self)
+		Connects, subscribes, and handles messages until stopped, reconnecting on failure.
+	handle_message(self, message)
+		Adds the trade of a feed message to the aggregators of its symbol.
+	get_rates(self, symbol, timeSlice)
+		Returns the newest rates of a symbol and time-slice.
+	"""
+
+	def __init__(self, products, url=feedUrl, onUpdate=None, seed=True):
+		"""
+		Creates an aggregator per symbol and time-slice.
+
+		Parameters
+		----------
+		products : iterable of tuple of (str, int)
+			Symbols and time-slices as (symbol, timeSlice). Symbols are traded against USD.
+		url : str
+			Address of the feed.
+		onUpdate : function
+			Called with the symbol after every trade that changed its candles.
+		seed : bool
+			If True the candle store is updated and seeds the aggregators on every connect.
+		"""
+
+		self.url = url
+		self.onUpdate = onUpdate
+		self.seedCandles = seed
+		self.aggregators = {}
+		for (symbol, timeSlice) in products:
+			self.aggregators.setdefault(symbol, {})[timeSlice] = CandleAggregator(symbol, timeSlice)
+		self.lastTradeIds = {}
+		self.connection = None
+		self.stopEvent = threading.Event()
+		self.thread = None
+
+
+	def start(self):
+		"""
+		Starts the feed thread.
+		"""
+
+		self.thread = threading.Thread(target=self.run, daemon=True)
+		self.thread.start()
+
+
+	def stop(self):
+		"""
+		Stops the feed thread and closes the connection.
+		"""
+
+		self.stopEvent.set()
+		if self.connection is not None:
+			self.connection.close()
+
+
+	def run(self):
+		"""
+		Connects, subscribes, and handles messages until stopped, reconnecting on failure.
+		"""
+
+		while not self.stopEvent.is_set():
+			try:
+				if self.seedCandles:
+					for aggregators in self.aggregators.values():
+						for aggregator in aggregators.values():
+							seedTime = time.time()
+							update_candle_store(aggregator.symbol, aggregator.timeSlice)
+							aggregator.seed(load_candles(aggregator.symbol, aggregator.granularity,
+								limit=aggregator.length), seedTime)
+
+				self.connection = WebSocket.connect(self.url)
+				self.connection.send(json.dumps({"type": "subscribe",
+					"product_ids": [symbol + "-USD" for symbol in self.aggregators],
+					"channels": ["matches", "ticker", "heartbeat"]}))
+				while not self.stopEvent.is_set():
+					message = self.connection.receive()
+					if message is None:
+						break
+					self.handle_message(json.loads(message))
+
+			except Exception as err:
+				if self.stopEvent.is_set():
+					break
+				print(Fore.RED + "FEED-ERROR." + Style.RESET_ALL)
+				print(err)
+			self.stopEvent.wait(reconnectDelay)
+
+
+	def handle_message(self, message):
+		"""
+		Adds the trade of a feed message to the aggregators of its symbol.
+
+		Parameters
+		----------
+		message : dict
+			Decoded feed message, messages without a trade are ignored.
+		"""
+
+		if message.get("type") not in ("match", "last_match", "ticker") or ("trade_id" not in message):
+			return
+		symbol = message["product_id"].split("-")[0]
+		tradeId = int(message["trade_id"])
+		if (symbol not in self.aggregators) or (tradeId <= self.lastTradeIds.get(symbol, -1)):
+			return
+		self.lastTradeIds[symbol] = tradeId
+
+		tradeTime = datetime.fromisoformat(message["time"].replace("Z", "+00:00")).timestamp()
+		price = float(message["price"])
+		size = float(message.get("size", message.get("last_size", 0.0)))
+		for aggregator in self.aggregators[symbol].values():
+			closed = aggregator.add_trade(tradeTime, price, size)
+			if closed is not None:
+				store_candles(symbol, aggregator.granularity, [closed])
+		if self.onUpdate is not None:
+			self.onUpdate(symbol)
+
+
+	def get_rates(self, symbol, timeSlice):
+		"""
+		Returns the newest rates of a symbol and time-slice.
+
+		Returns
+		-------
+		pandas.DataFrame or None
+			Rates in chronological order, None until two candles are known.
+		"""
+
+		return self.aggregators[symbol][timeSlice].get_rates()
+
+
+# -------------------------------------- Replay ----------------------------------------
+
+def rates_to_matches(candles, symbol, timeSlice):
+	"""
+	Returns trade messages that rebuild the given candles, for replaying to a feed.
+
+	Every candle becomes four trades at its open, high or low, low or high, and close
+	price, a quarter of the time-slice apart, each with a quarter of its volume. Candle
+	times must be on time-slice boundaries, as the exchange's are, otherwise the trades
+	would build different candles and ValueError is raised.
+
+	Parameters
+	----------
+	candles : numpy.ndarray
+		Candles as [time, low, high, open, close, volume] in chronological order.
+	symbol : str
+		Symbol associated with the base currency of a trading pair.
+	timeSlice : int
+		Time span in minutes for each candle.
+
+	Returns
+	-------
+	list of dict
+		Messages in the format of the feed's matches channel.
+	"""
+
+	candles = np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+	misaligned = candles[:, 0] % (timeSlice * 60) != 0
+	if misaligned.any():
+		raise ValueError("Candle time {:.0f} is not on a {} minute boundary".format(candles[misaligned, 0][0],
+			timeSlice))
+
+	messages = []
+	step = timeSlice * 15
+	for (candleTime, low, high, openRate, close, volume) in candles:
+		extremes = (low, high) if close >= openRate else (high, low)
+		for (offset, price) in enumerate((openRate,) + extremes + (close,)):
+			messages.append({"type": "match", "trade_id": len(messages) + 1, "product_id": symbol + "-USD",
+				"price": str(price), "size": str(volume / 4.0),
+				"time": datetime.fromtimestamp(candleTime + (offset * step), timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")})
+	return messages
+
+
+class LocalFeedServer:
+	"""
+	Minimal local feed stand-in that replays messages to every client.
+
+	Point a MarketFeed at url to exercise streaming without a network connection. Every
+	client gets the messages after its subscribe message and the connection stays open
+	until the client or the server closes it.
+
+	Attributes
+	----------
+	url : str
+		Address of the server.
+	subscriptions : list of dict
+		Subscribe messages received so far.
+
+	Methods
+	-------
+	__init__(self, messages, port, interval)
+		Starts the server on localhost in a background thread.
+	close(self)
+		Stops the server.
+	"""
+
+	def __init__(self, messages, port=0, interval=0.0):
+		"""
+		Starts the server on localhost in a background thread.
+
+		Parameters
+		----------
+		messages : list of dict
+			Messages sent to every client, see rates_to_matches.
+		port : int
+			Port to listen on, 0 picks a free port.
+		interval : float
+			Seconds between two messages.
+		"""
+
+		self.subscriptions = []
+		subscriptions = self.subscriptions
+
+		class Handler(socketserver.BaseRequestHandler):
+			def handle(self):
+				connection = WebSocket.accept(self.request)
+				subscribe = connection.receive()
+				if subscribe is None:
+					return
+				subscriptions.append(json.loads(subscribe))
+				connection.send(json.dumps({"type": "subscriptions"}))
+				for message in messages:
+					connection.send(json.dumps(message))
+					if interval > 0.0:
+						time.sleep(interval)
+				while connection.receive() is not None:
+					pass
+
+		self.server = socketserver.ThreadingTCPServer(("127.0.0.1", port), Handler)
+		self.server.daemon_threads = True
+		self.url = "ws://127.0.0.1:{}".format(self.server.server_address[1])
+		threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+	def close(self):
+		"""
+		Stops the server.
+		"""
+
+		self.server.shutdown()
+		self.server.server_close()
@@ -6,14 +6,14 @@ Functions
 ---------
 create_order(price, side, altSymbol, altMarket)
 	Places a market order.
-append_order_to_csv(date, price, side)
-	Appends order information to csv file.
-get_order_history()
-	Returns order history from csv as pandas.DataFrame.
+append_order(orderTime, symbol, price, side)
+	Appends order information to the order journal.
+get_order_history(start, end, symbol)
+	Returns order history from the order journal as pandas.DataFrame.
 """
 
 # Library imports
-import csv
+import time
 import pandas as pd
 from colorama import Fore
 from colorama import Back
@@ -23,6 +23,8 @@ from datetime import datetime
 # File imports
 from Contact import *
 from KrakenFuncs import *
+from MetricsFuncs import increment_counter, timed
+from StoreFuncs import load_orders, store_order
 
 
 # ------------------------------- Bot-helper functions ---------------------------------
@@ -32,7 +34,7 @@ def create_order(price, side, altSymbol, altMarket, market):
 	Places a market order. 
 
 	Places an order through Kraken, prints order information to screen, sends email 
-	notifcation to user, and appends order information to csv file.
+	notifcation to user, and appends order information to the order journal.
 
 	Parameters
 	----------
@@ -46,50 +48,62 @@ def create_order(price, side, altSymbol, altMarket, market):
 		Alternative symbol associated with the quote currency of a trading pair.
 	"""
 
-	now = datetime.now()
-	print(kraken_order(price, side, altSymbol, altMarket, market))
-	print(Fore.RED + "---" + side + " at {}---".format(now) + Style.RESET_ALL)
-	send_msg(side + " - " + str(price))
-	append_order_to_csv(now.strftime("%m/%d - %H:%M:%S"), price, side)
+	with timed("order"):
+		orderTime = time.time()
+		print(kraken_order(price, side, altSymbol, altMarket, market))
+		print(Fore.RED + "---" + side + " at {}---".format(datetime.fromtimestamp(orderTime)) + Style.RESET_ALL)
+		send_msg(side + " - " + str(price))
+		with timed("order.store"):
+			append_order(orderTime, altSymbol, price, side)
+		increment_counter("orders." + side)
 
 
-def append_order_to_csv(date, price, side):
+def append_order(orderTime, symbol, price, side):
 	"""
-	Appends order information to csv file.
+	Appends order information to the order journal.
 
 	Parameters
 	----------
-	date : str
-		Date and time of placed order.
+	orderTime : float
+		Epoch time of placed order in seconds.
+	symbol : str
+		Alternative symbol associated with the base currency of a trading pair.
 	price : float
 		The current cryptocurrency price.
 	side : str
 		Either "buy" or "sell" for order side.
 	"""
 
-	with open("order_history.csv", "a") as f:
-		writerObj = csv.writer(f)
-		writerObj.writerow([date, price, side])
-		f.close()
+	store_order(orderTime, symbol, side, price)
 
 
-def get_order_history():
+def get_order_history(start=None, end=None, symbol=None):
 	"""
-	Returns past order history from csv file as pandas.DataFrame.
+	Returns past order history from the order journal as pandas.DataFrame.
+
+	Only the orders in the requested range are read using the journal's time index.
+
+	Parameters
+	----------
+	start : datetime.datetime or float
+		Earliest order time as datetime or epoch seconds. Defaults to the first order.
+	end : datetime.datetime or float
+		Latest order time as datetime or epoch seconds. Defaults to the last order.
+	symbol : str
+		If given only orders of this alternative symbol are returned.
 
 	Returns
 	-------
-	pandas.DataFrame of [str, numpy.float64, str]
-		History of past order information as ["Date", Price, "Side"].
+	pandas.DataFrame of [str, str, numpy.float64, str]
+		History of past order information as ["Date", "Symbol", "Price", "Side"] indexed 
+		by date.
 	"""
 
-	try:
-		orders = pd.read_csv("order_history.csv", index_col=0)
-		return orders
-	except Exception as err:
-		print("CSV is empty or does not exist")
-
-
-
-
+	if isinstance(start, datetime):
+		start = start.timestamp()
+	if isinstance(end, datetime):
+		end = end.timestamp()
 
+	orders = pd.DataFrame(load_orders(start, end, symbol), columns=["Date", "Symbol", "Side", "Price"])
+	orders["Date"] = pd.to_datetime(orders["Date"], unit="s")
+	return orders.set_index("Date")[["Symbol", "Price", "Side"]]
@@ -6,6 +6,16 @@ Functions
 ---------
 get_historic_rates(symbol, timeSlice)
 	Given a cryptocurrency symbol and time-slice value, returns historic rates.
+update_candle_store(symbol, timeSlice)
+	Requests the candles missing from the local candle store.
+fetch_candles(symbol, timeSlice, start, end)
+	Requests candles from Coinbase.
+backfill_candles(symbol, timeSlice, start, end, workers, retries)
+	Requests every candle in a time range with concurrent paginated requests.
+get_rates_range(symbol, timeSlice, start, end, workers)
+	Given a cryptocurrency symbol, time-slice value, and time range, returns historic rates.
+candles_to_rates(candles)
+	Converts candles to the rates format used by all indicators.
 get_ema(rates, periodLength)
 	Calculates and returns the exponential-moving-average of rates.
 get_sma(rates, periodLength)
@@ -14,6 +24,8 @@ get_macd(rates, periodShort, periodLong, periodEma)
 	Calculates and returns the moving-average-convergence-divergence of rates.
 get_rsi(rates, periodLength)
 	Caluculates and returns the relatvie-strength-index of rates.
+get_rsi_matrix(rates, periodLengths)
+	Calculates and returns the relative-strength-index of rates for several period lengths.
 get_ichimoku(rates, periodConversion, periodBase, periodLeading)
 	Calculates and returns the ichimoku-cloud of rates.
 get_fibonacci_retrace()
@@ -24,17 +36,35 @@ get_vwap(rates)
 	Calculates and returns the volume-weighted-average-price of rates.
 get_bb(rates, periodLength, standardDevLevel)
 	Calculates and returns the bollinger-bands of rates.
+get_bb_table(rates, periodLengths)
+	Calculates and returns rolling means and standard deviations for several period lengths.
+get_bb_from_table(bbMiddleTable, bbStdTable, periodLength, standardDevLevel)
+	Returns the bollinger-bands of one period length and level from precomputed tables.
+
+Classes
+-------
+IndicatorState
+	Base class for indicators that are updated one candle at a time.
+RsiState(IndicatorState)
+	Keeps Wilder's gain and loss averages to update the relative-strength-index in constant time.
+BbState(IndicatorState)
+	Keeps rolling sums to update the bollinger-bands in constant time.
 """
 
 # Library imports
-import csv
-import http.client
-import json
-import requests
-import matplotlib.pyplot as plt
+import collections
 import numpy as np
 import pandas as pd
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from numpy.lib.stride_tricks import sliding_window_view
+
+# File imports
+from CandleFuncs import CandleBuffer, rateColumns
+from ClientFuncs import send_request
+from MetricsFuncs import timed
+from StoreFuncs import *
 
 
 # ---------------------------------- Historic rates ------------------------------------
@@ -43,6 +73,10 @@ def get_historic_rates(symbol, timeSlice):
 	"""
 	Given a cryptocurrency symbol and time-slice value, returns historic rates.
 
+	Rates are served from the local candle store. Only candles from the newest stored 
+	timestamp onwards are requested from Coinbase, the full most recent page is only 
+	downloaded when the store is empty or too far behind.
+
 	Parameters
 	----------
 	symbol : str
@@ -57,18 +91,194 @@ def get_historic_rates(symbol, timeSlice):
 		["Date", "Low", "High", "Open", "Close", "Volume"].
 	"""
 
+	update_candle_store(symbol, timeSlice)
+	with timed("fetch.load"):
+		return candles_to_rates(load_candles(symbol, timeSlice * 60, limit=300))
+
+
+def update_candle_store(symbol, timeSlice):
+	"""
+	Requests the candles missing from the local candle store.
+
+	Only candles from the newest stored timestamp onwards are requested, the full most 
+	recent page is only downloaded when the store is empty or too far behind.
+
+	Parameters
+	----------
+	symbol : str
+		Symbol associated with the quote currency of a trading pair.
+	timeSlice : int
+		Time span in minutes for each data point. Must be 1, 5, 15, or 60.
+	"""
+
+	granularity = timeSlice * 60
+	lastTime = get_last_candle_time(symbol, granularity)
+	now = int(time.time())
+	with timed("fetch.coinbase"):
+		if (lastTime is None) or ((now - lastTime) >= (300 * granularity)):
+			candles = fetch_candles(symbol, timeSlice)
+		else:
+			candles = fetch_candles(symbol, timeSlice, lastTime, now)
+	with timed("fetch.store"):
+		store_candles(symbol, granularity, candles)
+
+
+def fetch_candles(symbol, timeSlice, start=None, end=None):
+	"""
+	Requests candles from Coinbase.
+
+	Parameters
+	----------
+	symbol : str
+		Symbol associated with the quote currency of a trading pair.
+	timeSlice : int
+		Time span in minutes for each data point. Must be 1, 5, 15, or 60.
+	start : int
+		Inclusive epoch time of the first candle. If not given the most recent 300 
+		candles are requested.
+	end : int
+		Inclusive epoch time of the last candle. Required if start is given.
+
+	Returns
+	-------
+	list of list
+		Candles as [time, low, high, open, close, volume], newest first.
+	"""
+
+	granularity = timeSlice * 60
+	path = "/products/" + symbol + "-USD/candles?granularity=" + str(granularity)
+	if start is not None:
+		path += "&start=" + datetime.utcfromtimestamp(start).isoformat() + "&end=" + datetime.utcfromtimestamp(end).isoformat()
+
+	res = send_request("GET", "https://api.exchange.coinbase.com", path, headers={"Content-Type": "application/json"})
+	candles = res.json()
+	if not isinstance(candles, list):
+		raise ValueError("Coinbase candle request failed: " + str(candles))
+	return candles
+
+
+def backfill_candles(symbol, timeSlice, start, end, workers=8, retries=3):
+	"""
+	Requests every candle in a time range with concurrent paginated requests.
+
+	The range is split into windows of 300 candles, one per request, which are fetched 
+	by a bounded pool of threads. Failed windows are retried with a growing pause. The 
+	result is de-duplicated, ordered, and written to the local candle store.
+
+	Parameters
+	----------
+	symbol : str
+		Symbol associated with the quote currency of a trading pair.
+	timeSlice : int
+		Time span in minutes for each data point. Must be 1, 5, 15, or 60.
+	start : int
+		Epoch time of the first candle.
+	end : int
+		Epoch time of the last candle.
+	workers : int
+		Maximum amount of requests in flight.
+	retries : int
+		Amount of attempts per window before the backfill fails.
+
+	Returns
+	-------
+	numpy.ndarray
+		Contiguous array of shape (candles, 6) as [time, low, high, open, close, volume] 
+		in chronological order.
+	"""
+
 	granularity = timeSlice * 60
-	conn = http.client.HTTPSConnection("api.exchange.coinbase.com")
-	payload = ""
-	headers = {"User-Agent": "LS", "Content-Type": "application/json"}
-	conn.request("GET", "/products/" + symbol + "-USD/candles?granularity=" + str(granularity), payload, headers)
-	res = conn.getresponse()
-	data = res.read().decode("utf-8")
-	rates = json.loads(data)
-	rates = pd.DataFrame(rates).set_axis(["Date", "Low", "High", "Open", "Close", "Volume"], axis="columns")
-	rates = rates.iloc[::-1]
-	rates["Date"] = pd.to_datetime(rates["Date"], unit="s").dt.strftime("%m-%d %H:%M")
-	rates = rates.set_index("Date")
+	start = int(start) - (int(start) % granularity)
+	windows = [(windowStart, min(windowStart + (299 * granularity), int(end)))
+		for windowStart in range(start, int(end) + 1, 300 * granularity)]
+
+	def fetch_window(window):
+		for attempt in range(retries):
+			try:
+				return fetch_candles(symbol, timeSlice, window[0], window[1])
+			except Exception:
+				if attempt == retries - 1:
+					raise
+				time.sleep(0.5 * (2 ** attempt))
+
+	with ThreadPoolExecutor(max_workers=workers) as executor:
+		pages = list(executor.map(fetch_window, windows))
+
+	candles = [candle for page in pages for candle in page]
+	candles = np.array(candles, dtype=np.float64).reshape(-1, 6)
+	candles = candles[(candles[:, 0] >= start) & (candles[:, 0] <= end)]
+
+	# Keep one candle per timestamp in chronological order
+	first = np.unique(candles[:, 0], return_index=True)[1]
+	candles = np.ascontiguousarray(candles[first])
+	store_candles(symbol, granularity, candles)
+	return candles
+
+
+def get_rates_range(symbol, timeSlice, start, end, workers=8):
+	"""
+	Given a cryptocurrency symbol, time-slice value, and time range, returns historic rates.
+
+	Parameters
+	----------
+	symbol : str
+		Symbol associated with the quote currency of a trading pair.
+	timeSlice : int
+		Time span in minutes for each data point. Must be 1, 5, 15, or 60.
+	start : int
+		Epoch time of the first candle.
+	end : int
+		Epoch time of the last candle.
+	workers : int
+		Maximum amount of requests in flight.
+
+	Returns
+	-------
+	pandas.DataFrame
+		Rates in the given range as ["Date", "Low", "High", "Open", "Close", "Volume"].
+	"""
+
+	return candles_to_rates(backfill_candles(symbol, timeSlice, start, end, workers))
+
+
+def candles_to_rates(candles):
+	"""
+	Converts candles to the rates format used by all indicators.
+
+	Parameters
+	----------
+	candles : numpy.ndarray
+		Candles as [time, low, high, open, close, volume] in chronological order.
+
+	Returns
+	-------
+	pandas.DataFrame
+		Rates as ["Date", "Low", "High", "Open", "Close", "Volume"] indexed by the UTC 
+		candle times as pandas.DatetimeIndex.
+	"""
+
+	candles = np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+	return pd.DataFrame(candles[:, 1:], columns=list(rateColumns),
+		index=pd.DatetimeIndex(candles[:, 0].astype(np.int64).astype("datetime64[s]"), name="Date"))
+
+
+def _get_price_series(rates):
+	"""
+	Returns the close prices of a CandleBuffer as a series without copying, other rates unchanged.
+	"""
+
+	if isinstance(rates, CandleBuffer):
+		return rates.get_series("Close")
+	return rates
+
+
+def _get_rates_frame(rates):
+	"""
+	Returns a CandleBuffer as a frame without copying, other rates unchanged.
+	"""
+
+	if isinstance(rates, CandleBuffer):
+		return rates.get_frame()
 	return rates
 
 
@@ -80,8 +290,9 @@ def get_ema(rates, periodLength):
 
 	Parameters
 	----------
-	rates : pandas.DataFrame or pandas.Series
-		Rates of a cryptocurrency in chronological order.
+	rates : pandas.DataFrame, pandas.Series, or CandleBuffer
+		Rates of a cryptocurrency in chronological order. Close prices of a CandleBuffer 
+		are used without copying.
 	periodLength : int
 		Amount of datapoints used to calculate exponential-moving-average. Must be less 
 		than amount of data points.
@@ -93,7 +304,7 @@ def get_ema(rates, periodLength):
 		Exponential-moving-average values for the given rates and period length.
 	"""
 
-	return rates.ewm(span=periodLength, adjust=False).mean()
+	return _get_price_series(rates).ewm(span=periodLength, adjust=False).mean()
 
 
 def get_sma(rates, periodLength):
@@ -102,8 +313,9 @@ def get_sma(rates, periodLength):
 
 	Parameters
 	----------
-	rates : pandas.DataFrame or pandas.Series
-		Rates of a cryptocurrency in chronological order.
+	rates : pandas.DataFrame, pandas.Series, or CandleBuffer
+		Rates of a cryptocurrency in chronological order. Close prices of a CandleBuffer 
+		are used without copying.
 	periodLength : int
 		Amount of datapoints used to calculate simple-moving-average. Must be less than 
 		amount of data points.
@@ -115,7 +327,7 @@ def get_sma(rates, periodLength):
 		Simple-moving-average values for the given rates and period length.
 	"""
 
-	return rates.rolling(periodLength).mean()
+	return _get_price_series(rates).rolling(periodLength).mean()
 
 
 # ------------------------- Momentum indicators (oscillators) --------------------------
@@ -126,8 +338,9 @@ def get_macd(rates, periodShort, periodLong, periodEma):
 
 	Parameters
 	----------
-	rates : pandas.DataFrame or pandas.Series
-		Rates of a cryptocurrency in chronological order.
+	rates : pandas.DataFrame, pandas.Series, or CandleBuffer
+		Rates of a cryptocurrency in chronological order. Close prices of a CandleBuffer 
+		are used without copying.
 	periodShort : int
 		Amount of datapoints used to calculate the short-exponential-moving-average. Must 
 		be less than amount of data points.
@@ -157,8 +370,9 @@ def get_rsi(rates, periodLength):
 
 	Parameters
 	----------
-	rates : pandas.Series
-		Rates of a cryptocurrency in chronological order.
+	rates : pandas.Series or CandleBuffer
+		Rates of a cryptocurrency in chronological order. Close prices of a CandleBuffer 
+		are used without copying.
 	periodLength : int
 		Amount of datapoints used to calculate the relative-strength-index. Must be less 
 		than amount of data points.
@@ -169,56 +383,72 @@ def get_rsi(rates, periodLength):
 		Relative-strength-index values for the given rates and period length.
 	"""
 
-	rsiValues = []
-	currentPrice = 0.0
-	previousPrice = 0.0
-
-	gains = 0.0
-	losses = 0.0
-	delta = 0.0
-	counter = 0
+	rates = _get_price_series(rates)
+	rsiMatrix = get_rsi_matrix(rates, [periodLength])[0]
+	return (pd.Series(rsiMatrix[0, periodLength - 1:], index=rates.index[periodLength - 1:]))
 
-	for index, value in rates.items():
-		# Calculates first step of RSI.
-		if counter == 0:
-			currentPrice = float(value)
-		elif counter < periodLength:
-			previousPrice = currentPrice
-			currentPrice = float(value)
-			delta = currentPrice - previousPrice
 
-			if delta >= 0:
-				gains += (delta / periodLength)
-			else:
-				losses += (abs(delta) / periodLength)
-
-		if counter == periodLength:
-			if (losses == 0.0):
-				rsiValues.append(100.0)
-			else:
-				rsiValues.append(100.0 - (100.0 / (1 + (gains / losses))))
+def get_rsi_matrix(rates, periodLengths):
+	"""
+	Calculates and returns the relative-strength-index of rates for several period lengths.
 
-		# Calculats second step of RSI.
-		if counter >= periodLength:
-			previousPrice = currentPrice
-			currentPrice = float(value)
-			delta = currentPrice - previousPrice
+	Gains and losses of every candle are calculated once for all period lengths, and the 
+	RSI values and warm-up mask of all rows are derived in vector operations. Only 
+	Wilder's smoothing itself is sequential, it runs over plain floats with the same 
+	operations in the same order as get_rsi always used, so the values are identical: 
+	the first average is the sum of the first periodLength - 1 moves divided by 
+	periodLength, and every later move is blended in with weight 1 / periodLength.
 
-			if delta >= 0:
-				gains = ((gains * (periodLength - 1)) + delta) / periodLength
-				losses = losses * (periodLength - 1) / periodLength
-			else:
-				gains = gains * (periodLength - 1) / periodLength
-				losses = ((losses * (periodLength - 1)) + abs(delta)) / periodLength
+	Parameters
+	----------
+	rates : pandas.Series, numpy.ndarray, or CandleBuffer
+		Rates of a cryptocurrency in chronological order. Close prices of a CandleBuffer 
+		are used without copying.
+	periodLengths : iterable of int
+		Amounts of datapoints used to calculate the relative-strength-index, at least 1.
 
-			if (losses == 0.0):
-				rsiValues.append(100.0)
-			else:
-				rsiValues.append(100.0 - (100.0 / (1 + (gains / losses))))
+	Returns
+	-------
+	tuple of (numpy.ndarray, numpy.ndarray)
+		Arrays of shape (len(periodLengths), len(rates)) as (rsiMatrix, warmUp) where row i 
+		belongs to periodLengths[i] and is aligned to rates. warmUp is True for the first 
+		periodLength - 1 candles of a row, whose RSI values are NaN.
+	"""
 
-		counter+=1
-	
-	return (pd.Series(rsiValues, index = rates.index[periodLength - 1:]))
+	values = np.asarray(_get_price_series(rates), dtype=np.float64)
+	(periods, rows) = np.unique(np.asarray(list(periodLengths), dtype=np.int64), return_inverse=True)
+	candleCount = len(values)
+
+	# Gains and losses of every candle, the first candle has none
+	deltas = np.diff(values, prepend=values[:1])
+	ups = np.maximum(deltas, 0.0).tolist()
+	downs = np.maximum(-deltas, 0.0).tolist()
+
+	gains = np.full((len(periods), candleCount), np.nan)
+	losses = np.full((len(periods), candleCount), np.nan)
+	for (row, periodLength) in enumerate(periods.tolist()):
+		if periodLength > candleCount:
+			continue
+		weight = float(periodLength)
+		keptWeight = weight - 1.0
+		(gain, loss) = (0.0, 0.0)
+		for candle in range(1, periodLength):
+			gain += ups[candle] / weight
+			loss += downs[candle] / weight
+		(gainAverages, lossAverages) = ([gain], [loss])
+		for (up, down) in zip(ups[periodLength:], downs[periodLength:]):
+			gain = ((gain * keptWeight) + up) / weight
+			loss = ((loss * keptWeight) + down) / weight
+			gainAverages.append(gain)
+			lossAverages.append(loss)
+		gains[row, periodLength - 1:] = gainAverages
+		losses[row, periodLength - 1:] = lossAverages
+
+	with np.errstate(divide="ignore", invalid="ignore"):
+		rsiMatrix = np.where(losses == 0.0, 100.0, 100.0 - (100.0 / (1 + (gains / losses))))
+	warmUp = np.arange(candleCount) < (periods[:, np.newaxis] - 1)
+	rsiMatrix[warmUp] = np.nan
+	return (rsiMatrix[rows], warmUp[rows])
 
 
 # ---------------------- Trend/Momentum indicators (oscillators) -----------------------
@@ -229,8 +459,9 @@ def get_ichimoku(rates, periodConversion, periodBase, periodLeading):
 
 	Parameters
 	----------
-	rates : pandas.DataFrame
-		Rates of a cryptocurrency in chronological order.
+	rates : pandas.DataFrame or CandleBuffer
+		Rates of a cryptocurrency in chronological order indexed by date. A CandleBuffer 
+		is used without copying.
 	periodConversion : int
 		Amount of datapoints used to calculate the conversion line and leading-span-A data 
 		points. Must be less than amount of data points.
@@ -248,19 +479,14 @@ def get_ichimoku(rates, periodConversion, periodBase, periodLeading):
 		(conversionLine, baseLine, leadingSpanA, leadingSpanB, chikouSpan)
 	"""
 
-	futureDates = []
-	blankValues = []
+	rates = _get_rates_frame(rates)
 	displace = 26
-	minutes = 15
 
-	# Blank pandas series to append new dates for shift
-	startDate = rates.index[-1]
-	startDate = datetime.strptime(startDate, "%Y-%m-%d %H:%M:%S")
-	for i in range(displace):
-		futureDates.append((startDate + timedelta(minutes=minutes)).strftime("%Y-%m-%d %H:%M:%S"))
-		blankValues.append(0.0)
-		minutes += 15
-	futureDates = pd.Series(blankValues, index=futureDates)
+	# Blank pandas series to append new dates for shift, one time-slice apart
+	timeSlice = rates.index[-1] - rates.index[-2]
+	futureDates = pd.DatetimeIndex([rates.index[-1] + (timeSlice * step) for step in range(1, displace + 1)],
+		name=rates.index.name)
+	futureDates = pd.Series(0.0, index=futureDates)
 
 	# Conversion Line: Tenkan-sen
 	periodConversionHigh = rates["High"].rolling(window=periodConversion).max()
@@ -277,14 +503,14 @@ def get_ichimoku(rates, periodConversion, periodBase, periodLeading):
 	# Leading Span A: Senkou Span A
 	leadingSpanA = ((conversionLine + baseLine) / 2)
 	leadingSpanA.name = "values"
-	leadingSpanA = leadingSpanA.append(futureDates).shift(displace)
+	leadingSpanA = pd.concat([leadingSpanA, futureDates]).shift(displace)
 
 	# Leading Span B: Senkou Span B
 	periodLeadingHigh = rates["High"].rolling(window=periodLeading).max()
 	periodLeadingLow = rates["Low"].rolling(window=periodLeading).min()
 	leadingSpanB = (periodLeadingHigh + periodLeadingLow) / 2
 	leadingSpanB.name = "values"
-	leadingSpanB = leadingSpanB.append(futureDates).shift(displace)
+	leadingSpanB = pd.concat([leadingSpanB, futureDates]).shift(displace)
 
 	# The most current closing price plotted 22 time periods behind
 	chikouSpan = rates["Close"].shift(-22)
@@ -317,8 +543,9 @@ def get_vwap(rates):
 
 	Parameters
 	----------
-	rates : pandas.DataFrame
-		Rates of a cryptocurrency in chronological order.
+	rates : pandas.DataFrame or CandleBuffer
+		Rates of a cryptocurrency in chronological order. A CandleBuffer is used without 
+		copying.
 
 	Returns
 	-------
@@ -326,6 +553,7 @@ def get_vwap(rates):
 		Volume-weighted-average-price values for the given rates and period length.
 	"""
 
+	rates = _get_rates_frame(rates)
 	volume = rates["Volume"].values
 	hlc3 = (rates["High"] + rates["Low"] + rates["Close"]).div(3).values
 	vwap = ((hlc3 * volume).cumsum() / volume.cumsum())
@@ -340,8 +568,9 @@ def get_bb(rates, periodLength, standardDevLevel):
 
 	Parameters
 	----------
-	rates : pandas.DataFrame
-		Rates of a cryptocurrency in chronological order.
+	rates : pandas.DataFrame, pandas.Series, or CandleBuffer
+		Rates of a cryptocurrency in chronological order. Close prices of a CandleBuffer 
+		are used without copying.
 	periodLength : int
 		Amount of datapoints used to calculate bollinger-bands. Must be less than amount 
 		of data points.
@@ -355,6 +584,7 @@ def get_bb(rates, periodLength, standardDevLevel):
 		level as (bbUpper, bbMiddle, bbLower).
 	"""
 
+	rates = _get_price_series(rates)
 	standardDev = rates.rolling(periodLength).std()
 	bbMiddle = get_sma(rates, periodLength)
 	bbUpper = bbMiddle + (standardDev * standardDevLevel)
@@ -362,3 +592,490 @@ def get_bb(rates, periodLength, standardDevLevel):
 	return(bbUpper, bbMiddle, bbLower)
 
 
+def get_bb_table(rates, periodLengths):
+	"""
+	Calculates and returns rolling means and standard deviations for several period lengths.
+
+	Both statistics depend only on the period length, so they are calculated once from 
+	prefix sums and every standard deviation level can be applied afterwards with 
+	get_bb_from_table. The prefix sums restart every 256 candles around the first rate of 
+	the block, so they stay small however far prices move. Windows whose deviations are 
+	too small for the sums to resolve, such as flat stretches, are recalculated from their 
+	rates, so values stay within 1e-8 of the direct formulas.
+
+	Parameters
+	----------
+	rates : pandas.Series, numpy.ndarray, or CandleBuffer
+		Rates of a cryptocurrency in chronological order. Close prices of a CandleBuffer 
+		are used without copying.
+	periodLengths : iterable of int
+		Amounts of datapoints used to calculate bollinger-bands. Must be less than amount 
+		of data points.
+
+	Returns
+	-------
+	tuple of (numpy.ndarray, numpy.ndarray)
+		Contiguous arrays of shape (max(periodLengths) + 1, len(rates)) as (bbMiddleTable, 
+		bbStdTable) where row p holds the rolling mean and sample standard deviation for 
+		period length p aligned to rates. Warm-up values and unused rows are NaN.
+	"""
+
+	values = np.asarray(_get_price_series(rates), dtype=np.float64)
+	periodLengths = np.unique(np.asarray(list(periodLengths), dtype=np.int64))
+	bbMiddleTable = np.full((periodLengths[-1] + 1, len(values)), np.nan)
+	bbStdTable = np.full((periodLengths[-1] + 1, len(values)), np.nan)
+	if len(values) == 0:
+		return (bbMiddleTable, bbStdTable)
+
+	# Every block gets its own prefix sums over the windows starting in it
+	blockLength = 256
+	segmentLength = blockLength + periodLengths[-1] - 1
+	padded = np.concatenate((values, np.full(segmentLength, values[-1])))
+	segments = sliding_window_view(padded, segmentLength)[:len(values):blockLength]
+	anchors = segments[:, 0]
+	centered = segments - anchors[:, np.newaxis]
+	sums = np.zeros((len(segments), segmentLength + 1))
+	squareSums = np.zeros((len(segments), segmentLength + 1))
+	np.cumsum(centered, axis=1, out=sums[:, 1:])
+	np.cumsum(centered * centered, axis=1, out=squareSums[:, 1:])
+	(sums, squareSums) = (sums.ravel(), squareSums.ravel())
+
+	# Position of every window start in the flattened sums
+	starts = np.arange(len(values))
+	blocks = starts // blockLength
+	firsts = (blocks * (segmentLength + 1)) + (starts % blockLength)
+	windowAnchors = anchors[blocks]
+
+	for periodLength in periodLengths:
+		if periodLength > len(values):
+			continue
+		count = len(values) - periodLength + 1
+		(begin, end) = (firsts[:count], firsts[:count] + periodLength)
+		windowSums = sums[end] - sums[begin]
+		windowMeans = windowSums / periodLength
+		bbMiddleTable[periodLength, periodLength - 1:] = windowMeans + windowAnchors[:count]
+		if periodLength > 1:
+			windowSquareSums = squareSums[end] - squareSums[begin]
+			deviations = windowSquareSums - (windowSums * windowMeans)
+			unresolved = np.flatnonzero(deviations < 1e-6 * squareSums[end])
+			if len(unresolved):
+				windows = sliding_window_view(values, periodLength)[unresolved]
+				windows = windows - bbMiddleTable[periodLength, unresolved + periodLength - 1][:, np.newaxis]
+				deviations[unresolved] = np.einsum("ij,ij->i", windows, windows)
+			bbStdTable[periodLength, periodLength - 1:] = np.sqrt(np.maximum(deviations, 0.0) / (periodLength - 1))
+
+	return (bbMiddleTable, bbStdTable)
+
+
+def get_bb_from_table(bbMiddleTable, bbStdTable, periodLength, standardDevLevel):
+	"""
+	Returns the bollinger-bands of one period length and level from precomputed tables.
+
+	Parameters
+	----------
+	bbMiddleTable : numpy.ndarray
+		Rolling means from get_bb_table.
+	bbStdTable : numpy.ndarray
+		Rolling standard deviations from get_bb_table.
+	periodLength : int
+		Amount of datapoints used to calculate bollinger-bands.
+	standardDevLevel : float
+		Standard deviation level used to calculate upper and lower bollinger-bands.
+
+	Returns
+	-------
+	tuple of (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+		Tuple of bollinger-bands values as (bbUpper, bbMiddle, bbLower) where bbMiddle is a 
+		view into bbMiddleTable.
+	"""
+
+	bbMiddle = bbMiddleTable[periodLength]
+	bandWidth = bbStdTable[periodLength] * standardDevLevel
+	return (bbMiddle + bandWidth, bbMiddle, bbMiddle - bandWidth)
+
+
+# ------------------------------- Streaming indicators ---------------------------------
+
+class IndicatorState:
+	"""
+	Base class for indicators that are updated one candle at a time.
+
+	The newest candle is still open, so its value can be replaced any number of times 
+	before the next candle is pushed and it becomes final.
+
+	Attributes
+	----------
+	historyLength : int
+		Amount of finalized candles whose values are kept for get_history.
+
+	Methods
+	-------
+	push(self, value)
+		Adds a new candle and finalizes the previous one.
+	replace(self, value)
+		Replaces the value of the newest candle.
+	reset(self)
+		Clears all candles.
+	sync(self, rates)
+		Updates the state from the most recent rates with constant work per tick.
+	get_history(self)
+		Returns the kept indicator values ending with the newest candle.
+	"""
+
+	def __init__(self, historyLength=0):
+		"""
+		Initializes an empty state.
+
+		Parameters
+		----------
+		historyLength : int
+			Amount of finalized candles whose values are kept for get_history.
+		"""
+
+		self.historyLength = historyLength
+		self.lastLabel = None
+		self.reset()
+
+
+	def sync(self, rates):
+		"""
+		Updates the state from the most recent rates with constant work per tick.
+
+		If the newest candle is the one seen last time only its value is replaced. If one 
+		new candle was added the previous candle is finalized and the new one pushed. Any 
+		other change (gaps, first call) rebuilds the state from all rates.
+
+		Parameters
+		----------
+		rates : pandas.Series or CandleBuffer
+			Rates of a cryptocurrency in chronological order indexed by date. Close prices 
+			of a CandleBuffer are used without copying.
+		"""
+
+		rates = _get_price_series(rates)
+		label = rates.index[-1]
+		if (self.lastLabel is not None) and (label == self.lastLabel):
+			self.replace(float(rates.iloc[-1]))
+		elif (self.lastLabel is not None) and (len(rates) > 1) and (rates.index[-2] == self.lastLabel):
+			self.replace(float(rates.iloc[-2]))
+			self.push(float(rates.iloc[-1]))
+		else:
+			self.reset()
+			for value in rates.values:
+				self.push(float(value))
+		self.lastLabel = label
+
+
+class RsiState(IndicatorState):
+	"""
+	Keeps Wilder's gain and loss averages to update the relative-strength-index in constant 
+	time. Values match get_rsi.
+
+	Attributes
+	----------
+	periodLength : int
+		Amount of datapoints used to calculate the relative-strength-index.
+	rsi : float
+		Relative-strength-index of the newest candle, NaN during warm-up.
+	previousRsi : float
+		Relative-strength-index of the candle before the newest one, NaN during warm-up.
+	"""
+
+	def __init__(self, periodLength, historyLength=0):
+		"""
+		Initializes an empty state.
+
+		Parameters
+		----------
+		periodLength : int
+			Amount of datapoints used to calculate the relative-strength-index.
+		historyLength : int
+			Amount of finalized candles whose values are kept for get_history.
+		"""
+
+		self.periodLength = periodLength
+		super().__init__(historyLength)
+
+
+	def reset(self):
+		"""
+		Clears all candles.
+		"""
+
+		self.count = 0
+		self.gains = 0.0
+		self.losses = 0.0
+		self.lastValue = None
+		self.currentValue = None
+		self.previousRsi = float("nan")
+		self.history = collections.deque(maxlen=self.historyLength)
+
+
+	def push(self, value):
+		"""
+		Adds a new candle and finalizes the previous one.
+
+		Parameters
+		----------
+		value : float
+			Value of the new candle.
+		"""
+
+		if self.currentValue is not None:
+			(self.gains, self.losses, self.previousRsi) = self._step(self.currentValue)
+			self.lastValue = self.currentValue
+			self.history.append(self.previousRsi)
+		self.currentValue = value
+		self.count += 1
+
+
+	def replace(self, value):
+		"""
+		Replaces the value of the newest candle.
+
+		Parameters
+		----------
+		value : float
+			New value of the newest candle.
+		"""
+
+		self.currentValue = value
+
+
+	@property
+	def rsi(self):
+		"""
+		Relative-strength-index of the newest candle, NaN during warm-up.
+		"""
+
+		if self.currentValue is None:
+			return float("nan")
+		return self._step(self.currentValue)[2]
+
+
+	def get_history(self):
+		"""
+		Returns the kept relative-strength-index values ending with the newest candle.
+
+		Returns
+		-------
+		numpy.ndarray
+			Up to historyLength + 1 values in chronological order, NaN during warm-up.
+		"""
+
+		history = np.empty(len(self.history) + 1)
+		history[:-1] = self.history
+		history[-1] = self.rsi
+		return history
+
+
+	def _step(self, value):
+		"""
+		Returns (gains, losses, rsi) after adding value to the finalized candles.
+		"""
+
+		periodLength = self.periodLength
+		index = self.count - 1
+		gains = self.gains
+		losses = self.losses
+		rsi = float("nan")
+
+		if index == 0:
+			return (gains, losses, rsi)
+
+		delta = value - self.lastValue
+		if index < periodLength:
+			# First step of RSI
+			if delta >= 0:
+				gains += (delta / periodLength)
+			else:
+				losses += (abs(delta) / periodLength)
+			if index < periodLength - 1:
+				return (gains, losses, rsi)
+		else:
+			# Second step of RSI
+			if delta >= 0:
+				gains = ((gains * (periodLength - 1)) + delta) / periodLength
+				losses = losses * (periodLength - 1) / periodLength
+			else:
+				gains = gains * (periodLength - 1) / periodLength
+				losses = ((losses * (periodLength - 1)) + abs(delta)) / periodLength
+
+		if losses == 0.0:
+			rsi = 100.0
+		else:
+			rsi = 100.0 - (100.0 / (1 + (gains / losses)))
+		return (gains, losses, rsi)
+
+
+class BbState(IndicatorState):
+	"""
+	Keeps rolling sums to update the bollinger-bands in constant time.
+
+	The sums are taken around the first value to keep the squared sums small and are 
+	recalculated from the window once every periodLength candles so rounding errors can 
+	not build up.
+
+	Attributes
+	----------
+	periodLength : int
+		Amount of datapoints used to calculate bollinger-bands.
+	standardDevLevel : float
+		Standard deviation level used to calculate upper and lower bollinger-bands.
+	bands : tuple of (float, float, float)
+		Bollinger-bands of the newest candle as (bbUpper, bbMiddle, bbLower).
+	previousBands : tuple of (float, float, float)
+		Bollinger-bands of the candle before the newest one as (bbUpper, bbMiddle, bbLower).
+	"""
+
+	def __init__(self, periodLength, standardDevLevel, historyLength=0):
+		"""
+		Initializes an empty state.
+
+		Parameters
+		----------
+		periodLength : int
+			Amount of datapoints used to calculate bollinger-bands.
+		standardDevLevel : float
+			Standard deviation level used to calculate upper and lower bollinger-bands.
+		historyLength : int
+			Amount of finalized candles whose values are kept for get_history.
+		"""
+
+		self.periodLength = periodLength
+		self.standardDevLevel = standardDevLevel
+		super().__init__(historyLength)
+
+
+	def reset(self):
+		"""
+		Clears all candles.
+		"""
+
+		self.window = collections.deque(maxlen=self.periodLength)
+		self.offset = None
+		self.sum = 0.0
+		self.squareSum = 0.0
+		self.pushes = 0
+		self.previousMoments = (float("nan"), float("nan"))
+		self.history = collections.deque(maxlen=self.historyLength)
+
+
+	def push(self, value):
+		"""
+		Adds a new candle and finalizes the previous one.
+
+		Parameters
+		----------
+		value : float
+			Value of the new candle.
+		"""
+
+		self.previousMoments = self._moments()
+		if len(self.window) > 0:
+			self.history.append(self.previousMoments)
+		if self.offset is None:
+			self.offset = value
+		if len(self.window) == self.periodLength:
+			removed = self.window[0] - self.offset
+			self.sum -= removed
+			self.squareSum -= removed * removed
+		self.window.append(value)
+		added = value - self.offset
+		self.sum += added
+		self.squareSum += added * added
+
+		self.pushes += 1
+		if self.pushes % self.periodLength == 0:
+			self._recalculate()
+
+
+	def replace(self, value):
+		"""
+		Replaces the value of the newest candle.
+
+		Parameters
+		----------
+		value : float
+			New value of the newest candle.
+		"""
+
+		removed = self.window[-1] - self.offset
+		added = value - self.offset
+		self.window[-1] = value
+		self.sum += added - removed
+		self.squareSum += (added * added) - (removed * removed)
+
+
+	@property
+	def bands(self):
+		"""
+		Bollinger-bands of the newest candle as (bbUpper, bbMiddle, bbLower).
+		"""
+
+		(bbMiddle, standardDev) = self._moments()
+		return (bbMiddle + (standardDev * self.standardDevLevel), bbMiddle,
+			bbMiddle - (standardDev * self.standardDevLevel))
+
+
+	@property
+	def previousBands(self):
+		"""
+		Bollinger-bands of the candle before the newest one as (bbUpper, bbMiddle, bbLower).
+		"""
+
+		(bbMiddle, standardDev) = self.previousMoments
+		return (bbMiddle + (standardDev * self.standardDevLevel), bbMiddle,
+			bbMiddle - (standardDev * self.standardDevLevel))
+
+
+	def get_history(self):
+		"""
+		Returns the kept bollinger-bands ending with the newest candle.
+
+		The finalized candles keep mean and standard deviation, so the bands always use the 
+		current standardDevLevel.
+
+		Returns
+		-------
+		tuple of (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+			Up to historyLength + 1 values of (bbUpper, bbMiddle, bbLower) in chronological 
+			order, NaN during warm-up.
+		"""
+
+		moments = np.empty((len(self.history) + 1, 2))
+		moments[:-1] = np.array(self.history).reshape(-1, 2)
+		moments[-1] = self._moments()
+		bbMiddle = moments[:, 0]
+		bandWidth = moments[:, 1] * self.standardDevLevel
+		return (bbMiddle + bandWidth, bbMiddle, bbMiddle - bandWidth)
+
+
+	def _moments(self):
+		"""
+		Returns (mean, standard deviation) of the newest window, NaN during warm-up.
+		"""
+
+		if len(self.window) < self.periodLength:
+			return (float("nan"), float("nan"))
+		mean = self.sum / self.periodLength
+		if self.periodLength > 1:
+			variance = (self.squareSum - (self.sum * mean)) / (self.periodLength - 1)
+			standardDev = max(variance, 0.0) ** 0.5
+		else:
+			standardDev = float("nan")
+		return (mean + self.offset, standardDev)
+
+
+	def _recalculate(self):
+		"""
+		Recalculates the rolling sums from the window around its oldest value.
+		"""
+
+		self.offset = self.window[0]
+		self.sum = 0.0
+		self.squareSum = 0.0
+		for value in self.window:
+			centered = value - self.offset
+			self.sum += centered
+			self.squareSum += centered * centered
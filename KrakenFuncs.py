@@ -2,12 +2,25 @@
 """
 Module of functions used to interact with Kraken's cryptocurrency exchange API.
 
+Attributes
+----------
+balanceMaxAge : float
+	Default maximum age of the balance snapshot in seconds, orders use it as well.
+balanceRefreshDelay : float
+	Seconds after an order before the balances are refreshed, so the fill is included.
+
 Functions
 ---------
 kraken_order(price, side, altSymbol, altMarket)
 	Places a market order on Kraken's exhchange and returns the server's response.
-kraken_get_balance(altSymbol)
+kraken_get_balance(altSymbol, maxAge)
 	Returns balance of currency in your Kraken account.
+kraken_get_balances(maxAge)
+	Returns all balances in your Kraken account.
+kraken_refresh_balances()
+	Requests all balances and replaces the balance snapshot.
+kraken_invalidate_balances()
+	Discards the balance snapshot so the next lookup requests fresh balances.
 kraken_generate_signature(urlpath, data)
 	Generates signature to create server request.
 kraken_request(urlPath, data)
@@ -21,12 +34,19 @@ import base64
 import hashlib
 import hmac
 import json
-import requests
+import threading
 import time
 import urllib.parse
 
 # File imports
-from auth_cred import (kraken_api_secret, kraken_api_key)
+from ClientFuncs import send_request
+from MetricsFuncs import timed
+
+balanceMaxAge = 10.0
+balanceRefreshDelay = 5.0
+_balanceSnapshot = {"time": 0.0, "balances": None}
+_balanceLock = threading.Lock()
+_balanceRefresh = {"thread": None}
 
 
 # ---------------------------------- Account functions ------------------------------------	
@@ -35,6 +55,12 @@ def kraken_order(price, side, altSymbol, altMarket, market):
 	"""
 	Places a market order on Kraken's exhchange and returns the server's response.
 
+	The volume is taken from the balance snapshot if it is younger than balanceMaxAge, 
+	otherwise balances are requested first, since deposits, withdrawals, manual trades, 
+	and other pairs change them between orders. The snapshot is refreshed in the 
+	background after every order, so orders of pairs sharing a quote currency placed 
+	shortly after are a single request.
+
 	Parameters
 	----------
 	price : float
@@ -57,39 +83,114 @@ def kraken_order(price, side, altSymbol, altMarket, market):
 	elif side == "buy":
 		volume = float(kraken_get_balance(altMarket)) * 0.99 / price
 	volume = str(volume)[:10]
-	resp = kraken_request("/0/private/AddOrder", {
-		"nonce": str(int(1000*time.time())),
-		"ordertype": "market",
-    	"type": side,
-	    "volume": volume,
-    	"pair": (altSymbol + market)
-		})
-	return resp.json()
+	try:
+		resp = kraken_request("/0/private/AddOrder", {
+			"nonce": str(int(1000*time.time())),
+			"ordertype": "market",
+			"type": side,
+			"volume": volume,
+			"pair": (altSymbol + market)
+			})
+		return resp.json()
+	finally:
+		# Orders placed before the refresh finishes request fresh balances themselves
+		kraken_invalidate_balances()
+		_balanceRefresh["thread"] = threading.Thread(target=_refresh_balances_after_order, daemon=True)
+		_balanceRefresh["thread"].start()
 
 
-def kraken_get_balance(altSymbol):
+def kraken_get_balance(altSymbol, maxAge=None):
 	"""
 	Returns balance of currency in Kraken account.
 
+	Served from the shared balance snapshot, see kraken_get_balances.
+
 	Parameters
 	----------
 	altSymbol : str
 		Alternative symbol associated with the base currency of a trading pair.
+	maxAge : float
+		Maximum age of the balance snapshot in seconds. Defaults to balanceMaxAge.
 
 	Returns
 	-------
-	dict of {str : [str]}
-		Server's request response as {"response-type" : ["response"]}.
+	str or None
+		Balance of the currency, None if it could not be retrieved.
+	"""
+
+	try:
+		return kraken_get_balances(maxAge)[altSymbol]
+	except Exception as err:
+		print(err)
+		return None
+
+
+def kraken_get_balances(maxAge=None):
+	"""
+	Returns all balances in Kraken account.
+
+	All balances are requested at once and kept as a snapshot, lookups within maxAge 
+	seconds of the request are served from memory.
+
+	Parameters
+	----------
+	maxAge : float
+		Maximum age of the balance snapshot in seconds. Defaults to balanceMaxAge.
+
+	Returns
+	-------
+	dict of {str : str}
+		Balances as {"altSymbol" : "balance"}.
+	"""
+
+	if maxAge is None:
+		maxAge = balanceMaxAge
+
+	with _balanceLock:
+		if (_balanceSnapshot["balances"] is None) or ((time.monotonic() - _balanceSnapshot["time"]) > maxAge):
+			_request_balances()
+		return _balanceSnapshot["balances"]
+
+
+def kraken_refresh_balances():
+	"""
+	Requests all balances and replaces the balance snapshot.
+	"""
+
+	with _balanceLock:
+		_request_balances()
+
+
+def _request_balances():
+	"""
+	Requests all balances into the snapshot, the balance lock must be held.
 	"""
 
 	resp = kraken_request('/0/private/Balance', {
 	"nonce": str(int(1000*time.time()))})
+	_balanceSnapshot["balances"] = resp.json()["result"]
+	_balanceSnapshot["time"] = time.monotonic()
+
+
+def _refresh_balances_after_order():
+	"""
+	Refreshes the snapshot after an order, a failed refresh leaves it discarded.
+	"""
+
+	time.sleep(balanceRefreshDelay)
 	try:
-		resp = resp.json()["result"][altSymbol]
-		return resp
+		kraken_refresh_balances()
 	except Exception as err:
 		print(err)
-		return None
+
+
+def kraken_invalidate_balances():
+	"""
+	Discards the balance snapshot so the next lookup requests fresh balances.
+	"""
+
+	with _balanceLock:
+		_balanceSnapshot["balances"] = None
 
 
 # --------------------------------- Connection functions ----------------------------------
@@ -111,6 +212,8 @@ def kraken_generate_signature(urlPath, data):
 		Generated signature needed for server request.	
 	"""
 
+	from auth_cred import kraken_api_secret
+
 	postdata = urllib.parse.urlencode(data)
 	encoded = (str(data['nonce']) + postdata).encode()
 	message = urlPath.encode() + hashlib.sha256(encoded).digest()
@@ -136,11 +239,13 @@ def kraken_request(urlPath, data):
 		Response from server.
 	"""
 
-	apiUrl = "https://api.kraken.com"
+	from auth_cred import kraken_api_key
+
 	headers = {}
 	headers["API-Key"] = kraken_api_key
 	headers["API-Sign"] = kraken_generate_signature(urlPath, data)
-	resp = requests.post((apiUrl + urlPath), headers=headers, data=data)
+	with timed("kraken.request"):
+		resp = send_request("POST", "https://api.kraken.com", urlPath, headers=headers, data=data)
 	return resp
 
 
@@ -156,5 +261,5 @@ def kraken_get_assets():
 		Avaible assets and asset information as {"symbol-name" : {symbol-information}}
 	"""
 
-	assets = requests.get('https://api.kraken.com/0/public/Assets').json()
+	assets = send_request("GET", "https://api.kraken.com", "/0/public/Assets").json()
 	return assets['result']
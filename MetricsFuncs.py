@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Module of the latency timers and counters of the live loop.
+
+Stages of the loop are wrapped in timed(name), which records the elapsed time into a
+rolling latency histogram of that name, and events are counted with increment_counter.
+Recording costs a few microseconds, so the timers stay on in production. A
+MetricsReporter serves the metrics as JSON on localhost and prints a summary
+periodically.
+
+Attributes
+----------
+latencyBuckets : tuple of float
+	Upper bounds in seconds of the histogram buckets, a last bucket holds the rest.
+windowSeconds : float
+	Seconds of recent recordings the rolling histograms cover.
+windowSlices : int
+	Amount of slices a window is rotated in, the oldest slice is dropped as a whole.
+
+Functions
+---------
+timed(name)
+	Context manager that records the time spent inside it.
+record_latency(name, seconds)
+	Records one latency into the rolling histogram of a stage.
+increment_counter(name, amount)
+	Adds to the counter of an event.
+get_metrics()
+	Returns the current latency summaries and counters.
+format_metrics(metrics)
+	Returns metrics as a text summary.
+
+Classes
+-------
+LatencyHistogram
+	Counts latencies in fixed buckets over a rolling time window.
+MetricsReporter
+	Serves the metrics over local HTTP and prints them periodically.
+"""
+
+# Library imports
+import bisect
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+latencyBuckets = tuple(round(0.0001 * (2 ** (exponent / 2.0)), 7) for exponent in range(40))
+windowSeconds = 300.0
+windowSlices = 5
+
+_latencies = {}
+_counters = {}
+_metricsLock = threading.Lock()
+_startTime = time.time()
+
+
+# ------------------------------------ Histograms --------------------------------------
+
+class LatencyHistogram:
+	"""
+	Counts latencies in fixed buckets over a rolling time window.
+
+	The window is split into windowSlices slices of bucket counts. Recording only
+	increments one count, and once a slice is older than the window it is cleared and
+	reused, so memory and cost stay constant however many latencies are recorded.
+
+	Methods
+	-------
+	__init__(self)
+		Creates empty slices.
+	record(self, seconds)
+		Counts one latency in the current slice.
+	get_summary(self)
+		Returns count and percentiles of the window and totals since start.
+	"""
+
+	def __init__(self):
+		"""
+		Creates empty slices.
+		"""
+
+		self.lock = threading.Lock()
+		self.sliceLength = windowSeconds / windowSlices
+		self.slices = [[0] * (len(latencyBuckets) + 1) for _ in range(windowSlices)]
+		self.maxima = [0.0] * windowSlices
+		self.current = 0
+		self.sliceEnd = time.monotonic() + self.sliceLength
+		self.count = 0
+		self.total = 0.0
+
+
+	def record(self, seconds):
+		"""
+		Counts one latency in the current slice.
+
+		Parameters
+		----------
+		seconds : float
+			Measured latency.
+		"""
+
+		bucket = bisect.bisect_left(latencyBuckets, seconds)
+		with self.lock:
+			self._rotate()
+			self.slices[self.current][bucket] += 1
+			if seconds > self.maxima[self.current]:
+				self.maxima[self.current] = seconds
+			self.count += 1
+			self.total += seconds
+
+
+	def _rotate(self):
+		"""
+		Clears the slices that fell out of the window, the lock must be held.
+		"""
+
+		now = time.monotonic()
+		if now < self.sliceEnd:
+			return
+		passed = min(windowSlices, int((now - self.sliceEnd) // self.sliceLength) + 1)
+		for _ in range(passed):
+			self.current = (self.current + 1) % windowSlices
+			self.slices[self.current] = [0] * (len(latencyBuckets) + 1)
+			self.maxima[self.current] = 0.0
+		self.sliceEnd = now + self.sliceLength
+
+
+	def get_summary(self):
+		"""
+		Returns count and percentiles of the window and totals since start.
+
+		Percentiles are the upper bound of the bucket they fall in, capped at the largest
+		latency of the window.
+
+		Returns
+		-------
+		dict of {str : float}
+			"count", "p50", "p95", "p99", and "max" of the window in seconds, and "total"
+			count and "mean" seconds since start. Percentiles are None without recordings.
+		"""
+
+		with self.lock:
+			self._rotate()
+			counts = [sum(bucket) for bucket in zip(*self.slices)]
+			maximum = max(self.maxima)
+			(total, mean) = (self.count, (self.total / self.count) if self.count else None)
+
+		count = sum(counts)
+		summary = {"count": count, "max": maximum if count else None, "total": total, "mean": mean}
+		for (name, quantile) in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+			summary[name] = None
+			if count == 0:
+				continue
+			(target, seen) = (quantile * count, 0)
+			for (bucket, bucketCount) in enumerate(counts):
+				seen += bucketCount
+				if seen >= target:
+					bound = latencyBuckets[bucket] if bucket < len(latencyBuckets) else maximum
+					summary[name] = min(bound, maximum)
+					break
+		return summary
+
+
+# ------------------------------------- Recording --------------------------------------
+
+def timed(name):
+	"""
+	Context manager that records the time spent inside it.
+
+	The time is recorded when the block raises as well.
+
+	Parameters
+	----------
+	name : str
+		Name of the stage, e.g. "strategy.run".
+
+	Returns
+	-------
+	_Timer
+		Context manager of the stage.
+	"""
+
+	return _Timer(name)
+
+
+class _Timer:
+	"""
+	Records the time between entering and leaving it, see timed.
+	"""
+
+	__slots__ = ("name", "start")
+
+	def __init__(self, name):
+		self.name = name
+
+	def __enter__(self):
+		self.start = time.perf_counter()
+
+	def __exit__(self, *exc):
+		record_latency(self.name, time.perf_counter() - self.start)
+
+
+def record_latency(name, seconds):
+	"""
+	Records one latency into the rolling histogram of a stage.
+
+	Parameters
+	----------
+	name : str
+		Name of the stage.
+	seconds : float
+		Measured latency.
+	"""
+
+	histogram = _latencies.get(name)
+	if histogram is None:
+		with _metricsLock:
+			histogram = _latencies.setdefault(name, LatencyHistogram())
+	histogram.record(seconds)
+
+
+def increment_counter(name, amount=1):
+	"""
+	Adds to the counter of an event.
+
+	Parameters
+	----------
+	name : str
+		Name of the event, e.g. "errors.fetch".
+	amount : int
+		Amount added.
+	"""
+
+	with _metricsLock:
+		_counters[name] = _counters.get(name, 0) + amount
+
+
+def get_metrics():
+	"""
+	Returns the current latency summaries and counters.
+
+	Returns
+	-------
+	dict
+		{"uptime": seconds, "windowSeconds": seconds, "latencies": {name: summary},
+		"counters": {name: count}} with summaries as returned by
+		LatencyHistogram.get_summary.
+	"""
+
+	with _metricsLock:
+		histograms = dict(_latencies)
+		counters = dict(_counters)
+	return {"uptime": time.time() - _startTime, "windowSeconds": windowSeconds,
+		"latencies": {name: histograms[name].get_summary() for name in sorted(histograms)},
+		"counters": {name: counters[name] for name in sorted(counters)}}
+
+
+def format_metrics(metrics=None):
+	"""
+	Returns metrics as a text summary.
+
+	Parameters
+	----------
+	metrics : dict
+		Metrics as returned by get_metrics. Defaults to the current metrics.
+
+	Returns
+	-------
+	str
+		One line per stage with window count and latencies in milliseconds, followed by
+		the counters.
+	"""
+
+	metrics = get_metrics() if metrics is None else metrics
+	milliseconds = lambda value: "-" if value is None else "{:.1f}".format(value * 1000.0)
+	lines = ["{:<24}{:>8}{:>10}{:>10}{:>10}{:>10}".format("stage ({:.0f}s)".format(metrics["windowSeconds"]),
+		"count", "p50 ms", "p95 ms", "p99 ms", "max ms")]
+	for (name, summary) in metrics["latencies"].items():
+		lines.append("{:<24}{:>8}{:>10}{:>10}{:>10}{:>10}".format(name, summary["count"],
+			milliseconds(summary["p50"]), milliseconds(summary["p95"]), milliseconds(summary["p99"]),
+			milliseconds(summary["max"])))
+	if metrics["counters"]:
+		lines.append(", ".join("{}: {}".format(name, count) for (name, count) in metrics["counters"].items()))
+	return "\n".join(lines)
+
+
+# ------------------------------------- Reporting --------------------------------------
+
+class MetricsReporter:
+	"""
+	Serves the metrics over local HTTP and prints them periodically.
+
+	GET /metrics returns get_metrics as JSON.
+
+	Attributes
+	----------
+	url : str
+		Address of the server, None if no port was given.
+
+	Methods
+	-------
+	__init__(self, port, logInterval, host)
+		Starts the server and the log thread that are enabled.
+	run_log(self)
+		Prints the summary every logInterval seconds until closed.
+	close(self)
+		Stops the server and the log thread.
+	"""
+
+	def __init__(self, port=None, logInterval=None, host="127.0.0.1"):
+		"""
+		Starts the server and the log thread that are enabled.
+
+		Parameters
+		----------
+		port : int
+			Port to serve on, 0 picks a free port. No server is started if None.
+		logInterval : float
+			Seconds between two printed summaries. Nothing is printed if None or 0.
+		host : str
+			Interface to listen on, only the local machine by default.
+		"""
+
+		class Handler(BaseHTTPRequestHandler):
+			def do_GET(self):
+				if self.path.split("?")[0] != "/metrics":
+					self.send_response(404)
+					self.end_headers()
+					return
+				body = json.dumps(get_metrics()).encode("utf-8")
+				self.send_response(200)
+				self.send_header("Content-Type", "application/json")
+				self.send_header("Content-Length", str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+
+			def log_message(self, format, *args):
+				pass
+
+		self.server = None
+		self.url = None
+		if port is not None:
+			self.server = ThreadingHTTPServer((host, port), Handler)
+			self.server.daemon_threads = True
+			self.url = "http://{}:{}/metrics".format(host, self.server.server_address[1])
+			threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+		self.logInterval = logInterval
+		self.stopEvent = threading.Event()
+		if logInterval:
+			threading.Thread(target=self.run_log, daemon=True).start()
+
+
+	def run_log(self):
+		"""
+		Prints the summary every logInterval seconds until closed.
+		"""
+
+		while not self.stopEvent.wait(self.logInterval):
+			print(format_metrics())
+
+
+	def close(self):
+		"""
+		Stops the server and the log thread.
+		"""
+
+		self.stopEvent.set()
+		if self.server is not None:
+			self.server.shutdown()
+			self.server.server_close()
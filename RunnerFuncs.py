@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Module of the multi-symbol runner that trades every configured pair from one process.
+
+One scheduler thread fetches the rates of all pairs through a shared pool of fetch
+workers, or receives them from one streaming feed, runs every pair's strategy, and hands
+due analyses to one shared pool of analysis workers. Memory and CPU grow with the amount
+of pairs instead of with copies of the app.
+
+Functions
+---------
+get_trading_pairs(config)
+	Returns the trading pairs listed in a configuration.
+create_runner(config)
+	Returns a runner for every trading pair and setting of a configuration.
+create_metrics_reporter(config)
+	Returns the metrics reporter enabled by a configuration.
+
+Classes
+-------
+MultiSymbolRunner
+	Fetches rates, runs strategies, and schedules analyses for many trading pairs.
+"""
+
+# Library imports
+import os
+import threading
+import time
+from colorama import Fore
+from colorama import Style
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# File imports
+from Contact import *
+from FeedFuncs import *
+from IndicatorFuncs import *
+from MetricsFuncs import *
+from StrategyFuncs import *
+
+
+# --------------------------------------- Config ----------------------------------------
+
+def get_trading_pairs(config):
+	"""
+	Returns the trading pairs listed in a configuration.
+
+	The optional "pairs" setting lists pair names separated by commas, every name with its
+	own section of symbol, altSymbol, market, and altMarket. Sections fall back to the
+	[settings] values for missing keys, so timeSlice and stopLossPortion only need to be set
+	where they differ. Without "pairs" or for a name without a section, the pair in
+	[settings] is traded.
+
+	Parameters
+	----------
+	config : configparser.ConfigParser
+		Configuration read from "config.ini".
+
+	Returns
+	-------
+	list of TradingPair
+		Configured trading pairs in the listed order.
+	"""
+
+	settings = config["settings"]
+	names = [name.strip() for name in settings.get("pairs", "").split(",") if name.strip()]
+	if len(names) == 0:
+		names = [settings["symbol"] + "-" + settings["market"]]
+
+	pairs = []
+	for name in names:
+		section = config[name] if config.has_section(name) else settings
+		get = lambda key: section.get(key, settings.get(key))
+		pairs.append(TradingPair(name, get("symbol"), get("altSymbol"), get("market"), get("altMarket"),
+			int(get("timeSlice")), float(get("stopLossPortion"))))
+	return pairs
+
+
+def create_runner(config):
+	"""
+	Returns a runner for every trading pair and setting of a configuration.
+
+	Reads the optional settings searchStrategy, searchBudget, fetchWorkers,
+	analysisWorkers, and streaming, see MultiSymbolRunner.
+
+	Parameters
+	----------
+	config : configparser.ConfigParser
+		Configuration read from "config.ini".
+
+	Returns
+	-------
+	MultiSymbolRunner
+		Runner that is not started yet.
+	"""
+
+	settings = config["settings"]
+	return MultiSymbolRunner(get_trading_pairs(config),
+		searchStrategy=settings.get("searchStrategy", "coarse_to_fine"),
+		searchBudget=int(settings["searchBudget"]) if "searchBudget" in settings else None,
+		fetchWorkers=int(settings.get("fetchWorkers", "4")),
+		analysisWorkers=int(settings.get("analysisWorkers", "0")) or None,
+		streaming=settings.getboolean("streaming", False))
+
+
+def create_metrics_reporter(config):
+	"""
+	Returns the metrics reporter enabled by a configuration.
+
+	Reads the optional settings metricsPort, the local port of the metrics endpoint, and
+	metricsLogInterval, the seconds between printed summaries. Both are off by default.
+
+	Parameters
+	----------
+	config : configparser.ConfigParser
+		Configuration read from "config.ini".
+
+	Returns
+	-------
+	MetricsReporter
+		Reporter that is already serving and logging.
+	"""
+
+	settings = config["settings"]
+	port = int(settings.get("metricsPort", "0"))
+	return MetricsReporter(port if port else None, float(settings.get("metricsLogInterval", "0")))
+
+
+# --------------------------------------- Runner ----------------------------------------
+
+class MultiSymbolRunner:
+	"""
+	Fetches rates, runs strategies, and schedules analyses for many trading pairs.
+
+	Every tick the rates of all pairs are fetched concurrently, pairs sharing a symbol and
+	time-slice share one request, and each pair's strategy runs as soon as its rates
+	arrive. Analyses return their results to the scheduler thread, which applies them on
+	the next tick, so the strategy state of a pair is only ever changed by one thread.
+
+	In streaming mode the rates come from a MarketFeed instead. Every trade wakes the
+	scheduler, which runs the strategies of the changed symbols at most once every
+	updateInterval seconds, so signals and stop-losses react within that delay.
+
+	Methods
+	-------
+	__init__(self, pairs, searchStrategy, searchBudget, fetchWorkers, analysisWorkers, streaming, url)
+		Creates a strategy per pair and the shared worker pools.
+	start(self)
+		Starts the scheduler thread.
+	stop(self)
+		Stops the scheduler thread and the worker pools.
+	run(self)
+		Runs a tick every tickInterval seconds or on feed updates until stopped.
+	run_tick(self)
+		Fetches rates, runs strategies, schedules analyses, and publishes snapshots.
+	run_fetched(self, fetch, pairs)
+		Runs the strategies of the pairs sharing one finished rate request.
+	run_updates(self)
+		Runs the strategies of the symbols the feed updated since the last call.
+	on_feed_update(self, symbol)
+		Marks a symbol as updated and wakes the scheduler.
+	run_pair(self, pair, rates)
+		Runs the strategy of one pair and publishes its snapshot.
+	apply_analyses(self)
+		Applies the results of finished analyses to their strategies.
+	"""
+
+	tickInterval = 10
+	updateInterval = 0.25
+
+
+	def __init__(self, pairs, searchStrategy="coarse_to_fine", searchBudget=None, fetchWorkers=4,
+			analysisWorkers=None, streaming=False, url=feedUrl):
+		"""
+		Creates a strategy per pair and the shared worker pools.
+
+		Parameters
+		----------
+		pairs : list of TradingPair
+			Trading pairs to trade, see get_trading_pairs.
+		searchStrategy : str
+			Parameter search strategy of the analyses, see SearchFuncs.searchStrategies.
+		searchBudget : int
+			Maximum amount of parameter combinations simulated per analysis, "grid" simulates
+			every combination. Defaults to a tenth of the grid.
+		fetchWorkers : int
+			Maximum amount of concurrent rate requests.
+		analysisWorkers : int
+			Maximum amount of concurrent analyses. Defaults to the amount of CPUs.
+		streaming : bool
+			If True rates are built from a streaming feed instead of being polled.
+		url : str
+			Address of the streaming feed, see FeedFuncs.feedUrl.
+		"""
+
+		self.pairs = list(pairs)
+		self.strategies = {pair.name: RsiBbStrategy(pair, searchStrategy, searchBudget) for pair in self.pairs}
+		self.snapshots = {}
+		self.analyses = {}
+		self.tickCount = {pair.name: 0 for pair in self.pairs}
+		self.fetchPool = ThreadPoolExecutor(max_workers=fetchWorkers)
+		self.analysisPool = ThreadPoolExecutor(max_workers=analysisWorkers or os.cpu_count() or 1)
+		self.stopEvent = threading.Event()
+		self.thread = None
+
+		self.feed = None
+		self.updatedSymbols = set()
+		self.updateLock = threading.Lock()
+		self.updateEvent = threading.Event()
+		if streaming:
+			self.feed = MarketFeed(sorted({(pair.symbol, pair.timeSlice) for pair in self.pairs}), url,
+				self.on_feed_update)
+
+
+	def start(self):
+		"""
+		Starts the scheduler thread.
+		"""
+
+		self.thread = threading.Thread(target=self.run, daemon=True)
+		self.thread.start()
+
+
+	def stop(self):
+		"""
+		Stops the scheduler thread and the worker pools.
+		"""
+
+		self.stopEvent.set()
+		self.updateEvent.set()
+		if self.feed is not None:
+			self.feed.stop()
+		self.fetchPool.shutdown(wait=False)
+		self.analysisPool.shutdown(wait=False)
+
+
+	def run(self):
+		"""
+		Runs a tick every tickInterval seconds or on feed updates until stopped.
+		"""
+
+		if self.feed is not None:
+			self.feed.start()
+		while not self.stopEvent.is_set():
+			tickStart = time.monotonic()
+			if self.feed is None:
+				self.run_tick()
+				self.stopEvent.wait(max(0.0, self.tickInterval - (time.monotonic() - tickStart)))
+			else:
+				# Also wakes without trades, so finished analyses are still applied
+				self.updateEvent.wait(self.tickInterval)
+				self.run_updates()
+				self.stopEvent.wait(max(0.0, self.updateInterval - (time.monotonic() - tickStart)))
+
+
+	def run_tick(self):
+		"""
+		Fetches rates, runs strategies, schedules analyses, and publishes snapshots.
+		"""
+
+		with timed("tick"):
+			self.apply_analyses()
+
+			# One request per symbol and time-slice, shared by every pair trading it
+			fetchGroups = {}
+			for pair in self.pairs:
+				fetchGroups.setdefault((pair.symbol, pair.timeSlice), []).append(pair)
+			fetches = {self.fetchPool.submit(get_historic_rates, symbol, timeSlice): pairs
+				for ((symbol, timeSlice), pairs) in fetchGroups.items()}
+
+			for fetch in as_completed(fetches):
+				self.run_fetched(fetch, fetches[fetch])
+
+
+	def run_fetched(self, fetch, pairs):
+		"""
+		Runs the strategies of the pairs sharing one finished rate request.
+
+		Parameters
+		----------
+		fetch : concurrent.futures.Future
+			Request returning the rates.
+		pairs : list of TradingPair
+			Trading pairs of the rates.
+		"""
+
+		try:
+			rates = fetch.result().tail(250)
+		except Exception as err:
+			increment_counter("errors.fetch")
+			names = ", ".join(pair.name for pair in pairs)
+			send_msg(names + " FETCH-ERROR\nCheck to see if bot is functioning")
+			print(Fore.RED + names + " FETCH-ERROR." + Style.RESET_ALL + "\n")
+			print(err)
+			return
+		for pair in pairs:
+			self.run_pair(pair, rates)
+
+
+	def run_updates(self):
+		"""
+		Runs the strategies of the symbols the feed updated since the last call.
+		"""
+
+		with timed("tick"):
+			self.apply_analyses()
+			with self.updateLock:
+				symbols = self.updatedSymbols
+				self.updatedSymbols = set()
+				self.updateEvent.clear()
+
+			for pair in self.pairs:
+				if pair.symbol not in symbols:
+					continue
+				rates = self.feed.get_rates(pair.symbol, pair.timeSlice)
+				if rates is not None:
+					self.run_pair(pair, rates.tail(250))
+
+
+	def on_feed_update(self, symbol):
+		"""
+		Marks a symbol as updated and wakes the scheduler.
+
+		Parameters
+		----------
+		symbol : str
+			Symbol whose candles changed.
+		"""
+
+		with self.updateLock:
+			self.updatedSymbols.add(symbol)
+			self.updateEvent.set()
+
+
+	def run_pair(self, pair, rates):
+		"""
+		Runs the strategy of one pair and publishes its snapshot.
+
+		Parameters
+		----------
+		pair : TradingPair
+			Trading pair of the rates.
+		rates : pandas.DataFrame
+			Rates of a cryptocurrency in chronological order.
+		"""
+
+		strategy = self.strategies[pair.name]
+		try:
+			with timed("strategy.indicators"):
+				indicators = strategy.get_indicators(rates)
+			with timed("strategy.run"):
+				strategy.run_strategy_rsi_bb(rates, indicators)
+			self.tickCount[pair.name] += 1
+			self.snapshots[pair.name] = strategy.get_snapshot(rates, indicators, self.tickCount[pair.name])
+
+			# An analysis still running skips this period instead of queueing behind itself
+			if strategy.is_analysis_due() and (pair.name not in self.analyses):
+				self.analyses[pair.name] = self.analysisPool.submit(strategy.analyze_rsi_bb, rates)
+
+		except Exception as err:
+			increment_counter("errors.update")
+			send_msg(pair.name + " UPDATE-ERROR\nCheck to see if bot is functioning")
+			print(Fore.RED + pair.name + " UPDATE-ERROR." + Style.RESET_ALL + "\n")
+			print(err)
+
+
+	def apply_analyses(self):
+		"""
+		Applies the results of finished analyses to their strategies.
+		"""
+
+		for (name, analysis) in list(self.analyses.items()):
+			if not analysis.done():
+				continue
+			del self.analyses[name]
+			try:
+				self.strategies[name].apply_analysis(analysis.result())
+
+			# Catches error in Analyze worker and prints to screen
+			except Exception as err:
+				increment_counter("errors.analyze")
+				send_msg(name + " ANALYZE-ERROR\nCheck to see if bot is functioning")
+				print(Fore.RED + name + " ANALYZE-ERROR." + Style.RESET_ALL)
+				print(err)
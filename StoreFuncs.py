@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Module of functions that keep market candles and placed orders in local SQLite databases.
+
+Candles are stored per symbol and granularity in a clustered table so the newest stored
+timestamp and any time range can be read without touching the rest of the history. Orders
+are kept in an append-only journal indexed by time and by symbol and time. The order
+history of older versions, "order_history.csv", is imported into the journal once.
+
+Attributes
+----------
+storePath : str
+	Path of the SQLite database file for candles.
+orderPath : str
+	Path of the SQLite database file for the order journal.
+orderCsvPath : str
+	Path of the order history CSV file of older versions.
+configPath : str
+	Path of the configuration whose altSymbol the imported CSV orders are recorded under.
+
+Functions
+---------
+get_store_connection(path, table)
+	Returns the calling thread's connection to a store.
+store_candles(symbol, granularity, candles, path)
+	Inserts or replaces candles in the store.
+get_last_candle_time(symbol, granularity, path)
+	Returns the epoch time of the newest stored candle.
+load_candles(symbol, granularity, start, end, limit, path)
+	Returns stored candles in a time range as a 2-D array.
+store_order(orderTime, symbol, side, price, path)
+	Appends an order to the order journal.
+load_orders(start, end, symbol, path)
+	Returns journaled orders in a time range.
+"""
+
+# Library imports
+import configparser
+import csv
+import os
+import sqlite3
+import threading
+import numpy as np
+from datetime import datetime
+
+storePath = "candles.db"
+orderPath = "order_history.db"
+orderCsvPath = "order_history.csv"
+configPath = "config.ini"
+_connections = threading.local()
+_tableSchemas = {
+	"candles": (
+		"CREATE TABLE IF NOT EXISTS candles ("
+		"symbol TEXT NOT NULL, granularity INTEGER NOT NULL, time INTEGER NOT NULL, "
+		"low REAL, high REAL, open REAL, close REAL, volume REAL, "
+		"PRIMARY KEY (symbol, granularity, time)) WITHOUT ROWID",),
+	"orders": (
+		"CREATE TABLE IF NOT EXISTS orders ("
+		"time REAL NOT NULL, symbol TEXT NOT NULL, side TEXT NOT NULL, price REAL NOT NULL)",
+		"CREATE INDEX IF NOT EXISTS orders_time ON orders (time)",
+		"CREATE INDEX IF NOT EXISTS orders_symbol_time ON orders (symbol, time)")}
+
+
+# ------------------------------------ Connection --------------------------------------
+
+def get_store_connection(path=None, table="candles"):
+	"""
+	Returns the calling thread's connection to a store.
+
+	Connections are kept per thread and per path, and a table is only created in the 
+	files it is used with. The first time the orders table of a journal is opened, the 
+	orders of orderCsvPath are imported into it.
+
+	Parameters
+	----------
+	path : str
+		Path of the SQLite database file. Defaults to storePath.
+	table : str
+		Either "candles" or "orders" for the table the connection is used with.
+
+	Returns
+	-------
+	sqlite3.Connection
+		Open connection to the store.
+	"""
+
+	path = path or storePath
+	connections = getattr(_connections, "connections", None)
+	if connections is None:
+		connections = _connections.connections = {}
+		_connections.tables = set()
+
+	if path not in connections:
+		conn = sqlite3.connect(path, timeout=30)
+		conn.execute("PRAGMA journal_mode=WAL")
+		conn.execute("PRAGMA synchronous=NORMAL")
+		connections[path] = conn
+
+	conn = connections[path]
+	if (path, table) not in _connections.tables:
+		with conn:
+			for statement in _tableSchemas[table]:
+				conn.execute(statement)
+		_connections.tables.add((path, table))
+		if table == "orders":
+			_import_legacy_orders(conn)
+	return conn
+
+
+# -------------------------------------- Writing ---------------------------------------
+
+def store_candles(symbol, granularity, candles, path=None):
+	"""
+	Inserts or replaces candles in the store.
+
+	Parameters
+	----------
+	symbol : str
+		Symbol associated with the base currency of a trading pair.
+	granularity : int
+		Time span in seconds for each data point.
+	candles : iterable of list
+		Candles as [time, low, high, open, close, volume] in any order.
+	path : str
+		Path of the SQLite database file. Defaults to storePath.
+	"""
+
+	conn = get_store_connection(path)
+	with conn:
+		conn.executemany(
+			"INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+			((symbol, granularity, int(candle[0]), float(candle[1]), float(candle[2]), float(candle[3]),
+				float(candle[4]), float(candle[5])) for candle in candles))
+
+
+# -------------------------------------- Reading ---------------------------------------
+
+def get_last_candle_time(symbol, granularity, path=None):
+	"""
+	Returns the epoch time of the newest stored candle.
+
+	Parameters
+	----------
+	symbol : str
+		Symbol associated with the base currency of a trading pair.
+	granularity : int
+		Time span in seconds for each data point.
+	path : str
+		Path of the SQLite database file. Defaults to storePath.
+
+	Returns
+	-------
+	int or None
+		Epoch time in seconds, None if no candle is stored.
+	"""
+
+	row = get_store_connection(path).execute(
+		"SELECT MAX(time) FROM candles WHERE symbol = ? AND granularity = ?",
+		(symbol, granularity)).fetchone()
+	return row[0]
+
+
+def load_candles(symbol, granularity, start=None, end=None, limit=None, path=None):
+	"""
+	Returns stored candles in a time range as a 2-D array.
+
+	Parameters
+	----------
+	symbol : str
+		Symbol associated with the base currency of a trading pair.
+	granularity : int
+		Time span in seconds for each data point.
+	start : int
+		Inclusive epoch time of the first candle. Defaults to the oldest stored candle.
+	end : int
+		Inclusive epoch time of the last candle. Defaults to the newest stored candle.
+	limit : int
+		If given only the most recent limit candles of the range are returned.
+	path : str
+		Path of the SQLite database file. Defaults to storePath.
+
+	Returns
+	-------
+	numpy.ndarray
+		Array of shape (candles, 6) as [time, low, high, open, close, volume] in
+		chronological order.
+	"""
+
+	query = "SELECT time, low, high, open, close, volume FROM candles WHERE symbol = ? AND granularity = ?"
+	parameters = [symbol, granularity]
+	if start is not None:
+		query += " AND time >= ?"
+		parameters.append(int(start))
+	if end is not None:
+		query += " AND time <= ?"
+		parameters.append(int(end))
+	query += " ORDER BY time DESC"
+	if limit is not None:
+		query += " LIMIT ?"
+		parameters.append(int(limit))
+
+	rows = get_store_connection(path).execute(query, parameters).fetchall()
+	candles = np.array(rows, dtype=np.float64).reshape(-1, 6)
+	return np.ascontiguousarray(candles[::-1])
+
+
+# ----------------------------------- Order journal ------------------------------------
+
+def store_order(orderTime, symbol, side, price, path=None):
+	"""
+	Appends an order to the order journal.
+
+	Every order is committed in its own transaction to the write-ahead log, which SQLite 
+	flushes to the database file in batches.
+
+	Parameters
+	----------
+	orderTime : float
+		Epoch time of the order in seconds.
+	symbol : str
+		Alternative symbol associated with the base currency of a trading pair.
+	side : str
+		Either "buy" or "sell" for order side.
+	price : float
+		The cryptocurrency price of the order.
+	path : str
+		Path of the SQLite database file. Defaults to orderPath.
+	"""
+
+	conn = get_store_connection(path or orderPath, "orders")
+	with conn:
+		conn.execute("INSERT INTO orders VALUES (?, ?, ?, ?)", (float(orderTime), symbol, side, float(price)))
+
+
+def load_orders(start=None, end=None, symbol=None, path=None):
+	"""
+	Returns journaled orders in a time range.
+
+	Parameters
+	----------
+	start : float
+		Inclusive epoch time of the first order. Defaults to the oldest order.
+	end : float
+		Inclusive epoch time of the last order. Defaults to the newest order.
+	symbol : str
+		If given only orders of this symbol are returned.
+	path : str
+		Path of the SQLite database file. Defaults to orderPath.
+
+	Returns
+	-------
+	list of tuple
+		Orders as (time, symbol, side, price) in chronological order.
+	"""
+
+	query = "SELECT time, symbol, side, price FROM orders WHERE 1 = 1"
+	parameters = []
+	if symbol is not None:
+		query += " AND symbol = ?"
+		parameters.append(symbol)
+	if start is not None:
+		query += " AND time >= ?"
+		parameters.append(float(start))
+	if end is not None:
+		query += " AND time <= ?"
+		parameters.append(float(end))
+	query += " ORDER BY time"
+	return get_store_connection(path or orderPath, "orders").execute(query, parameters).fetchall()
+
+
+
+def _import_legacy_orders(conn):
+	"""
+	Imports the orders of orderCsvPath into a journal once, see get_store_connection.
+
+	Older versions appended every order as a row of [date, price, side] with the local 
+	date as "%m/%d - %H:%M:%S", without a year or symbol. Rows are in the order they were 
+	placed, so years are assigned walking back from the file's last modification: every 
+	row gets the latest year that puts it at or before the row after it, and the last row 
+	at or before the modification time. Orders are recorded under the altSymbol of 
+	configPath, the only pair older versions traded. Rows without a readable date, such 
+	as a header, are skipped. The file is left in place and the journal's user_version 
+	marks it as imported.
+	"""
+
+	conn.execute("BEGIN IMMEDIATE")
+	try:
+		if (conn.execute("PRAGMA user_version").fetchone()[0] == 0) and os.path.exists(orderCsvPath):
+			config = configparser.ConfigParser()
+			config.read(configPath)
+			symbol = config.get("settings", "altSymbol", fallback="")
+			orders = _read_order_csv(orderCsvPath)
+			conn.executemany("INSERT INTO orders VALUES (?, ?, ?, ?)",
+				((orderTime, symbol, side, price) for (orderTime, side, price) in orders))
+			print("Imported {} orders from {}".format(len(orders), orderCsvPath))
+		conn.execute("PRAGMA user_version = 1")
+		conn.commit()
+	except Exception:
+		conn.rollback()
+		raise
+
+
+def _read_order_csv(csvPath):
+	"""
+	Returns the orders of an order history CSV file as (time, side, price), see 
+	_import_legacy_orders.
+	"""
+
+	rows = []
+	with open(csvPath, newline="") as f:
+		for row in csv.reader(f):
+			try:
+				date = datetime.strptime("2000/" + row[0].strip(), "%Y/%m/%d - %H:%M:%S")
+				rows.append((date, row[2].strip(), float(row[1])))
+			except (ValueError, IndexError):
+				continue
+
+	# Leap year 2000 above lets February 29 parse, the year is replaced below
+	orders = []
+	limit = datetime.fromtimestamp(os.path.getmtime(csvPath))
+	for (date, side, price) in reversed(rows):
+		year = limit.year
+		while True:
+			try:
+				candidate = date.replace(year=year)
+			except ValueError:
+				year -= 1
+				continue
+			if candidate <= limit:
+				break
+			year -= 1
+		orders.append((candidate.timestamp(), side, price))
+		limit = candidate
+	return orders[::-1]
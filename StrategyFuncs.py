@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Module of the RSI, BB, stop-loss trading strategy and its state for one trading pair.
+
+The strategy only depends on rates and its own state, so any amount of trading pairs can
+be traded from one process by keeping one RsiBbStrategy per pair.
+
+Classes
+-------
+TradingPair(namedtuple)
+	Immutable market information and settings of one trading pair.
+IndicatorSnapshot(namedtuple)
+	Immutable indicator values shared by strategy, labels, and chart.
+TickSnapshot(namedtuple)
+	Immutable rates and strategy state published once per tick.
+RsiBbStrategy
+	Keeps the strategy state of one trading pair and implements the strategy.
+"""
+
+# Library imports
+import time
+import numpy as np
+from collections import namedtuple
+from colorama import Fore
+from colorama import Style
+from datetime import datetime
+
+# File imports
+from BacktestFuncs import *
+from Contact import *
+from HelperFuncs import *
+from IndicatorFuncs import *
+from KrakenFuncs import *
+from MetricsFuncs import increment_counter, timed
+from SearchFuncs import *
+
+
+# Immutable market information and settings of one trading pair
+TradingPair = namedtuple("TradingPair", ["name", "symbol", "altSymbol", "market", "altMarket", "timeSlice",
+	"stopLossPortion"])
+
+# Immutable indicator values computed once per candle data and parameter combination
+IndicatorSnapshot = namedtuple("IndicatorSnapshot", ["key", "rsiPeriodLength", "bbPeriodLength", "bbLevel",
+	"rsi", "bbUpper", "bbMiddle", "bbLower"])
+
+# Immutable state published by the data pipeline once per tick
+TickSnapshot = namedtuple("TickSnapshot", ["version", "pair", "time", "rates", "indicators", "rsiPeriodLength",
+	"rsiUpperBound", "rsiLowerBound", "bbPeriodLength", "bbLevel", "stopLossUpper", "stopLossLower"])
+
+
+class RsiBbStrategy:
+	"""
+	Keeps the strategy state of one trading pair and implements the strategy.
+
+	Methods
+	-------
+	__init__(self, pair, searchStrategy, searchBudget)
+		Sets initial parameters and the first analysis time.
+	init_stop_loss(self, rates)
+		Sets the initial stop-loss limit on the side of the larger balance.
+	run_strategy_rsi_bb(self, rates, indicators)
+		Implements a RSI, BB, StopLoss strategy.
+	get_snapshot(self, rates, indicators, version)
+		Returns an immutable copy of the current strategy state.
+	get_indicators(self, rates)
+		Returns the indicator snapshot of the rates and current parameters.
+	sync_indicator_states(self, ratesHl2)
+		Updates the streaming RSI and BB states with the newest rates.
+	is_analysis_due(self)
+		Returns True once per analysis period and schedules the next analysis.
+	analyze_rsi_bb(self, rates)
+		Analyzes market data and returns the most efficient variable combinations.
+	apply_analysis(self, topParameters)
+		Updates the strategy parameters with the most efficient variable combination.
+	"""
+
+	# Streaming indicator states and the latest indicator snapshot
+	chartLength = 150
+	rsiState = None
+	bbState = None
+	indicators = None
+
+	# Simulation settings of the analysis, also used by WalkForwardFuncs to test its choices
+	analysisPortion = 0.99
+	analysisHysteresis = 3.0
+	analysisTrailBbMiddle = False
+
+
+	def __init__(self, pair, searchStrategy="coarse_to_fine", searchBudget=None):
+		"""
+		Sets initial parameters and the first analysis time.
+
+		Parameters
+		----------
+		pair : TradingPair
+			Trading pair the strategy trades.
+		searchStrategy : str
+			Parameter search strategy of the analysis, see SearchFuncs.searchStrategies.
+		searchBudget : int
+			Maximum amount of parameter combinations simulated per analysis, "grid" simulates
+			every combination. Defaults to a tenth of the grid.
+		"""
+
+		self.pair = pair
+		self.searchStrategy = searchStrategy
+		self.searchBudget = searchBudget
+
+		self.inSellPeriod = False
+		self.inBuyPeriod = False
+		self.rsiPeriodLength = 6
+		self.rsiUpperBound = 70.0
+		self.rsiLowerBound = 30.0
+		self.bbPeriodLength = 34
+		self.bbLevel = 2.75
+		self.stopLossUpper = None
+		self.stopLossLower = None
+
+		if pair.timeSlice <= 5:
+			self.analyzeTime = ((int(time.strftime("%-M")) // 20) * 20) + 20
+			if self.analyzeTime == 60:
+				self.analyzeTime = self.analyzeTime - 60
+		elif pair.timeSlice == 15:
+			self.analyzeTime = time.strftime("%H")
+		else:
+			if int(time.strftime("%H")) < 6:
+				self.analyzeTime = 6
+			elif int(time.strftime("%H")) < 12:
+				self.analyzeTime = 12
+			elif int(time.strftime("%H")) < 18:
+				self.analyzeTime = 18
+			else:
+				self.analyzeTime = 0
+		print("{} analyze at hour {}".format(pair.name, self.analyzeTime))
+
+
+	def init_stop_loss(self, rates):
+		"""
+		Sets the initial stop-loss limit on the side of the larger balance.
+
+		Parameters
+		----------
+		rates : pandas.DataFrame
+			Rates of a cryptocurrency in chronological order.
+		"""
+
+		pair = self.pair
+		if float(kraken_get_balance(pair.altMarket)) > (float(kraken_get_balance(pair.altSymbol)) * rates["Close"].iloc[-1]):
+			self.stopLossUpper = rates["High"].iloc[-1] * (1.0 + (2 * pair.stopLossPortion))
+			self.stopLossLower = 0.0
+		else:
+			self.stopLossLower = rates["Low"].iloc[-1] * (1.0 - (2 * pair.stopLossPortion))
+			self.stopLossUpper = 0.0
+
+
+	def run_strategy_rsi_bb(self, rates, indicators):
+		"""
+		Implements a relative-strength-index, bollinger-bands, stop-loss strategy.
+
+		Parameters
+		----------
+		rates : pandas.DataFrame
+			Rates of a cryptocurrency in chronological order.
+		indicators : IndicatorSnapshot
+			Indicator values of the rates.
+		"""
+
+		pair = self.pair
+		stopLossPortion = pair.stopLossPortion
+		try:
+			if self.stopLossUpper is None:
+				self.init_stop_loss(rates)
+
+			# Get rsi values and bb bands
+			ratesRsi = indicators.rsi
+			bbUpper = indicators.bbUpper
+			bbLower = indicators.bbLower
+
+			# Determines sell, buy, or hold action for bot
+			if not self.inSellPeriod:
+				if (ratesRsi[-2] > self.rsiUpperBound) and (rates["High"].iloc[-2] > bbUpper[-2]):
+					send_msg(pair.name + " sell signal triggered")
+					print(Fore.GREEN + pair.name + " sell signal" + Style.RESET_ALL)
+					self.inSellPeriod = True
+			else:
+				if (ratesRsi[-1] <= (self.rsiUpperBound - 3)) and (rates["High"].iloc[-1] <= bbUpper[-1]):
+					if self.stopLossUpper == 0.0:
+						create_order(rates["Close"].iloc[-1], "sell", pair.altSymbol, pair.altMarket, pair.market)
+						self.stopLossUpper = rates["High"].iloc[-1] * (1.0 + stopLossPortion)
+					else:
+						print(Fore.RED + "***" + pair.name + " double-sell***" + Style.RESET_ALL)
+					self.inSellPeriod = False
+					self.stopLossLower = 0.0
+
+			if not self.inBuyPeriod:
+				if (ratesRsi[-2] < self.rsiLowerBound) and (rates["Low"].iloc[-2] < bbLower[-2]):
+					send_msg(pair.name + " buy signal triggered")
+					print(Fore.GREEN + pair.name + " buy signal" + Style.RESET_ALL)
+					self.inBuyPeriod = True
+			else:
+				if (ratesRsi[-1] >= (self.rsiLowerBound + 3)) and (rates["Low"].iloc[-1] >= bbLower[-1]):
+					if self.stopLossLower == 0.0:
+						create_order(rates["Close"].iloc[-1], "buy", pair.altSymbol, pair.altMarket, pair.market)
+						self.stopLossLower = rates["Low"].iloc[-1] * (1.0 - stopLossPortion)
+					else:
+						print(Fore.RED + "***" + pair.name + " double-buy***" + Style.RESET_ALL)
+					self.inBuyPeriod = False
+					self.stopLossUpper = 0.0
+
+			if self.stopLossLower > 0.0:
+				if (rates["Low"].iloc[-2] * (1.0 - stopLossPortion)) > self.stopLossLower:
+					self.stopLossLower = rates["Low"].iloc[-2] * (1.0 - stopLossPortion)
+				if rates["Low"].iloc[-1] < self.stopLossLower:
+					create_order(rates["Close"].iloc[-1], "sell", pair.altSymbol, pair.altMarket, pair.market)
+					self.stopLossUpper = rates["High"].iloc[-1] * (1.0 + stopLossPortion)
+					self.stopLossLower = 0.0
+
+			if self.stopLossUpper > 0.0:
+				if (rates["High"].iloc[-2] * (1.0 + stopLossPortion)) < self.stopLossUpper:
+					self.stopLossUpper = rates["High"].iloc[-2] * (1.0 + stopLossPortion)
+				if rates["High"].iloc[-1] > self.stopLossUpper:
+					create_order(rates["Close"].iloc[-1], "buy", pair.altSymbol, pair.altMarket, pair.market)
+					self.stopLossLower = rates["Low"].iloc[-1] * (1.0 - stopLossPortion)
+					self.stopLossUpper = 0.0
+
+		# Catches error in Strategy thread and prints to screen
+		except Exception as err:
+			increment_counter("errors.strategy")
+			send_msg(pair.name + " STRATEGY-ERROR\nCheck to see if bot is functioning")
+			print(Fore.RED + pair.name + " STRATEGY-ERROR." + Style.RESET_ALL)
+			print(err)
+
+
+	def get_snapshot(self, rates, indicators, version):
+		"""
+		Returns an immutable copy of the current strategy state.
+
+		Parameters
+		----------
+		rates : pandas.DataFrame
+			Rates of a cryptocurrency in chronological order.
+		indicators : IndicatorSnapshot
+			Indicator values of the rates.
+		version : int
+			Tick counter of the trading pair.
+
+		Returns
+		-------
+		TickSnapshot
+			Rates, indicators, strategy parameters, and stop-loss limits of this tick.
+		"""
+
+		return TickSnapshot(version, self.pair, time.time(), rates, indicators, indicators.rsiPeriodLength,
+			self.rsiUpperBound, self.rsiLowerBound, indicators.bbPeriodLength, indicators.bbLevel,
+			self.stopLossUpper, self.stopLossLower)
+
+
+	def get_indicators(self, rates):
+		"""
+		Returns the indicator snapshot of the rates and current parameters.
+
+		The snapshot is keyed by the newest candle and the indicator parameters, and is only
+		recomputed when one of them changed.
+
+		Parameters
+		----------
+		rates : pandas.DataFrame
+			Rates of a cryptocurrency in chronological order.
+
+		Returns
+		-------
+		IndicatorSnapshot
+			Indicator values ending with the newest candle.
+		"""
+
+		#ratesHl2 = pd.Series((rates["High"] + rates["Low"]).div(2).values, index=rates.index)
+		ratesHl2 = rates["Close"]
+		key = (rates.index[-1], float(ratesHl2.iloc[-1]), float(ratesHl2.iloc[-2]), self.rsiPeriodLength,
+			self.bbPeriodLength, self.bbLevel)
+		if (self.indicators is not None) and (self.indicators.key == key):
+			return self.indicators
+
+		self.sync_indicator_states(ratesHl2)
+		(bbUpper, bbMiddle, bbLower) = self.bbState.get_history()
+		self.indicators = IndicatorSnapshot(key, self.rsiState.periodLength, self.bbState.periodLength,
+			self.bbState.standardDevLevel, self.rsiState.get_history(), bbUpper, bbMiddle, bbLower)
+		return self.indicators
+
+
+	def sync_indicator_states(self, ratesHl2):
+		"""
+		Updates the streaming RSI and BB states with the newest rates.
+
+		States are rebuilt when a period length changed, otherwise only the newest candles
+		are applied.
+
+		Parameters
+		----------
+		ratesHl2 : pandas.Series
+			Rates of a cryptocurrency in chronological order.
+		"""
+
+		if (self.rsiState is None) or (self.rsiState.periodLength != self.rsiPeriodLength):
+			self.rsiState = RsiState(self.rsiPeriodLength, self.chartLength)
+		if (self.bbState is None) or (self.bbState.periodLength != self.bbPeriodLength):
+			self.bbState = BbState(self.bbPeriodLength, self.bbLevel, self.chartLength)
+		self.bbState.standardDevLevel = self.bbLevel
+		self.rsiState.sync(ratesHl2)
+		self.bbState.sync(ratesHl2)
+
+
+	def is_analysis_due(self):
+		"""
+		Returns True once per analysis period and schedules the next analysis.
+
+		Analyses run every 20 minutes for time-slices up to 5 minutes, every hour for 15
+		minutes, and every 6 hours otherwise.
+
+		Returns
+		-------
+		bool
+			True if an analysis should start now.
+		"""
+
+		if self.pair.timeSlice <= 5:
+			if int(time.strftime("%-M")) == self.analyzeTime:
+				self.analyzeTime += 20
+				if self.analyzeTime >= 60:
+					self.analyzeTime = self.analyzeTime - 60
+				return True
+
+		elif self.pair.timeSlice == 15:
+			if time.strftime("%H") != self.analyzeTime:
+				self.analyzeTime = time.strftime("%H")
+				return True
+
+		else:
+			if int(time.strftime("%H")) == self.analyzeTime:
+				if self.analyzeTime == 18:
+					self.analyzeTime = 0
+				else:
+					self.analyzeTime += 6
+				return True
+		return False
+
+
+	def analyze_rsi_bb(self, rates):
+		"""
+		Analyzes market data and returns the most efficient variable combinations.
+
+		Only reads the trading pair's settings, so analyses of several pairs can run in
+		worker threads while the strategies keep trading.
+
+		Parameters
+		----------
+		rates : pandas.DataFrame
+			Rates of a cryptocurrency in chronological order.
+
+		Returns
+		-------
+		list of list
+			Top parameter combinations sorted by ascending delta as [delta, rsiPeriodLength,
+			rsiUpperBound, rsiLowerBound, bbPeriodLength, bbLevel, inSellPeriod, inBuyPeriod].
+		"""
+
+		print(self.pair.name + " analyze started")
+
+		#ratesHl2Series = pd.Series((rates["High"] + rates["Low"]).div(2).values, index=rates.index)
+		ratesHl2Series = rates["Close"]
+
+		# Search the parameter combinations within the simulation budget
+		with timed("analysis.tables"):
+			grid = build_rsi_bb_grid(range(4, 13), range(80, 66, -2), range(20, 34, 2), 36,
+				[float(bbLevelDouble) / 4.0 for bbLevelDouble in range(6, 12)], [self.pair.stopLossPortion],
+				[self.analysisPortion])
+			rsiTable = get_rsi_table(ratesHl2Series, np.unique(grid["rsiPeriodLength"]))
+			(bbMiddleTable, bbStdTable) = get_bb_table(ratesHl2Series.values, np.unique(grid["bbPeriodLength"]))
+		with timed("analysis.search"):
+			(delta, actionGainLoss, thisInSellPeriod, thisInBuyPeriod, simulations, pruned) = search_rsi_bb(
+				ratesHl2Series.values, rates["High"].values, rates["Low"].values, rsiTable, bbMiddleTable,
+				bbStdTable, grid, strategy=self.searchStrategy, budget=self.searchBudget,
+				hysteresis=self.analysisHysteresis, trailBbMiddle=self.analysisTrailBbMiddle, pruneDelta=0.0)
+		print("{} simulated {:.0f} of {} combinations, pruned {}".format(self.pair.name, simulations, len(delta),
+			pruned))
+
+		# Top 3 parameter combinations for each rsiPeriodLength
+		topParameters = []
+		for i in get_top_parameter_indices(grid, delta, 3):
+			topParameters.append([float(delta[i]), int(grid["rsiPeriodLength"][i]), int(grid["rsiUpperBound"][i]),
+				int(grid["rsiLowerBound"][i]), int(grid["bbPeriodLength"][i]), float(grid["bbLevel"][i]),
+				bool(thisInSellPeriod[i]), bool(thisInBuyPeriod[i])])
+		topParameters.sort()
+		return topParameters
+
+
+	def apply_analysis(self, topParameters):
+		"""
+		Updates the strategy parameters with the most efficient variable combination.
+
+		Parameters
+		----------
+		topParameters : list of list
+			Top parameter combinations as returned by analyze_rsi_bb.
+		"""
+
+		# Print top parameter combinations if found
+		print("{} {}".format(self.pair.name, datetime.now().strftime("%m/%d - %H:%M:%S")))
+		if len(topParameters) > 0:
+			print("delta, rsiP, rsiU, rsiL, bbP, bbLvl, sellAcPer, BuyActPer")
+			for parameters in topParameters:
+				print(parameters)
+
+			# Updates parameters with new values
+			self.rsiPeriodLength = topParameters[-1][1]
+			self.rsiUpperBound = topParameters[-1][2]
+			self.rsiLowerBound = topParameters[-1][3]
+			self.bbPeriodLength = topParameters[-1][4]
+			self.bbLevel = topParameters[-1][5]
+			if self.inSellPeriod == False:
+				self.inSellPeriod = topParameters[-1][6]
+			if self.inBuyPeriod == False:
+				self.inBuyPeriod = topParameters[-1][7]
+
+			print("Parameters updated to:")
+			print(topParameters[-1])
+
+		else:
+			print(Fore.RED +
+				"No adequate parameters found for " + self.pair.name + ". Reattempting analysis next cycle." +
+				Style.RESET_ALL)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Module of functions that share the tick snapshots of a running bot with viewers.
+
+A headless bot serves the latest TickSnapshot of every trading pair as JSON over local
+HTTP, and a GUI attaches with a RemoteRunner that mirrors the snapshots of a
+MultiSymbolRunner, so it renders the same data without trading itself.
+
+Functions
+---------
+snapshot_to_dict(snapshot)
+	Returns a TickSnapshot as a JSON serializable dict.
+dict_to_snapshot(data)
+	Returns the TickSnapshot of a dict made by snapshot_to_dict.
+
+Classes
+-------
+SnapshotServer
+	Serves the snapshots of a runner over local HTTP.
+RemoteRunner
+	Mirrors the snapshots served by a SnapshotServer.
+"""
+
+# Library imports
+import json
+import threading
+import urllib.parse
+import uuid
+import numpy as np
+import pandas as pd
+from colorama import Fore
+from colorama import Style
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# File imports
+from ClientFuncs import send_request
+from StrategyFuncs import IndicatorSnapshot, TickSnapshot, TradingPair
+
+
+# ---------------------------------- Serialization -------------------------------------
+
+def snapshot_to_dict(snapshot):
+	"""
+	Returns a TickSnapshot as a JSON serializable dict.
+
+	Parameters
+	----------
+	snapshot : TickSnapshot
+		Snapshot published by a runner.
+
+	Returns
+	-------
+	dict
+		Snapshot fields with rates as {"index", "columns", "values"} and arrays as lists.
+		Dates are epoch seconds.
+	"""
+
+	data = snapshot._asdict()
+	data["pair"] = snapshot.pair._asdict()
+	data["rates"] = {"index": snapshot.rates.index.values.astype("datetime64[s]").astype(np.int64).tolist(),
+		"columns": snapshot.rates.columns.tolist(), "values": snapshot.rates.values.tolist()}
+	indicators = snapshot.indicators._asdict()
+	indicators["key"] = (int(pd.Timestamp(indicators["key"][0]).timestamp()),) + tuple(indicators["key"][1:])
+	for field in ("rsi", "bbUpper", "bbMiddle", "bbLower"):
+		indicators[field] = np.asarray(indicators[field]).tolist()
+	data["indicators"] = indicators
+	return data
+
+
+def dict_to_snapshot(data):
+	"""
+	Returns the TickSnapshot of a dict made by snapshot_to_dict.
+
+	Parameters
+	----------
+	data : dict
+		Decoded snapshot.
+
+	Returns
+	-------
+	TickSnapshot
+		Snapshot equal to the served one.
+	"""
+
+	data = dict(data)
+	data["pair"] = TradingPair(**data["pair"])
+	rates = data["rates"]
+	index = pd.DatetimeIndex(np.array(rates["index"], dtype=np.int64).astype("datetime64[s]"), name="Date")
+	data["rates"] = pd.DataFrame(rates["values"], index=index, columns=rates["columns"])
+	indicators = dict(data["indicators"])
+	indicators["key"] = (pd.Timestamp(indicators["key"][0], unit="s"),) + tuple(indicators["key"][1:])
+	for field in ("rsi", "bbUpper", "bbMiddle", "bbLower"):
+		indicators[field] = np.array(indicators[field], dtype=np.float64)
+	data["indicators"] = IndicatorSnapshot(**indicators)
+	return TickSnapshot(**data)
+
+
+# -------------------------------------- Server ----------------------------------------
+
+class SnapshotServer:
+	"""
+	Serves the snapshots of a runner over local HTTP.
+
+	GET /pairs returns the names of the trading pairs. GET /snapshot?pair=NAME&version=N&start=S
+	returns the newest snapshot of a pair, or 204 while it is not newer than version N of
+	the server start S. Versions count from 1 again when the bot restarts, so every
+	response carries the server's start id in the X-Start-Id header and a snapshot of an
+	older start is always replaced.
+
+	Attributes
+	----------
+	url : str
+		Address of the server.
+	startId : str
+		Random id of this server start.
+
+	Methods
+	-------
+	__init__(self, runner, port, host)
+		Starts the server in a background thread.
+	close(self)
+		Stops the server.
+	"""
+
+	def __init__(self, runner, port=0, host="127.0.0.1"):
+		"""
+		Starts the server in a background thread.
+
+		Parameters
+		----------
+		runner : MultiSymbolRunner
+			Runner whose snapshots are served.
+		port : int
+			Port to listen on, 0 picks a free port.
+		host : str
+			Interface to listen on, only the local machine by default.
+		"""
+
+		startId = self.startId = uuid.uuid4().hex
+
+		class Handler(BaseHTTPRequestHandler):
+			def do_GET(self):
+				url = urllib.parse.urlsplit(self.path)
+				query = dict(urllib.parse.parse_qsl(url.query))
+				if url.path == "/pairs":
+					self.send_json([pair.name for pair in runner.pairs])
+				elif url.path == "/snapshot":
+					snapshot = runner.snapshots.get(query.get("pair"))
+					if snapshot is None:
+						self.send_response(404)
+						self.end_headers()
+					elif (query.get("start") == startId) and (snapshot.version <= int(query.get("version", "0"))):
+						self.send_response(204)
+						self.send_header("X-Start-Id", startId)
+						self.end_headers()
+					else:
+						self.send_json(snapshot_to_dict(snapshot))
+				else:
+					self.send_response(404)
+					self.end_headers()
+
+			def send_json(self, data):
+				body = json.dumps(data, default=lambda value: value.item()).encode("utf-8")
+				self.send_response(200)
+				self.send_header("X-Start-Id", startId)
+				self.send_header("Content-Type", "application/json")
+				self.send_header("Content-Length", str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+
+			def log_message(self, format, *args):
+				pass
+
+		self.server = ThreadingHTTPServer((host, port), Handler)
+		self.server.daemon_threads = True
+		self.url = "http://{}:{}".format(host, self.server.server_address[1])
+		threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+	def close(self):
+		"""
+		Stops the server.
+		"""
+
+		self.server.shutdown()
+		self.server.server_close()
+
+
+# -------------------------------------- Viewer ----------------------------------------
+
+class RemoteRunner:
+	"""
+	Mirrors the snapshots served by a SnapshotServer.
+
+	Offers the start, stop, and snapshots of a MultiSymbolRunner, so a GUI can render a
+	headless bot's pairs instead of trading them itself.
+
+	Methods
+	-------
+	__init__(self, url, names, interval)
+		Prepares polling the server.
+	start(self)
+		Starts the polling thread.
+	stop(self)
+		Stops the polling thread.
+	run(self)
+		Requests newer snapshots every interval seconds until stopped.
+	"""
+
+	def __init__(self, url, names=None, interval=1.0):
+		"""
+		Prepares polling the server.
+
+		Parameters
+		----------
+		url : str
+			Address of the SnapshotServer.
+		names : list of str
+			Trading pairs to mirror. Defaults to every pair of the server.
+		interval : float
+			Seconds between two polls.
+		"""
+
+		self.url = url.rstrip("/")
+		self.names = names
+		self.interval = interval
+		self.snapshots = {}
+		self.startIds = {}
+		self.stopEvent = threading.Event()
+		self.thread = None
+
+
+	def start(self):
+		"""
+		Starts the polling thread.
+		"""
+
+		self.thread = threading.Thread(target=self.run, daemon=True)
+		self.thread.start()
+
+
+	def stop(self):
+		"""
+		Stops the polling thread.
+		"""
+
+		self.stopEvent.set()
+
+
+	def run(self):
+		"""
+		Requests newer snapshots every interval seconds until stopped.
+
+		Every snapshot is requested with the server start it came from, so after the bot
+		restarted the server sends its snapshots in full even if their versions are lower.
+		"""
+
+		while not self.stopEvent.is_set():
+			try:
+				if self.names is None:
+					self.names = send_request("GET", self.url, "/pairs").json()
+				for name in self.names:
+					snapshot = self.snapshots.get(name)
+					version = 0 if snapshot is None else snapshot.version
+					res = send_request("GET", self.url, "/snapshot", params={"pair": name, "version": version,
+						"start": self.startIds.get(name, "")})
+					if res.status_code == 200:
+						self.snapshots[name] = dict_to_snapshot(res.json())
+						self.startIds[name] = res.headers.get("X-Start-Id", "")
+
+			except Exception as err:
+				print(Fore.RED + "VIEWER-ERROR." + Style.RESET_ALL)
+				print(err)
+			self.stopEvent.wait(self.interval)
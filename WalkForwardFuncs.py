@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Script to measure how the bot's parameter analysis performs out-of-sample.
+
+The bot picks the parameters with the best delta on its most recent candles and trades
+them until the next analysis. A walk-forward test repeats this across a long history:
+every window optimizes on optimizeLength candles exactly like RsiBbStrategy.analyze_rsi_bb
+and then trades the chosen parameters on the following testLength candles it has not
+seen. Windows are independent, so they run in parallel worker processes.
+
+Every test window starts with 100USD and 100USD worth of crypto, no open sell or buy
+period, and a disarmed stop-loss, so it measures the parameters instead of the state the
+live bot carries over between analyses.
+
+Functions
+---------
+walk_forward_rsi_bb(symbol, timeSlice, days, rates, optimizeLength, testLength, stopLossPortion, searchStrategy, searchBudget, workers, verbose)
+	Rolls optimize and test windows across a history and reports out-of-sample results.
+summarize_walk_forward(windows)
+	Returns the out-of-sample performance of the selection rule over all windows.
+"""
+
+# Library imports
+import contextlib
+import io
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+# File imports
+from AnalyzeFuncs import get_analysis_rates
+from BacktestFuncs import backtest_rsi_bb, get_rsi_table
+from IndicatorFuncs import get_bb_table
+from StrategyFuncs import RsiBbStrategy, TradingPair
+
+
+# ------------------------------------ Walk forward ---------------------------------------
+
+def walk_forward_rsi_bb(symbol, timeSlice=60, days=365, rates=None, optimizeLength=250, testLength=None,
+		stopLossPortion=0.02, searchStrategy="coarse_to_fine", searchBudget=None, workers=None, verbose=False):
+	"""
+	Rolls optimize and test windows across a history and reports out-of-sample results.
+
+	Parameters
+	----------
+	symbol : str
+		Symbol associated with the base currency of a trading pair.
+	timeSlice : int
+		Time span in minutes for each data point. Must be 1, 5, 15, or 60.
+	days : float
+		Amount of days of history, see AnalyzeFuncs.get_analysis_rates.
+	rates : pandas.DataFrame
+		If given, these rates are tested instead of requesting them.
+	optimizeLength : int
+		Amount of candles every analysis optimizes on. The bot analyzes its last 250.
+	testLength : int
+		Amount of candles the chosen parameters trade before the next window. Defaults
+		to the candles between two analyses of the bot, 6 hours for hourly candles.
+	stopLossPortion : float
+		Percentage of current price to set stop loss limit as decimal.
+	searchStrategy : str
+		Parameter search strategy of the analyses, see SearchFuncs.searchStrategies.
+	searchBudget : int
+		Maximum amount of parameter combinations simulated per analysis, "grid" simulates
+		every combination. Defaults to a tenth of the grid.
+	workers : int
+		Amount of worker processes. Defaults to the amount of CPUs. If 1 the windows run
+		in the calling process.
+	verbose : bool
+		If True the windows and their summary are printed.
+
+	Returns
+	-------
+	pandas.DataFrame
+		One row per window with ["optimizeStart", "testStart", "testEnd",
+		"rsiPeriodLength", "rsiUpperBound", "rsiLowerBound", "bbPeriodLength", "bbLevel",
+		"inSampleDelta", "outSampleDelta", "outSampleGainLoss", "holdGainLoss",
+		"candidatesDelta"], where candidatesDelta is the mean out-of-sample delta of all
+		top combinations the rule chose from. Windows without parameters hold NaN. The
+		summary of summarize_walk_forward is kept in attrs["summary"].
+	"""
+
+	if rates is None:
+		rates = get_analysis_rates(symbol, timeSlice, days)
+	if testLength is None:
+		analysisMinutes = 20 if timeSlice <= 5 else (60 if timeSlice == 15 else 360)
+		testLength = max(1, analysisMinutes // timeSlice)
+	if workers is None:
+		workers = os.cpu_count() or 1
+
+	pair = TradingPair(symbol + "-WF", symbol, None, None, None, timeSlice, stopLossPortion)
+	tasks = [(pair, searchStrategy, searchBudget, rates.iloc[start:start + optimizeLength + testLength],
+		optimizeLength) for start in range(0, len(rates) - optimizeLength - testLength + 1, testLength)]
+
+	if workers == 1:
+		results = [_walk_forward_window(task) for task in tasks]
+	else:
+		with ProcessPoolExecutor(max_workers=workers) as executor:
+			results = list(executor.map(_walk_forward_window, tasks,
+				chunksize=max(1, len(tasks) // (workers * 4))))
+
+	windows = pd.DataFrame(results, columns=["optimizeStart", "testStart", "testEnd", "rsiPeriodLength",
+		"rsiUpperBound", "rsiLowerBound", "bbPeriodLength", "bbLevel", "inSampleDelta", "outSampleDelta",
+		"outSampleGainLoss", "holdGainLoss", "candidatesDelta"])
+	windows.attrs["summary"] = summarize_walk_forward(windows)
+	if not verbose:
+		return windows
+
+	print(symbol + " timeSlice: " + str(timeSlice) + ", optimize: " + str(optimizeLength) + ", test: " +
+		str(testLength))
+	print(windows.to_string())
+	for (name, value) in windows.attrs["summary"].items():
+		print("{}: {}".format(name, value))
+	return windows
+
+
+def _walk_forward_window(task):
+	"""
+	Optimizes and tests one window, see walk_forward_rsi_bb.
+	"""
+
+	(pair, searchStrategy, searchBudget, rates, optimizeLength) = task
+	dates = rates.index
+	result = [dates[0], dates[optimizeLength], dates[-1]]
+
+	# Choose parameters the way the bot does, its progress messages are not needed here
+	with contextlib.redirect_stdout(io.StringIO()):
+		strategy = RsiBbStrategy(pair, searchStrategy, searchBudget)
+		topParameters = strategy.analyze_rsi_bb(rates.iloc[:optimizeLength])
+	if len(topParameters) == 0:
+		return result + [np.nan] * 10
+
+	# Trade every candidate on the unseen candles, indicators are warmed up on the whole window
+	candidates = np.array([parameters[1:6] for parameters in topParameters], dtype=np.float64)
+	grid = {
+		"rsiPeriodLength": candidates[:, 0].astype(np.int64),
+		"rsiUpperBound": candidates[:, 1],
+		"rsiLowerBound": candidates[:, 2],
+		"bbPeriodLength": candidates[:, 3].astype(np.int64),
+		"bbLevel": candidates[:, 4],
+		"stopLossPortion": np.full(len(candidates), pair.stopLossPortion),
+		"portion": np.full(len(candidates), strategy.analysisPortion)}
+	price = rates["Close"]
+	rsiTable = get_rsi_table(price, np.unique(grid["rsiPeriodLength"]))
+	(bbMiddleTable, bbStdTable) = get_bb_table(price.values, np.unique(grid["bbPeriodLength"]))
+	(delta, actionGainLoss, inSellPeriod, inBuyPeriod) = backtest_rsi_bb(price.values, rates["High"].values,
+		rates["Low"].values, rsiTable, bbMiddleTable, bbStdTable, grid, hysteresis=strategy.analysisHysteresis,
+		trailBbMiddle=strategy.analysisTrailBbMiddle, firstCandle=optimizeLength)
+
+	# The rule trades the combination with the best in-sample delta, the last one
+	return result + list(topParameters[-1][1:6]) + [topParameters[-1][0], float(delta[-1]),
+		float(actionGainLoss[-1]), float(actionGainLoss[-1] - delta[-1]), float(np.mean(delta))]
+
+
+def summarize_walk_forward(windows):
+	"""
+	Returns the out-of-sample performance of the selection rule over all windows.
+
+	Parameters
+	----------
+	windows : pandas.DataFrame
+		Windows as returned by walk_forward_rsi_bb.
+
+	Returns
+	-------
+	dict of {str : float}
+		"windows" and "tested" windows, mean "inSampleDelta" and "outSampleDelta", their
+		ratio as "efficiency", the share of "positiveWindows" with an out-of-sample delta
+		above 0.0, "strategyGainLoss" and "holdGainLoss" compounded over the test windows,
+		and "ruleAdvantage", the mean out-of-sample delta of the chosen combination above
+		the mean of all combinations it was chosen from.
+	"""
+
+	# Windows without trades end with a delta of 0.0 up to rounding
+	tested = windows.dropna(subset=["outSampleDelta"])
+	inSampleDelta = float(tested["inSampleDelta"].mean()) if len(tested) else np.nan
+	outSampleDelta = float(tested["outSampleDelta"].mean()) if len(tested) else np.nan
+	return {
+		"windows": len(windows),
+		"tested": len(tested),
+		"inSampleDelta": inSampleDelta,
+		"outSampleDelta": outSampleDelta,
+		"efficiency": outSampleDelta / inSampleDelta if inSampleDelta else np.nan,
+		"positiveWindows": float((tested["outSampleDelta"] > 1e-12).mean()) if len(tested) else np.nan,
+		"strategyGainLoss": float(np.prod(1.0 + tested["outSampleGainLoss"].values) - 1.0),
+		"holdGainLoss": float(np.prod(1.0 + tested["holdGainLoss"].values) - 1.0),
+		"ruleAdvantage": float((tested["outSampleDelta"] - tested["candidatesDelta"]).mean()) if len(tested)
+			else np.nan}
+
+
+if __name__ == "__main__":
+	walk_forward_rsi_bb("BTC", 60, days=365, verbose=True)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Shared fixtures of the test suite.
+
+The bot's modules live in the repository root and are imported by name, and the tests
+never touch the network, exchange accounts, or the real database files.
+"""
+
+# Library imports
+import os
+import sys
+import types
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def fake_credentials(monkeypatch):
+	"""
+	Provides a stand-in auth_cred module with placeholder credentials.
+	"""
+
+	credentials = types.ModuleType("auth_cred")
+	credentials.kraken_api_key = "key"
+	credentials.kraken_api_secret = "c2VjcmV0"
+	credentials.gmail_account = "bot@localhost"
+	credentials.gmail_password = "password"
+	credentials.phone_number = "user@localhost"
+	monkeypatch.setitem(sys.modules, "auth_cred", credentials)
+	return credentials
+
+
+@pytest.fixture
+def store_paths(tmp_path, monkeypatch):
+	"""
+	Points the candle store, the order journal, and the files it imports from at a 
+	temporary directory.
+	"""
+
+	import StoreFuncs
+	monkeypatch.setattr(StoreFuncs, "storePath", str(tmp_path / "candles.db"))
+	monkeypatch.setattr(StoreFuncs, "orderPath", str(tmp_path / "order_history.db"))
+	monkeypatch.setattr(StoreFuncs, "orderCsvPath", str(tmp_path / "order_history.csv"))
+	monkeypatch.setattr(StoreFuncs, "configPath", str(tmp_path / "config.ini"))
+	return tmp_path
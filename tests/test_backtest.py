@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Tests of the vectorized backtest kernel and its pruning against the sequential loop the
+sweep replaced.
+"""
+
+# Library imports
+import numpy as np
+import pytest
+
+# File imports
+from BacktestFuncs import (backtest_rsi_bb, build_rsi_bb_grid, get_rsi_table, get_top_parameter_indices,
+	traceSides)
+from BenchmarkFuncs import generate_rates
+
+
+def reference_delta(price, high, low, rsi, bbMiddle, bbStd, rsiUpperBound, rsiLowerBound, bbPeriodLength,
+		bbLevel, stopLossPortion, portion, hysteresis=0.0, trailBbMiddle=True):
+	"""
+	Returns the delta of one parameter combination stepped one candle at a time, as the
+	original analyze_rsi_bb loop did, with the exit hysteresis and stop-loss trailing of
+	the live strategy.
+	"""
+
+	first = bbPeriodLength - 1
+	usd = 100.0
+	crypto = 100.0 / price[first]
+	if trailBbMiddle:
+		stopLossUpper = bbMiddle[first] * (1.0 + stopLossPortion)
+		stopLossLower = bbMiddle[first] * (1.0 - stopLossPortion)
+	else:
+		(stopLossUpper, stopLossLower) = (0.0, 0.0)
+	inSellPeriod = False
+	inBuyPeriod = False
+
+	for i in range(first, len(price)):
+		bbUpper = bbMiddle[i] + (bbStd[i] * bbLevel)
+		bbLower = bbMiddle[i] - (bbStd[i] * bbLevel)
+		stopHigh = max(bbMiddle[i], high[i]) if trailBbMiddle else high[i]
+		stopLow = min(bbMiddle[i], low[i]) if trailBbMiddle else low[i]
+		if not inSellPeriod:
+			if (rsi[i] > rsiUpperBound) and (high[i] > bbUpper):
+				inSellPeriod = True
+		elif (rsi[i] <= rsiUpperBound - hysteresis) and (high[i] <= bbUpper):
+			usd = usd + (crypto * price[i] * .995 * portion)
+			crypto = crypto * (1.0 - portion)
+			if stopLossUpper == 0.0:
+				stopLossUpper = stopHigh * (1.0 + stopLossPortion)
+			stopLossLower = 0.0
+			inSellPeriod = False
+
+		if not inBuyPeriod:
+			if (rsi[i] < rsiLowerBound) and (low[i] < bbLower):
+				inBuyPeriod = True
+		elif (rsi[i] >= rsiLowerBound + hysteresis) and (low[i] >= bbLower):
+			crypto = crypto + (usd * .995 * portion / price[i])
+			usd = usd * (1.0 - portion)
+			if stopLossLower == 0.0:
+				stopLossLower = stopLow * (1.0 - stopLossPortion)
+			stopLossUpper = 0.0
+			inBuyPeriod = False
+
+		if stopLossLower > 0.0:
+			stopLossLower = max(stopLossLower, stopLow * (1.0 - stopLossPortion))
+			if low[i] < stopLossLower:
+				usd = usd + (crypto * price[i] * .995 * portion)
+				crypto = crypto * (1.0 - portion)
+				stopLossUpper = stopHigh * (1.0 + stopLossPortion)
+				stopLossLower = 0.0
+
+		if stopLossUpper > 0.0:
+			stopLossUpper = min(stopLossUpper, stopHigh * (1.0 + stopLossPortion))
+			if high[i] > stopLossUpper:
+				crypto = crypto + (usd * .995 * portion / price[i])
+				usd = usd * (1.0 - portion)
+				stopLossLower = stopLow * (1.0 - stopLossPortion)
+				stopLossUpper = 0.0
+
+	actionGainLoss = (usd + (crypto * price[-1]) - 200.0) / 200.0
+	noActionGainLoss = (price[-1] - price[first]) / (2 * price[first])
+	return actionGainLoss - noActionGainLoss
+
+
+@pytest.fixture(scope="module", params=[("volatile", 0.0, True), ("mixed", 0.0, True), ("volatile", 3.0, False),
+	("mixed", 3.0, False)], ids=["volatile-default", "mixed-default", "volatile-live", "mixed-live"])
+def sweep(request):
+	"""
+	Returns synthetic rates, their tables, a small grid, the kernel options, and the reference
+	delta of every row. The live options are those of RsiBbStrategy.analyze_rsi_bb.
+	"""
+
+	(regime, hysteresis, trailBbMiddle) = request.param
+	options = {"hysteresis": hysteresis, "trailBbMiddle": trailBbMiddle}
+	rates = generate_rates(400, regime, 3)
+	hl2 = (rates["High"] + rates["Low"]).div(2)
+	grid = build_rsi_bb_grid(range(3, 9, 2), range(80, 66, -4), range(20, 34, 4), 20, [1.0, 1.5, 2.0], [0.02],
+		[0.99])
+	bbPeriodLengths = np.arange(int(grid["bbPeriodLength"].max()) + 1)
+	bbMiddleTable = np.full((len(bbPeriodLengths), len(hl2)), np.nan)
+	bbStdTable = np.full((len(bbPeriodLengths), len(hl2)), np.nan)
+	for periodLength in np.unique(grid["bbPeriodLength"]):
+		bbMiddleTable[periodLength] = hl2.rolling(periodLength).mean().values
+		bbStdTable[periodLength] = hl2.rolling(periodLength).std().values
+	tables = (hl2.values, rates["High"].values, rates["Low"].values,
+		get_rsi_table(hl2, np.unique(grid["rsiPeriodLength"])), bbMiddleTable, bbStdTable)
+
+	expected = np.array([reference_delta(*tables[:3], tables[3][grid["rsiPeriodLength"][row]],
+		bbMiddleTable[grid["bbPeriodLength"][row]], bbStdTable[grid["bbPeriodLength"][row]],
+		grid["rsiUpperBound"][row], grid["rsiLowerBound"][row], grid["bbPeriodLength"][row], grid["bbLevel"][row],
+		grid["stopLossPortion"][row], grid["portion"][row], **options) for row in range(len(grid["rsiPeriodLength"]))])
+	return (tables, grid, options, expected)
+
+
+def test_kernel_matches_the_sequential_loop(sweep):
+	(tables, grid, options, expected) = sweep
+	delta = backtest_rsi_bb(*tables, grid, blockSize=50, **options)[0]
+	assert np.allclose(delta, expected, rtol=0.0, atol=1e-9)
+
+
+def test_pruning_only_drops_rows_below_the_threshold(sweep):
+	(tables, grid, options, expected) = sweep
+	for pruneDelta in (0.0, 0.02):
+		delta = backtest_rsi_bb(*tables, grid, pruneDelta=pruneDelta, pruneInterval=4, **options)[0]
+		pruned = np.isnan(delta)
+		assert pruned.any()
+		assert (expected[pruned] < pruneDelta).all()
+		assert np.allclose(delta[~pruned], expected[~pruned], rtol=0.0, atol=1e-9)
+
+
+def test_pruning_keeps_the_top_parameters(sweep):
+	(tables, grid, options, expected) = sweep
+	delta = backtest_rsi_bb(*tables, grid, **options)[0]
+	prunedDelta = backtest_rsi_bb(*tables, grid, pruneDelta=0.0, pruneInterval=4, **options)[0]
+	assert get_top_parameter_indices(grid, prunedDelta) == get_top_parameter_indices(grid, delta)
+	assert get_top_parameter_indices(grid, delta) == get_top_parameter_indices(grid, expected)
+
+
+def test_trace_rebuilds_the_results(sweep):
+	(tables, grid, options, expected) = sweep
+	(delta, actionGainLoss, inSellPeriod, inBuyPeriod, trades) = backtest_rsi_bb(*tables, grid, blockSize=50,
+		trace=True, **options)
+	assert np.array_equal(delta, backtest_rsi_bb(*tables, grid, **options)[0])
+	assert np.all(np.diff(trades["index"]) >= 0)
+	assert set(np.unique(trades["side"])) <= set(range(1, len(traceSides)))
+
+	price = tables[0]
+	for row in range(len(delta)):
+		rowTrades = np.flatnonzero(trades["row"] == row)
+		start = grid["bbPeriodLength"][row] - 1
+		(usd, crypto) = (100.0, 100.0 / price[start])
+		portion = grid["portion"][row]
+		for (index, side, tradePrice) in zip(trades["index"][rowTrades], trades["side"][rowTrades],
+				trades["price"][rowTrades]):
+			assert tradePrice == price[index]
+			if side in (1, 3):
+				(usd, crypto) = (usd + (crypto * tradePrice * .995 * portion), crypto * (1.0 - portion))
+			else:
+				(usd, crypto) = (usd * (1.0 - portion), crypto + (usd * .995 * portion / tradePrice))
+		if len(rowTrades):
+			assert np.allclose((trades["usd"][rowTrades[-1]], trades["crypto"][rowTrades[-1]]), (usd, crypto),
+				rtol=1e-12, atol=0.0)
+		rowGainLoss = (usd + (crypto * price[-1]) - 200.0) / 200.0
+		assert rowGainLoss == pytest.approx(actionGainLoss[row], rel=0.0, abs=1e-12)
+		assert rowGainLoss - ((price[-1] - price[start]) / (2 * price[start])) == pytest.approx(delta[row], rel=0.0,
+			abs=1e-12)
+
+
+def test_trace_of_a_hand_checked_series():
+	# Bands are 9 to 11 on every candle, stop-losses start disarmed and trail the high or low
+	price = np.array([10.0, 10.0, 10.4, 10.0, 11.0, 9.2, 9.6, 8.5])
+	high = np.array([10.5, 11.5, 10.5, 10.5, 12.0, 10.5, 10.5, 10.5])
+	low = np.array([9.5, 9.5, 9.5, 9.5, 9.5, 8.8, 9.5, 8.0])
+	rsiTable = np.array([np.full(8, np.nan), [50.0, 80.0, 60.0, 50.0, 50.0, 20.0, 40.0, 50.0]])
+	(bbMiddleTable, bbStdTable) = (np.full((2, 8), 10.0), np.ones((2, 8)))
+	grid = build_rsi_bb_grid([1], [70], [30], 2, [1.0], [0.1], [0.5])
+	(delta, actionGainLoss, inSellPeriod, inBuyPeriod, trades) = backtest_rsi_bb(price, high, low, rsiTable,
+		bbMiddleTable, bbStdTable, grid, trailBbMiddle=False, trace=True)
+
+	# Sell period closes on 2 and arms the upper stop at 10.5 * 1.1, the high of 12.0 hits it on 4.
+	# That arms the lower stop at 9.5 * 0.9, the buy period closes on 6, and the low of 8.0 hits it on 7.
+	assert trades["index"].tolist() == [2, 4, 6, 7]
+	assert [traceSides[side] for side in trades["side"]] == ["SELL", "SL-BUY", "BUY", "SL-SELL"]
+	assert trades["price"].tolist() == [10.4, 11.0, 9.6, 8.5]
+	assert trades["row"].tolist() == [0, 0, 0, 0]
+	(usd, crypto) = (100.0 + (10.0 * 10.4 * .995 * 0.5), 5.0)
+	assert (trades["usd"][0], trades["crypto"][0]) == pytest.approx((usd, crypto))
+	(usd, crypto) = (usd * 0.5, crypto + (usd * .995 * 0.5 / 11.0))
+	assert (trades["usd"][1], trades["crypto"][1]) == pytest.approx((usd, crypto))
+	(usd, crypto) = (usd * 0.5, crypto + (usd * .995 * 0.5 / 9.6))
+	assert (trades["usd"][2], trades["crypto"][2]) == pytest.approx((usd, crypto))
+	(usd, crypto) = (usd + (crypto * 8.5 * .995 * 0.5), crypto * 0.5)
+	assert (trades["usd"][3], trades["crypto"][3]) == pytest.approx((usd, crypto))
+	assert actionGainLoss[0] == pytest.approx((usd + (crypto * 8.5) - 200.0) / 200.0)
+	assert delta[0] == pytest.approx(actionGainLoss[0] - ((8.5 - 10.0) / 20.0))
+	assert not inSellPeriod[0] and not inBuyPeriod[0]
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests of the candle ring buffer against a plain list of candles.
+"""
+
+# Library imports
+import numpy as np
+import pytest
+
+# File imports
+from CandleFuncs import CandleBuffer, rateColumns
+
+
+def model_extend(model, candles, capacity):
+	"""
+	Adds candles to a list the way the buffer should and keeps the newest capacity of them.
+	"""
+
+	for candle in candles:
+		candle = [float(value) for value in candle]
+		if model and (candle[0] < model[-1][0]):
+			continue
+		if model and (candle[0] == model[-1][0]):
+			model.pop()
+		model.append(candle)
+	del model[:-capacity]
+
+
+def assert_same(buffer, model):
+	expected = np.array(model, dtype=np.float64).reshape(-1, 6)
+	assert len(buffer) == len(model)
+	assert np.array_equal(buffer.get_candles(), expected)
+	assert np.array_equal(buffer["Time"], expected[:, 0].astype(np.int64))
+	for (index, column) in enumerate(rateColumns):
+		assert np.array_equal(buffer[column], expected[:, index + 1])
+		assert np.array_equal(buffer.get_series(column).values, expected[:, index + 1])
+	assert np.array_equal(buffer.get_frame().values, expected[:, 1:])
+	assert np.array_equal(buffer.to_rates().values, expected[:, 1:])
+	assert np.array_equal(buffer.to_rates().index.values.astype("datetime64[s]").astype(np.int64),
+		expected[:, 0].astype(np.int64))
+	if len(model):
+		assert buffer.get_time(-1) == model[-1][0]
+		assert buffer.get_time(0) == model[0][0]
+		assert np.array_equal(buffer.get_candle(-len(model)), expected[0])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_buffer_matches_a_list_through_many_wraps(seed):
+	rng = np.random.default_rng(seed)
+	capacity = 7
+	buffer = CandleBuffer(capacity)
+	model = []
+	candleTime = 0
+	for _ in range(300):
+		operation = rng.integers(4)
+		if operation == 0:
+			# New, repeated, or older candle
+			candleTime += int(rng.integers(-1, 2)) * 60
+			candle = [candleTime] + rng.random(5).tolist()
+			buffer.append(candle)
+			model_extend(model, [candle], capacity)
+		elif operation == 1:
+			# Batch starting before, at, or after the newest candle
+			times = candleTime + 60 * (np.arange(int(rng.integers(0, 2 * capacity))) + int(rng.integers(-2, 2)))
+			candles = np.column_stack((times, rng.random((len(times), 5))))
+			if len(times):
+				candleTime = max(candleTime, int(times[-1]))
+			buffer.extend(candles)
+			model_extend(model, candles, capacity)
+		elif (operation == 2) and model:
+			(price, size) = rng.random(2)
+			buffer.update(price, size)
+			candle = model[-1]
+			(candle[1], candle[2], candle[4], candle[5]) = (min(candle[1], price), max(candle[2], price),
+				price, candle[5] + size)
+		elif operation == 3:
+			assert_same(buffer, model)
+	assert_same(buffer, model)
+
+
+def test_seeding_keeps_the_newest_candles():
+	candles = np.column_stack((np.arange(20) * 60, np.arange(100).reshape(20, 5)))
+	buffer = CandleBuffer(8, candles)
+	assert np.array_equal(buffer.get_candles(), candles[-8:])
+	with pytest.raises(IndexError):
+		buffer.get_candle(8)
+	with pytest.raises(IndexError):
+		buffer.get_time(-9)
+
+
+def test_views_are_read_only():
+	buffer = CandleBuffer(4, [[60, 1.0, 2.0, 1.5, 1.5, 3.0]])
+	with pytest.raises(ValueError):
+		buffer["Close"][0] = 5.0
+	with pytest.raises(ValueError):
+		buffer.get_frame().values[0, 0] = 5.0
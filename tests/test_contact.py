@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests of the batching notification worker against the local SMTP stand-in.
+"""
+
+# Library imports
+import smtplib
+import time
+import pytest
+
+# File imports
+import Contact
+
+
+@pytest.fixture
+def smtp_server(monkeypatch, fake_credentials):
+	server = Contact.LocalSmtpServer()
+	monkeypatch.setattr(Contact, "smtpHost", "127.0.0.1")
+	monkeypatch.setattr(Contact, "smtpPort", server.port)
+	monkeypatch.setattr(Contact, "smtpUseTls", False)
+	monkeypatch.setattr(Contact, "coalesceDelay", 0.3)
+	yield server
+	assert Contact.flush_messages(timeout=5.0)
+	if Contact._worker["server"] is not None:
+		Contact._worker["server"].close()
+		Contact._worker["server"] = None
+	server.close()
+
+
+def wait_for(condition, timeout=5.0):
+	deadline = time.monotonic() + timeout
+	while not condition():
+		assert time.monotonic() < deadline, "timed out"
+		time.sleep(0.01)
+
+
+def test_burst_is_sent_as_one_message(smtp_server):
+	for number in range(5):
+		Contact.send_msg("alert " + str(number))
+	assert Contact.flush_messages(timeout=5.0)
+	assert len(smtp_server.messages) == 1
+	assert smtp_server.messages[0].splitlines() == ["alert " + str(number) for number in range(5)]
+
+
+def test_send_msg_returns_without_waiting_for_smtp(smtp_server):
+	start = time.monotonic()
+	for number in range(20):
+		Contact.send_msg("alert " + str(number))
+	elapsed = time.monotonic() - start
+	assert len(smtp_server.messages) == 0
+	assert elapsed < Contact.coalesceDelay / 3
+	assert Contact.flush_messages(timeout=5.0)
+	assert len(smtp_server.messages) == 1
+
+
+def test_worker_reconnects_after_the_server_drops(smtp_server):
+	Contact.send_msg("before")
+	assert Contact.flush_messages(timeout=5.0)
+	wait_for(lambda: len(smtp_server.connections) == 1)
+	smtp_server.drop_connections()
+	wait_for(lambda: len(smtp_server.connections) == 0)
+
+	Contact.send_msg("after")
+	assert Contact.flush_messages(timeout=5.0)
+	assert smtp_server.messages == ["before", "after"]
+
+
+def test_failed_handshakes_close_their_connections(smtp_server, monkeypatch):
+	# Sessions are kept alive here so garbage collection cannot close them instead
+	sessions = []
+	class RecordingSmtp(smtplib.SMTP):
+		def __init__(self, *args, **kwargs):
+			super().__init__(*args, **kwargs)
+			sessions.append(self)
+	monkeypatch.setattr(Contact.smtplib, "SMTP", RecordingSmtp)
+
+	# The stand-in does not offer STARTTLS, so both attempts fail after connecting
+	monkeypatch.setattr(Contact, "smtpUseTls", True)
+	Contact.send_msg("lost")
+	assert Contact.flush_messages(timeout=5.0)
+	assert len(sessions) == 2
+	assert all(session.sock is None for session in sessions)
+	wait_for(lambda: len(smtp_server.connections) == 0)
+	assert Contact._worker["server"] is None
+	assert smtp_server.messages == []
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests of the streaming feed against the local replay server.
+"""
+
+# Library imports
+import threading
+import numpy as np
+import pytest
+
+# File imports
+import FeedFuncs
+from BenchmarkFuncs import generate_candles
+from StoreFuncs import load_candles
+
+
+def replay(messages, products):
+	"""
+	Replays messages to a feed and returns it and the server once every message was handled.
+	"""
+
+	handled = threading.Event()
+	server = FeedFuncs.LocalFeedServer(messages + [{"type": "heartbeat", "product_id": "SYN-USD"}])
+	feed = FeedFuncs.MarketFeed(products, server.url, seed=False)
+	original = feed.handle_message
+
+	def handle_message(message):
+		original(message)
+		if message.get("type") == "heartbeat":
+			handled.set()
+
+	feed.handle_message = handle_message
+	feed.start()
+	try:
+		assert handled.wait(10.0)
+	finally:
+		feed.stop()
+		feed.thread.join(5.0)
+		server.close()
+	return (feed, server)
+
+
+def test_replayed_candles_round_trip(store_paths):
+	candles = generate_candles(60, "volatile", 2, timeSlice=5)
+	(feed, server) = replay(FeedFuncs.rates_to_matches(candles, "SYN", 5), [("SYN", 5), ("SYN", 1)])
+
+	rebuilt = feed.aggregators["SYN"][5].candles.get_candles()
+	assert np.array_equal(rebuilt[:, :5], candles[:, :5])
+	assert np.allclose(rebuilt[:, 5], candles[:, 5], rtol=1e-12, atol=0.0)
+
+	# Closed candles are stored, the newest one is still open
+	stored = load_candles("SYN", 300, path=str(store_paths / "candles.db"))
+	assert np.array_equal(stored[:, :5], candles[:-1, :5])
+	assert len(feed.aggregators["SYN"][1].candles) == 4 * len(candles)
+
+
+def test_feed_subscribes_and_ignores_other_products(store_paths):
+	candles = generate_candles(10, "calm", 0)
+	messages = FeedFuncs.rates_to_matches(candles, "SYN", 1)
+	other = FeedFuncs.rates_to_matches(candles * [1, 2, 2, 2, 2, 1], "OTHER", 1)
+	duplicates = [dict(message, type="ticker", price="1.0") for message in messages]
+	(feed, server) = replay([message for pair in zip(messages, other, duplicates) for message in pair],
+		[("SYN", 1)])
+
+	assert server.subscriptions == [{"type": "subscribe", "product_ids": ["SYN-USD"],
+		"channels": ["matches", "ticker", "heartbeat"]}]
+	assert list(feed.aggregators) == ["SYN"]
+	assert np.array_equal(feed.aggregators["SYN"][1].candles.get_candles()[:, :5], candles[:, :5])
+
+
+def test_misaligned_candles_are_rejected():
+	candles = generate_candles(3, "calm", 0, startTime=1599998430)
+	with pytest.raises(ValueError):
+		FeedFuncs.rates_to_matches(candles, "SYN", 1)
+
+
+def test_seeded_candle_skips_trades_before_the_request():
+	candles = generate_candles(3, "calm", 0)
+	aggregator = FeedFuncs.CandleAggregator("SYN", 1)
+	seedTime = candles[-1, 0] + 30.0
+	aggregator.seed(candles, seedTime)
+
+	assert aggregator.add_trade(seedTime - 10.0, 1000.0, 5.0) is None
+	assert aggregator.add_trade(seedTime, 1000.0, 5.0) is None
+	assert np.array_equal(aggregator.candles.get_candle(-1), candles[-1])
+
+	aggregator.add_trade(seedTime + 1.0, candles[-1, 4], 5.0)
+	assert aggregator.candles.get_candle(-1)[5] == candles[-1, 5] + 5.0
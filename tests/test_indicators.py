@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests of the batched indicators and the streaming indicator states against the original
+one-period formulas.
+"""
+
+# Library imports
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.lib.stride_tricks import sliding_window_view
+
+# File imports
+from BacktestFuncs import get_rsi_table
+from BenchmarkFuncs import generate_rates
+from IndicatorFuncs import BbState, RsiState, get_bb, get_bb_table, get_rsi, get_rsi_matrix
+
+
+def reference_rsi(rates, periodLength):
+	"""
+	Returns the relative-strength-index of rates stepped one candle at a time, as get_rsi
+	did before the batched kernel.
+	"""
+
+	rsiValues = []
+	(currentPrice, gains, losses) = (0.0, 0.0, 0.0)
+	for (counter, value) in enumerate(rates.values):
+		if counter == 0:
+			currentPrice = float(value)
+		elif counter < periodLength:
+			(previousPrice, currentPrice) = (currentPrice, float(value))
+			delta = currentPrice - previousPrice
+			if delta >= 0:
+				gains += (delta / periodLength)
+			else:
+				losses += (abs(delta) / periodLength)
+		if counter == periodLength:
+			rsiValues.append(100.0 if losses == 0.0 else 100.0 - (100.0 / (1 + (gains / losses))))
+		if counter >= periodLength:
+			(previousPrice, currentPrice) = (currentPrice, float(value))
+			delta = currentPrice - previousPrice
+			if delta >= 0:
+				gains = ((gains * (periodLength - 1)) + delta) / periodLength
+				losses = losses * (periodLength - 1) / periodLength
+			else:
+				gains = gains * (periodLength - 1) / periodLength
+				losses = ((losses * (periodLength - 1)) + abs(delta)) / periodLength
+			rsiValues.append(100.0 if losses == 0.0 else 100.0 - (100.0 / (1 + (gains / losses))))
+	return pd.Series(rsiValues, index=rates.index[periodLength - 1:])
+
+
+def reference_bb(values, periodLength):
+	"""
+	Returns the mean and sample standard deviation of every window of values, two-pass so
+	they are exact up to rounding.
+	"""
+
+	windows = sliding_window_view(values, periodLength)
+	return (windows.mean(axis=1), windows.std(axis=1, ddof=1))
+
+
+@pytest.fixture(scope="module")
+def close():
+	close = generate_rates(400, "mixed", 5)["Close"]
+
+	# Flat stretches give zero gains and losses and zero deviations
+	close.iloc[50:60] = close.iloc[50]
+	return close
+
+
+def test_get_rsi_is_identical_to_the_loop(close):
+	for periodLength in range(1, 20):
+		expected = reference_rsi(close, periodLength)
+		rsi = get_rsi(close, periodLength)
+		assert rsi.index.equals(expected.index)
+		assert np.array_equal(rsi.values, expected.values)
+
+
+def test_rsi_matrix_rows_are_identical_to_the_loop(close):
+	periodLengths = [7, 1, 19, 3, 7] + list(range(2, 19))
+	(rsiMatrix, warmUp) = get_rsi_matrix(close, periodLengths)
+	assert rsiMatrix.shape == warmUp.shape == (len(periodLengths), len(close))
+	for (row, periodLength) in enumerate(periodLengths):
+		assert np.array_equal(rsiMatrix[row, periodLength - 1:], reference_rsi(close, periodLength).values)
+		assert warmUp[row].sum() == periodLength - 1 and warmUp[row, :periodLength - 1].all()
+		assert np.isnan(rsiMatrix[row, :periodLength - 1]).all()
+
+	rsiTable = get_rsi_table(close, periodLengths)
+	for periodLength in periodLengths:
+		assert np.array_equal(rsiTable[periodLength], rsiMatrix[periodLengths.index(periodLength)],
+			equal_nan=True)
+
+
+def test_rsi_state_is_identical_to_the_loop(close):
+	state = RsiState(6, 20)
+	for end in range(1, 120):
+		# The open candle is updated before it closes at its final value
+		opened = close.iloc[:end].copy()
+		opened.iloc[-1] *= 1.01
+		state.sync(opened)
+		state.sync(close.iloc[:end])
+		# The loop needs one rate more than the period length before its first value
+		if end > 6:
+			expected = reference_rsi(close.iloc[:end], 6).values
+			assert state.rsi == expected[-1]
+			history = state.get_history()
+			assert np.array_equal(history[-min(len(history), len(expected)):], expected[-len(history):])
+		elif end < 6:
+			assert np.isnan(state.rsi)
+
+
+@pytest.mark.parametrize("regime", ["calm", "trending", "volatile", "mixed"])
+def test_bb_table_matches_the_direct_statistics(regime):
+	values = generate_rates(3000, regime, 7)["Close"].values.copy()
+	values[100:140] = values[100]
+	(bbMiddleTable, bbStdTable) = get_bb_table(values, range(2, 37))
+	for periodLength in range(2, 37):
+		(bbMiddle, bbStd) = reference_bb(values, periodLength)
+		assert np.isnan(bbMiddleTable[periodLength, :periodLength - 1]).all()
+		assert np.isnan(bbStdTable[periodLength, :periodLength - 1]).all()
+		assert np.allclose(bbMiddleTable[periodLength, periodLength - 1:], bbMiddle, rtol=0.0, atol=1e-8)
+		assert np.allclose(bbStdTable[periodLength, periodLength - 1:], bbStd, rtol=0.0, atol=1e-8)
+	assert np.isnan(bbMiddleTable[:2]).all()
+
+	# The pandas rolling standard deviation drifts on flat windows, only the middle bands are compared
+	bbMiddle = get_bb(pd.Series(values), 20, 2.0)[1]
+	assert np.allclose(bbMiddle.values, bbMiddleTable[20], rtol=0.0, atol=1e-8, equal_nan=True)
+
+
+def test_bb_table_handles_short_rates():
+	(bbMiddleTable, bbStdTable) = get_bb_table(np.array([1.0, 2.0, 4.0]), [1, 3, 5])
+	assert np.array_equal(bbMiddleTable[1], [1.0, 2.0, 4.0]) and np.isnan(bbStdTable[1]).all()
+	assert bbMiddleTable[3, 2] == pytest.approx(7.0 / 3.0)
+	assert bbStdTable[3, 2] == pytest.approx(np.std([1.0, 2.0, 4.0], ddof=1))
+	assert np.isnan(bbMiddleTable[5]).all()
+
+
+def test_bb_state_matches_rolling_statistics(close):
+	state = BbState(20, 2.0)
+	for end in range(1, 200):
+		opened = close.iloc[:end].copy()
+		opened.iloc[-1] *= 0.99
+		state.sync(opened)
+		state.sync(close.iloc[:end])
+		if end < 20:
+			assert np.isnan(state.bands).all()
+			continue
+		(bbMiddle, bbStd) = reference_bb(close.values[end - 20:end], 20)
+		assert np.allclose(state.bands, (bbMiddle[0] + 2.0 * bbStd[0], bbMiddle[0], bbMiddle[0] - 2.0 * bbStd[0]),
+			rtol=0.0, atol=1e-8)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests of the Kraken balance snapshot and order path against a mocked HTTP session.
+"""
+
+# Library imports
+import threading
+import pytest
+
+# File imports
+import ClientFuncs
+import KrakenFuncs
+
+
+class FakeResponse:
+	def __init__(self, data):
+		self.data = data
+
+	def json(self):
+		return self.data
+
+
+class FakeSession:
+	"""
+	Answers Kraken's private endpoints and records every request with its thread.
+	"""
+
+	def __init__(self):
+		self.requests = []
+		self.volumes = []
+		self.balances = {"ZUSD": "100.0", "LRC": "0.0"}
+
+	def request(self, method, url, **kwargs):
+		path = url.replace("https://api.kraken.com", "")
+		self.requests.append((path, threading.current_thread()))
+		if path == "/0/private/Balance":
+			return FakeResponse({"error": [], "result": dict(self.balances)})
+		if path == "/0/private/AddOrder":
+			self.volumes.append(float(kwargs["data"]["volume"]))
+			self.balances = {"ZUSD": "0.0", "LRC": "250.0"}
+			return FakeResponse({"error": [], "result": {"txid": ["T"]}})
+		raise AssertionError("unexpected request " + path)
+
+
+@pytest.fixture
+def session(monkeypatch, fake_credentials):
+	session = FakeSession()
+	monkeypatch.setitem(ClientFuncs._sessions, "https://api.kraken.com", session)
+	monkeypatch.setattr(KrakenFuncs, "balanceRefreshDelay", 0.0)
+	KrakenFuncs.kraken_invalidate_balances()
+	yield session
+	if KrakenFuncs._balanceRefresh["thread"] is not None:
+		KrakenFuncs._balanceRefresh["thread"].join(5.0)
+	KrakenFuncs.kraken_invalidate_balances()
+
+
+def place_order(session, side, price=0.4):
+	"""
+	Places an order and returns the paths requested by the calling thread.
+	"""
+
+	start = len(session.requests)
+	KrakenFuncs.kraken_order(price, side, "LRC", "ZUSD", "USD")
+	KrakenFuncs._balanceRefresh["thread"].join(5.0)
+	caller = threading.current_thread()
+	return [path for (path, thread) in session.requests[start:] if thread is caller]
+
+
+def test_order_shortly_after_another_is_one_request(session):
+	assert place_order(session, "buy") == ["/0/private/Balance", "/0/private/AddOrder"]
+	assert place_order(session, "sell") == ["/0/private/AddOrder"]
+	assert place_order(session, "buy") == ["/0/private/AddOrder"]
+
+
+def test_refresh_after_order_includes_the_fill(session):
+	place_order(session, "buy")
+	assert KrakenFuncs.kraken_get_balance("LRC") == "250.0"
+	assert session.requests[-1][0] == "/0/private/Balance"
+
+
+def test_failed_refresh_falls_back_to_a_request(session, monkeypatch):
+	place_order(session, "buy")
+	refresh = KrakenFuncs.kraken_refresh_balances
+	monkeypatch.setattr(KrakenFuncs, "kraken_refresh_balances", lambda: 1 / 0)
+	place_order(session, "sell")
+	monkeypatch.setattr(KrakenFuncs, "kraken_refresh_balances", refresh)
+	assert place_order(session, "buy") == ["/0/private/Balance", "/0/private/AddOrder"]
+
+
+def test_order_requests_balances_once_the_snapshot_expires(session):
+	place_order(session, "buy")
+
+	# Funds moved by hand since the refresh are picked up by the next order
+	session.balances = {"ZUSD": "0.0", "LRC": "40.0"}
+	KrakenFuncs._balanceSnapshot["time"] -= KrakenFuncs.balanceMaxAge + 1.0
+	assert place_order(session, "sell") == ["/0/private/Balance", "/0/private/AddOrder"]
+	assert session.volumes[-1] == pytest.approx(40.0 * 0.99)
+	assert KrakenFuncs.balanceMaxAge <= 60.0
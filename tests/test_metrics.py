@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests of the rolling latency histograms and the stage timers.
+"""
+
+# Library imports
+import bisect
+import math
+import time
+import types
+import numpy as np
+import pytest
+
+# File imports
+import MetricsFuncs
+
+
+@pytest.fixture
+def clock(monkeypatch):
+	"""
+	Replaces the monotonic clock the histograms rotate their slices by.
+	"""
+
+	clock = types.SimpleNamespace(now=1000.0)
+	monkeypatch.setattr(MetricsFuncs, "time", types.SimpleNamespace(monotonic=lambda: clock.now,
+		perf_counter=time.perf_counter, time=time.time))
+	return clock
+
+
+def test_percentiles_are_the_buckets_of_the_exact_percentiles(clock):
+	latencies = np.random.default_rng(0).lognormal(-4.0, 1.5, 5000).clip(0.0002, 5.0)
+	histogram = MetricsFuncs.LatencyHistogram()
+	for seconds in latencies:
+		histogram.record(float(seconds))
+	summary = histogram.get_summary()
+
+	assert summary["count"] == summary["total"] == len(latencies)
+	assert summary["max"] == latencies.max()
+	assert summary["mean"] == pytest.approx(latencies.mean())
+	ordered = np.sort(latencies)
+	for (name, quantile) in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+		exact = ordered[math.ceil(quantile * len(latencies)) - 1]
+		bucket = bisect.bisect_left(MetricsFuncs.latencyBuckets, exact)
+		assert summary[name] == min(MetricsFuncs.latencyBuckets[bucket], latencies.max())
+		assert exact <= summary[name] < exact * math.sqrt(2.0) * 1.0001
+
+
+def test_percentiles_are_capped_at_the_maximum(clock):
+	histogram = MetricsFuncs.LatencyHistogram()
+	for seconds in (0.0011, 0.0012, 100.0):
+		histogram.record(seconds)
+	summary = histogram.get_summary()
+	assert summary["p50"] == MetricsFuncs.latencyBuckets[bisect.bisect_left(MetricsFuncs.latencyBuckets, 0.0012)]
+	assert summary["p99"] == summary["max"] == 100.0
+
+
+def test_window_drops_old_slices(clock):
+	histogram = MetricsFuncs.LatencyHistogram()
+	histogram.record(0.5)
+	clock.now += MetricsFuncs.windowSeconds / MetricsFuncs.windowSlices
+	histogram.record(0.001)
+	assert histogram.get_summary()["count"] == 2
+
+	clock.now += MetricsFuncs.windowSeconds - 1.0
+	summary = histogram.get_summary()
+	assert (summary["count"], summary["max"], summary["p50"]) == (1, 0.001, 0.001)
+
+	clock.now += MetricsFuncs.windowSeconds
+	summary = histogram.get_summary()
+	assert (summary["count"], summary["p50"], summary["max"], summary["total"]) == (0, None, None, 2)
+
+
+def test_timer_records_when_the_block_raises(monkeypatch):
+	monkeypatch.setattr(MetricsFuncs, "_latencies", {})
+	with pytest.raises(ZeroDivisionError):
+		with MetricsFuncs.timed("stage"):
+			1 / 0
+	assert MetricsFuncs.get_metrics()["latencies"]["stage"]["count"] == 1
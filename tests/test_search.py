@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests of the parameter search strategies against the full grid on synthetic regimes.
+"""
+
+# Library imports
+import numpy as np
+import pytest
+
+# File imports
+from BenchmarkFuncs import benchmark_search, generate_rates
+from BacktestFuncs import build_rsi_bb_grid, get_rsi_table
+from IndicatorFuncs import get_bb_table
+from SearchFuncs import search_rsi_bb, searchStrategies
+
+
+@pytest.fixture(scope="module")
+def quality():
+	return benchmark_search(regimes=("trending", "volatile"), count=300)
+
+
+def test_no_strategy_beats_the_grid(quality):
+	for regime in ("trending", "volatile"):
+		assert quality["grid." + regime] == 1.0
+		for strategy in searchStrategies:
+			assert 0.0 <= quality[strategy + "." + regime] <= 1.0
+
+
+def test_coarse_to_fine_nears_the_grid_with_a_tenth_of_it(quality):
+	for regime in ("trending", "volatile"):
+		assert quality["coarse_to_fine." + regime] >= 0.95
+
+
+def test_budget_defaults_to_a_tenth_of_the_grid():
+	grid = build_rsi_bb_grid(range(4, 13), range(80, 66, -2), range(20, 34, 2), 36,
+		[float(bbLevelDouble) / 4.0 for bbLevelDouble in range(6, 12)], [0.02], [0.99])
+	rates = generate_rates(250, "mixed", 2)
+	close = rates["Close"]
+	tables = (close.values, rates["High"].values, rates["Low"].values,
+		get_rsi_table(close, np.unique(grid["rsiPeriodLength"]))) + get_bb_table(close.values,
+		np.unique(grid["bbPeriodLength"]))
+	size = len(grid["rsiPeriodLength"])
+
+	(delta, actionGainLoss, inSellPeriod, inBuyPeriod, simulations, pruned) = search_rsi_bb(*tables, grid)
+	assert simulations == size // 10
+	assert np.count_nonzero(~np.isnan(delta)) + pruned == simulations
+
+
+def test_sampling_the_whole_grid_finds_its_best():
+	grid = build_rsi_bb_grid(range(4, 8), range(80, 70, -4), range(20, 30, 4), 20, [1.5, 2.0], [0.02], [0.99])
+	rates = generate_rates(300, "volatile", 1)
+	close = rates["Close"]
+	tables = (close.values, rates["High"].values, rates["Low"].values,
+		get_rsi_table(close, np.unique(grid["rsiPeriodLength"]))) + get_bb_table(close.values,
+		np.unique(grid["bbPeriodLength"]))
+	size = len(grid["rsiPeriodLength"])
+
+	best = np.nanmax(search_rsi_bb(*tables, grid, strategy="grid")[0])
+	for strategy in ("random", "latin_hypercube", "coarse_to_fine"):
+		delta = search_rsi_bb(*tables, grid, strategy=strategy, budget=size)[0]
+		assert np.nanmax(delta) == best
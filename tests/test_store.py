@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests of the candle store and the order journal.
+"""
+
+# Library imports
+import os
+import sqlite3
+import time
+import numpy as np
+from datetime import datetime
+
+# File imports
+import StoreFuncs
+from HelperFuncs import get_order_history
+
+
+def get_tables(path):
+	conn = sqlite3.connect(path)
+	try:
+		return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+	finally:
+		conn.close()
+
+
+def write_legacy_csv(store_paths, rows, modified):
+	path = store_paths / "order_history.csv"
+	path.write_text("".join(row + "\n" for row in rows))
+	os.utime(path, (modified.timestamp(), modified.timestamp()))
+	(store_paths / "config.ini").write_text("[settings]\naltSymbol = LRC\n")
+
+
+def pd_time(*parts):
+	"""
+	Returns a local datetime as the naive UTC time get_order_history indexes by.
+	"""
+
+	return datetime.utcfromtimestamp(datetime(*parts).timestamp())
+
+
+def test_every_file_only_gets_its_own_table(store_paths):
+	candles = np.array([[60.0, 1.0, 2.0, 1.5, 1.8, 10.0], [120.0, 1.1, 2.1, 1.6, 1.9, 11.0]])
+	StoreFuncs.store_candles("BTC", 60, candles)
+	StoreFuncs.store_order(time.time(), "XXBT", "buy", 100.0)
+
+	assert get_tables(StoreFuncs.storePath) == {"candles"}
+	assert get_tables(StoreFuncs.orderPath) == {"orders"}
+	assert np.array_equal(StoreFuncs.load_candles("BTC", 60), candles)
+	assert StoreFuncs.get_last_candle_time("BTC", 60) == 120
+
+
+def test_legacy_csv_is_imported_once_with_resolved_years(store_paths):
+	write_legacy_csv(store_paths, ["Date,Price,Side", "11/30 - 10:00:00,0.5,buy", "12/31 - 23:00:00,0.6,sell",
+		"01/02 - 08:30:00,0.4,buy", "02/29 - 12:00:00,0.45,sell", "03/01 - 09:00:00,0.5,buy"],
+		datetime(2025, 3, 1, 9, 0, 5))
+
+	history = get_order_history()
+	assert list(history.index) == [pd_time(2023, 11, 30, 10), pd_time(2023, 12, 31, 23), pd_time(2024, 1, 2, 8, 30),
+		pd_time(2024, 2, 29, 12), pd_time(2025, 3, 1, 9)]
+	assert list(history["Side"]) == ["buy", "sell", "buy", "sell", "buy"]
+	assert list(history["Price"]) == [0.5, 0.6, 0.4, 0.45, 0.5]
+	assert set(history["Symbol"]) == {"LRC"}
+
+	# New orders are appended, the CSV is not imported a second time
+	StoreFuncs.store_order(time.time(), "LRC", "sell", 0.55)
+	StoreFuncs._connections.__dict__.clear()
+	assert len(get_order_history()) == 6
+
+
+def test_journal_without_legacy_csv_starts_empty(store_paths):
+	assert len(get_order_history()) == 0
+	write_legacy_csv(store_paths, ["01/02 - 08:30:00,0.4,buy"], datetime(2025, 1, 3))
+	StoreFuncs._connections.__dict__.clear()
+	assert len(get_order_history()) == 0
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests of the snapshot server and the viewer that mirrors it.
+"""
+
+# Library imports
+import time
+import types
+import numpy as np
+
+# File imports
+from BenchmarkFuncs import generate_rates
+from StrategyFuncs import IndicatorSnapshot, TickSnapshot, TradingPair
+from ViewerFuncs import RemoteRunner, SnapshotServer
+
+
+def make_runner(version, price):
+	"""
+	Returns a stand-in runner publishing one snapshot of the given version.
+	"""
+
+	pair = TradingPair("SYN-USD", "SYN", "SYN", "USD", "ZUSD", 1, 0.02)
+	rates = generate_rates(30, "calm", 0, price=price)
+	values = rates["Close"].values
+	indicators = IndicatorSnapshot((rates.index[-1], 6, 20, 2.0), 6, 20, 2.0, values, values, values, values)
+	snapshot = TickSnapshot(version, pair, float(version), rates, indicators, 6, 70.0, 30.0, 20, 2.0, 0.0, 0.0)
+	return types.SimpleNamespace(pairs=[pair], snapshots={pair.name: snapshot})
+
+
+def wait_for(condition, timeout=10.0):
+	deadline = time.monotonic() + timeout
+	while not condition():
+		assert time.monotonic() < deadline
+		time.sleep(0.02)
+
+
+def test_viewer_mirrors_snapshots_across_a_restart():
+	server = SnapshotServer(make_runner(5, 100.0))
+	port = server.server.server_address[1]
+	viewer = RemoteRunner(server.url, interval=0.02)
+	viewer.start()
+	try:
+		wait_for(lambda: "SYN-USD" in viewer.snapshots)
+		assert viewer.snapshots["SYN-USD"].version == 5
+		assert viewer.startIds["SYN-USD"] == server.startId
+
+		# The restarted bot counts versions from 1 again
+		server.close()
+		server = SnapshotServer(make_runner(1, 200.0), port)
+		wait_for(lambda: viewer.startIds["SYN-USD"] == server.startId)
+		snapshot = viewer.snapshots["SYN-USD"]
+		assert snapshot.version == 1
+		assert np.array_equal(snapshot.rates.values, make_runner(1, 200.0).snapshots["SYN-USD"].rates.values)
+	finally:
+		viewer.stop()
+		viewer.thread.join(5.0)
+		server.close()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests of the walk-forward test on synthetic rates.
+"""
+
+# Library imports
+import numpy as np
+import pytest
+
+# File imports
+from BacktestFuncs import backtest_rsi_bb, build_rsi_bb_grid, get_rsi_table
+from BenchmarkFuncs import generate_rates
+from IndicatorFuncs import get_bb_table
+from StrategyFuncs import RsiBbStrategy
+from WalkForwardFuncs import walk_forward_rsi_bb
+
+
+def test_windows_are_returned_without_printing(capsys):
+	rates = generate_rates(310, "volatile", 4)
+	windows = walk_forward_rsi_bb("SYN", 1, rates=rates, optimizeLength=250, testLength=30, workers=1)
+
+	assert capsys.readouterr().out == ""
+	assert len(windows) == 2
+	assert list(windows["testStart"]) == [rates.index[250], rates.index[280]]
+	assert windows.attrs["summary"]["windows"] == windows.attrs["summary"]["tested"] == 2
+	assert np.isfinite(windows["inSampleDelta"]).all()
+
+
+def test_windows_trade_the_in_sample_best_on_unseen_candles():
+	rates = generate_rates(310, "volatile", 4)
+	(optimizeLength, testLength) = (250, 30)
+	windows = walk_forward_rsi_bb("SYN", 1, rates=rates, optimizeLength=optimizeLength, testLength=testLength,
+		stopLossPortion=0.02, searchStrategy="grid", workers=1)
+	options = {"hysteresis": RsiBbStrategy.analysisHysteresis, "trailBbMiddle": RsiBbStrategy.analysisTrailBbMiddle}
+	grid = build_rsi_bb_grid(range(4, 13), range(80, 66, -2), range(20, 34, 2), 36,
+		[float(bbLevelDouble) / 4.0 for bbLevelDouble in range(6, 12)], [0.02], [RsiBbStrategy.analysisPortion])
+
+	for (number, window) in windows.iterrows():
+		windowRates = rates.iloc[number * testLength:(number * testLength) + optimizeLength + testLength]
+		close = windowRates["Close"]
+
+		# The chosen row is the best of the whole grid on the optimize candles
+		optimize = windowRates.iloc[:optimizeLength]
+		(bbMiddleTable, bbStdTable) = get_bb_table(optimize["Close"].values, np.unique(grid["bbPeriodLength"]))
+		delta = backtest_rsi_bb(optimize["Close"].values, optimize["High"].values, optimize["Low"].values,
+			get_rsi_table(optimize["Close"], np.unique(grid["rsiPeriodLength"])), bbMiddleTable, bbStdTable, grid,
+			**options)[0]
+		assert window["inSampleDelta"] == pytest.approx(delta.max(), rel=0.0, abs=1e-12)
+		chosen = ((grid["rsiPeriodLength"] == window["rsiPeriodLength"]) &
+			(grid["rsiUpperBound"] == window["rsiUpperBound"]) & (grid["rsiLowerBound"] == window["rsiLowerBound"]) &
+			(grid["bbPeriodLength"] == window["bbPeriodLength"]) & (grid["bbLevel"] == window["bbLevel"]))
+		assert delta[chosen] == pytest.approx([delta.max()], rel=0.0, abs=1e-12)
+
+		# Trading starts on the first unseen candle, the arrays are cut so it is the row's first candle
+		row = {key: value[chosen] for (key, value) in grid.items()}
+		cut = optimizeLength - (int(window["bbPeriodLength"]) - 1)
+		(bbMiddleTable, bbStdTable) = get_bb_table(close.values, row["bbPeriodLength"])
+		rsiTable = get_rsi_table(close, row["rsiPeriodLength"])
+		(outDelta, outGainLoss) = backtest_rsi_bb(close.values[cut:], windowRates["High"].values[cut:],
+			windowRates["Low"].values[cut:], rsiTable[:, cut:], bbMiddleTable[:, cut:], bbStdTable[:, cut:], row,
+			**options)[:2]
+		assert window["outSampleDelta"] == pytest.approx(outDelta[0], rel=0.0, abs=1e-12)
+		assert window["outSampleGainLoss"] == pytest.approx(outGainLoss[0], rel=0.0, abs=1e-12)
+		testStart = close.iloc[optimizeLength]
+		assert window["holdGainLoss"] == pytest.approx((close.iloc[-1] - testStart) / (2 * testStart), rel=0.0,
+			abs=1e-12)